@@ -2,6 +2,7 @@ import os
 import threading
 import subprocess
 import time
+from dataclasses import replace
 import kivy
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
@@ -14,11 +15,18 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from core import config
-from core.pool_selector import pick_best_pool_sync
+from core.pool_selector import rank_pools_sync
 from core.watchdog import build_xmrig_cmd
+from core.xmrig_config import retune_config
 from core.ai_neural import get_optimizer, TrainingSample
+from core.ai_autotune import Telemetry, TunerConfig, make_strategy
+from core.trace import new_recorder
+from core.cpu_topology import AffinityPlanner, thread_ceiling
+from core.memory_planner import MemoryPlanner
+from core.thermal_governor import DutyCycler, ThermalGovernor, battery_low
 from core.platform_sensors import PlatformMonitor
 from core.balance_tracker import BalanceTracker
+from core.xmrig_api import TelemetryPoller, XmrigApiClient, new_access_token
 from core.wallet_storage import wallet_exists, load_wallet, save_wallet
 from core.wallet_gen import generate_wallet
 import psutil
@@ -85,6 +93,14 @@ class MinerUI(BoxLayout):
         self.mining_thread = None
         self.stop_event = threading.Event()
         self.balance_tracker = None
+        self.telemetry = None
+        self.threads = None
+        self.tuner = None
+        self.tuner_config = None
+        self.governor = None
+        self.duty_cycler = None
+        self.planner = None
+        self.memory = None
         self.platform_monitor = PlatformMonitor()
         self.ai_optimizer = get_optimizer()
 
@@ -94,36 +110,70 @@ class MinerUI(BoxLayout):
             self.status.text = 'Error: Enter wallet address'
             return
         
-        host, port, latency = pick_best_pool_sync()
+        # Latency-ranked pools: best first, the rest as XMRig failover
+        pools = rank_pools_sync(wallet=wallet)
+        host, port, latency = pools[0]
         
         # Get current state
         state = self.platform_monitor.get_state()
         
+        # Cache-derived RandomX ceiling bounds every tuner
+        max_threads = thread_ceiling(os.cpu_count() or 1)
+        
         # AI suggests optimal threads
         threads = self.ai_optimizer.suggest_optimal_threads({
-            'threads': os.cpu_count() or 1,
+            'threads': max_threads,
             'cpu_temp': state['cpu_temp'],
             'cpu_usage': state['cpu_usage'],
             'throttled': state['is_throttling'],
             'latency_ms': latency * 1000.0,
             'battery_level': state['battery_level'],
-        }, os.cpu_count() or 1)
+        }, max_threads)
+        
+        # big.LITTLE: explicit placement, big cores first
+        self.planner = AffinityPlanner()
+        if self.planner.active:
+            threads = min(threads, self.planner.max_threads)
+        
+        # Fast vs light RandomX from free RAM (avoids low-memory-killer restarts)
+        self.memory = MemoryPlanner()
+        plan = self.memory.plan(threads)
+        print(plan.report())
         
         bin_path = os.path.abspath(config.XMRIG_BIN_ANDROID)
-        cmd = build_xmrig_cmd(bin_path, wallet, host, port, threads)
+        api_token = new_access_token()
+        cmd = build_xmrig_cmd(bin_path, wallet, host, port, threads, api_token=api_token,
+                              affinity=self.planner.cpus_for(threads), randomx_mode=plan.randomx_mode,
+                              failover=[p[:2] for p in pools[1:]])
         
         self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                                      universal_newlines=True, bufsize=1)
         
         self.balance_tracker = BalanceTracker(host, wallet)
+        self.balance_tracker.start_balance_refresh()
+        self.telemetry = TelemetryPoller(XmrigApiClient(token=api_token))
+        self.telemetry.start()
+        self.threads = threads
+        self.tuner = make_strategy(optimizer=self.ai_optimizer, max_threads=max_threads,
+                                   mode_allowed=self.memory.mode_allowed)
+        self.tuner_config = TunerConfig(threads, plan.randomx_mode)
+        self.governor = ThermalGovernor(max_threads)
+        self.duty_cycler = DutyCycler(self.telemetry.client)
         self.status.text = f'Mining: {threads}T @ {host}:{port}'
         
         # Monitor loop
         def monitor():
+            last_retune = time.time()
+            trace = new_recorder(pool=f"{host}:{port}")
             while not self.stop_event.is_set() and self.proc and self.proc.poll() is None:
                 try:
+                    # Drain stdout so XMRig never blocks on a full pipe; only
+                    # parse it while the HTTP API has nothing fresh.
                     line = self.proc.stdout.readline()
-                    if line:
+                    stats = self.telemetry.latest(max_age=config.XMRIG_API_POLL_SEC * 3)
+                    if stats:
+                        self.balance_tracker.update_from_stats(stats)
+                    elif line:
                         self.balance_tracker.parse_xmrig_output(line)
                     
                     # Update UI via Clock (thread-safe)
@@ -141,34 +191,106 @@ class MinerUI(BoxLayout):
                     # Feed data to AI
                     state = self.platform_monitor.get_state()
                     sample = TrainingSample(
-                        current_threads=threads,
+                        current_threads=self.threads,
                         cpu_temp=state['cpu_temp'] or 50.0,
                         cpu_usage=state['cpu_usage'],
                         throttled=1 if state['is_throttling'] else 0,
-                        latency_ms=latency * 1000.0,
+                        latency_ms=self.balance_tracker.pool_latency_ms or latency * 1000.0,
                         battery_level=state['battery_level'] or 100,
                         hashrate=self.balance_tracker.get_hashrate(),
                         accepts=self.balance_tracker.shares_accepted,
                         rejects=self.balance_tracker.shares_rejected,
+                        cpu_priority=self.tuner_config.priority,
                     )
                     self.ai_optimizer.add_sample(sample)
+                    reading = Telemetry(
+                        hash_rate=sample.hashrate,
+                        threads=self.threads,
+                        cpu_temp=state['cpu_temp'],
+                        rejects=sample.rejects,
+                        accepts=sample.accepts,
+                        latency_ms=sample.latency_ms,
+                        throttled=state['is_throttling'],
+                        cpu_busy=state['cpu_usage'],
+                        battery_level=state['battery_level'],
+                    )
+                    self.tuner.observe(reading, self.tuner_config)
+                    if trace:
+                        trace.record(reading, self.tuner_config)
+                    
+                    # Thermal/battery governor: step threads or duty cycle
+                    # instead of stopping (keeps the RandomX dataset)
+                    decision = self.governor.update(state['cpu_temp'], self.threads,
+                                                    battery_low=battery_low(state))
+                    self.duty_cycler.set_duty(decision.duty)
+                    
+                    # Per-thread hashrate decides how many little cores are worth it
+                    replan = self.planner.observe(stats)
+                    cap = min(decision.max_threads, self.planner.max_threads or decision.max_threads)
+                    
+                    # Retune the live miner within the governor's cap
+                    target = self.tuner_config
+                    if time.time() - last_retune >= config.RETUNE_INTERVAL_SEC:
+                        last_retune = time.time()
+                        target = self.tuner.suggest(reading, self.tuner_config, cap)
+                    if target.threads > cap:
+                        target = replace(target, threads=cap)
+                    # Memory pressure rules fast mode out for the rest of the run
+                    if self.memory.check(self.tuner_config.randomx_mode):
+                        print("Memory pressure: switching RandomX to light mode")
+                    target = replace(target, randomx_mode=self.memory.clamp_mode(target.randomx_mode))
+                    if target != self.tuner_config or replan:
+                        try:
+                            self.telemetry.client.reconfigure(
+                                threads=target.threads, priority=target.priority,
+                                affinity=self.planner.cpus_for(target.threads),
+                                randomx_mode=target.randomx_mode)
+                            self.tuner_config = target
+                            self.threads = target.threads
+                        except Exception as e:
+                            print(f"Live reconfigure failed: {e}")
+                            # Watched config file: XMRig reloads it in place
+                            if retune_config(threads=target.threads, priority=target.priority,
+                                             affinity=self.planner.cpus_for(target.threads),
+                                             randomx_mode=target.randomx_mode):
+                                self.tuner_config = target
+                                self.threads = target.threads
+                            elif decision.reason == "over limit":
+                                # No live API: stopping is the only way left to cool down
+                                Clock.schedule_once(lambda dt: self.stop('⚠️ Paused: thermal'), 0)
+                                break
                     
-                    # Auto-pause on thermal/battery
-                    if state['should_reduce']:
-                        Clock.schedule_once(lambda dt: self.status.text.__setattr__('text', '⚠️ Paused: thermal/battery'), 0)
-                        self.stop()
-                        break
+                    if decision.duty <= 0:
+                        status = '⚠️ Paused: battery' if self.governor.battery_paused else '⚠️ Paused: thermal'
+                    elif decision.duty < 1:
+                        status = f'Mining: {self.threads}T @ {host}:{port} ({decision.duty:.0%} duty)'
+                    else:
+                        status = f'Mining: {self.threads}T @ {host}:{port}'
+                    Clock.schedule_once(lambda dt, text=status: setattr(self.status, 'text', text), 0)
                     
                     time.sleep(5)
                 except Exception as e:
                     print(f"Monitor error: {e}")
                     break
+            self.tuner.save()
+            self.ai_optimizer.save_if_dirty()
+            if trace:
+                trace.close()
         
         self.mining_thread = threading.Thread(target=monitor, daemon=True)
         self.mining_thread.start()
 
-    def stop(self):
+    def stop(self, status: str = 'Idle'):
+        """Stop mining; call on the Kivy main thread (it updates widgets)."""
         self.stop_event.set()
+        if self.duty_cycler:
+            self.duty_cycler.stop()
+            self.duty_cycler = None
+        if self.telemetry:
+            self.telemetry.stop()
+            self.telemetry = None
+        if self.balance_tracker:
+            self.balance_tracker.stop()
         if self.proc and self.proc.poll() is None:
             self.proc.terminate()
             try:
@@ -176,7 +298,8 @@ class MinerUI(BoxLayout):
             except subprocess.TimeoutExpired:
                 self.proc.kill()
         self.proc = None
-        self.status.text = 'Idle'
+        self.status.text = status
+        self.btn.text = 'Start Mining'
 
     def toggle(self, _):
         if self.proc is None:
@@ -185,7 +308,6 @@ class MinerUI(BoxLayout):
             self.btn.text = 'Pause Mining'
         else:
             self.stop()
-            self.btn.text = 'Start Mining'
 
 
 class MinerApp(App):
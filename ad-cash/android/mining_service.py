@@ -19,7 +19,11 @@ PythonService.mService.setAutoRestartService(True)
 def start_mining_service(wallet_address: str):
     """Start mining in background service."""
     binary_path = os.path.abspath(config.XMRIG_BIN_ANDROID)
-    run_supervised(binary_path, wallet_address)
+    metrics = run_supervised(binary_path, wallet_address)
+    if metrics.gave_up:
+        # Restarting the service would only hit the same failure again
+        print(f"Mining stopped: {metrics.gave_up} (exit {metrics.last_exit_code}), see {config.WATCHDOG_METRICS_PATH}")
+        PythonService.mService.setAutoRestartService(False)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,263 @@
+"""
+Micro-benchmarks for the controller's per-tick hot paths.
+
+Every case reports per-call latency (median / p95) and the peak Python heap
+growth of one call (tracemalloc), and all three are checked against the
+committed budgets in hot_path_budgets.json. Inputs come from fixtures: recorded XMRig
+console logs, fake sysfs and /proc trees and seeded synthetic sample sets.
+
+    python benchmarks/bench_hot_paths.py                  # check budgets
+    python benchmarks/bench_hot_paths.py -k train_step    # subset
+    python benchmarks/bench_hot_paths.py --update-budgets # after an intended change
+
+Exits non-zero if any case exceeds its budget.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import config, platform_sensors, pool_selector
+from core.ai_neural import SimpleNeuralOptimizer, TrainingSample
+from core.balance_tracker import BalanceTracker
+from core.memory_planner import MemoryPlanner
+from core.platform_sensors import PlatformMonitor
+from core.pool_selector import PoolLatencyStore, pick_best_pool, pick_best_pool_sync
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hot_path_budgets.json")
+SAMPLE_SIZES = (10, 100, 1000, 10000)
+# --update-budgets writes measured values times these factors
+LATENCY_HEADROOM = 3.0
+ALLOC_HEADROOM = 1.5
+# Floors keep sub-microsecond cases from failing on timer noise
+LATENCY_FLOOR_US = 10.0
+ALLOC_FLOOR_KB = 2.0
+
+
+class Case:
+    def __init__(self, name: str, setup, calls: int = 200):
+        self.name = name
+        self.setup = setup  # () -> (fn, teardown or None); fn is one call
+        self.calls = calls
+
+
+def measure(case: Case) -> dict:
+    fn, teardown = case.setup()
+    try:
+        fn()  # warm caches / lazy imports
+        times = []
+        for _ in range(case.calls):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        peaks = []
+        for _ in range(min(case.calls, 5)):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+    finally:
+        if teardown:
+            teardown()
+    times.sort()
+    return {
+        "median_us": statistics.median(times) * 1e6,
+        "p95_us": times[min(len(times) - 1, int(len(times) * 0.95))] * 1e6,
+        "peak_kb": max(peaks) / 1024,
+    }
+
+
+# --- fixtures -----------------------------------------------------------------
+
+def _log_case(log_name: str):
+    def setup():
+        with open(os.path.join(FIXTURES, "xmrig_logs", log_name)) as f:
+            lines = f.readlines()
+        tracker = BalanceTracker("pool.supportxmr.com", "4" + "1" * 94)
+        it = iter(())
+
+        def call():
+            nonlocal it
+            line = next(it, None)
+            if line is None:
+                it = iter(lines)
+                line = next(it)
+            tracker.parse_xmrig_output(line)
+        return call, None
+    return setup
+
+
+def _sysfs_case(tree: str, android: bool):
+    def setup():
+        saved_root, saved_env = platform_sensors.SYSFS_ROOT, dict(os.environ)
+        platform_sensors.SYSFS_ROOT = os.path.join(FIXTURES, "sysfs", tree)
+        if android:
+            os.environ["ANDROID_ROOT"] = "/system"
+        monitor = PlatformMonitor()
+
+        def teardown():
+            platform_sensors.SYSFS_ROOT = saved_root
+            os.environ.clear()
+            os.environ.update(saved_env)
+        return monitor.get_state, teardown
+    return setup
+
+
+def _memory_case(tree: str):
+    def setup():
+        planner = MemoryPlanner(root=os.path.join(FIXTURES, "proc", tree))
+        return planner.under_pressure, None
+    return setup
+
+
+def synthetic_samples(n: int, seed: int = 7):
+    """Plausible telemetry: hashrate saturating with threads, falling when hot."""
+    rng = random.Random(seed)
+    for _ in range(n):
+        threads = rng.randint(1, 8)
+        temp = 40 + threads * 5 + rng.uniform(-3, 3)
+        throttled = temp > 80
+        hashrate = 110 * min(threads, 6) * (0.6 if throttled else 1.0) * rng.uniform(0.95, 1.05)
+        yield TrainingSample(
+            current_threads=threads, cpu_temp=temp, cpu_usage=min(1.0, threads / 8 + 0.05),
+            throttled=int(throttled), latency_ms=rng.uniform(20, 120),
+            battery_level=rng.randint(20, 100), hashrate=hashrate,
+            accepts=rng.randint(0, 50), rejects=rng.randint(0, 2),
+            cpu_priority=rng.choice([2, 3, 4, 5]),
+        )
+
+
+def _optimizer(n: int, workdir: str) -> SimpleNeuralOptimizer:
+    opt = SimpleNeuralOptimizer(model_path=os.path.join(workdir, f"bench-{n}.npz"), max_samples=max(n, 10))
+    for sample in synthetic_samples(n):
+        opt.add_sample(sample)
+    return opt
+
+
+STATE = {'threads': 6, 'cpu_temp': 68.0, 'cpu_usage': 0.7, 'throttled': False,
+         'latency_ms': 45.0, 'battery_level': 80}
+
+
+def _neural_case(method: str, n: int, workdir: str):
+    def setup():
+        opt = _optimizer(n, workdir)
+        if method == "predict_hashrate":
+            return (lambda: opt.predict_hashrate(6, 68.0, 0.7, False, 45.0, 80)), None
+        if method == "suggest_optimal_threads":
+            return (lambda: opt.suggest_optimal_threads(STATE, 8)), None
+        return opt.train_step, None
+    return setup
+
+
+def _pool_sync_warm_setup():
+    saved = pool_selector._store
+    path = os.path.join(tempfile.mkdtemp(), "pool_latency.json")
+    store = PoolLatencyStore(path=path)
+    for i, (host, port) in enumerate(config.POOLS):
+        store.record(host, port, 0.05 + i * 0.01)
+    pool_selector._store = store
+
+    def teardown():
+        pool_selector._store = saved
+    return pick_best_pool_sync, teardown
+
+
+def _pool_probe_setup():
+    pools = list(config.POOLS)
+    latency = {pool: 0.001 * (i + 1) for i, pool in enumerate(pools)}
+
+    async def instant_probe(host, port, timeout):
+        return latency[(host, port)]
+
+    return (lambda: asyncio.run(pick_best_pool(pools, probe=instant_probe))), None
+
+
+def build_cases(workdir: str):
+    cases = [
+        Case("parse_xmrig_output[android-arm64]", _log_case("android-arm64.log"), calls=2000),
+        Case("parse_xmrig_output[windows-x64-color]", _log_case("windows-x64-color.log"), calls=2000),
+        Case("get_state[android-8core]", _sysfs_case("android-8core", android=True), calls=5),
+        Case("get_state[x86-laptop]", _sysfs_case("x86-laptop", android=False), calls=5),
+        Case("memory_pressure[android-8core]", _memory_case("android-8core"), calls=500),
+        Case("memory_pressure[x86-laptop]", _memory_case("x86-laptop"), calls=500),
+    ]
+    for method, calls in (("predict_hashrate", 500), ("suggest_optimal_threads", 200), ("train_step", 50)):
+        for n in SAMPLE_SIZES:
+            cases.append(Case(f"{method}[{n}]", _neural_case(method, n, workdir), calls=calls))
+    cases += [
+        Case("pick_best_pool_sync[warm-store]", _pool_sync_warm_setup, calls=500),
+        Case("pick_best_pool[instant-probe]", _pool_probe_setup, calls=50),
+    ]
+    return cases
+
+
+def _round_up(value: float) -> float:
+    """Two significant digits, rounded up, so budgets stay readable."""
+    if value <= 0:
+        return 1.0
+    scale = 10 ** (math.floor(math.log10(value)) - 1)
+    return math.ceil(value / scale) * scale
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--update-budgets", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        with open(BUDGETS_PATH) as f:
+            budgets = json.load(f)
+    except (OSError, ValueError):
+        budgets = {}
+
+    failed = False
+    print(f"{'case':<40} {'median us':>10} {'budget us':>10} {'p95 us':>10} {'budget us':>10} "
+          f"{'peak KB':>8} {'budget KB':>9}  result")
+    with tempfile.TemporaryDirectory() as workdir:
+        for case in build_cases(workdir):
+            if args.k not in case.name:
+                continue
+            result = measure(case)
+            if args.update_budgets:
+                budgets[case.name] = {
+                    "median_us": max(LATENCY_FLOOR_US, _round_up(result["median_us"] * LATENCY_HEADROOM)),
+                    "p95_us": max(LATENCY_FLOOR_US, _round_up(result["p95_us"] * LATENCY_HEADROOM)),
+                    "peak_kb": max(ALLOC_FLOOR_KB, _round_up(result["peak_kb"] * ALLOC_HEADROOM)),
+                }
+            budget = budgets.get(case.name)
+            if budget is None:
+                status = "NO BUDGET"
+            else:
+                over = [name for name, key in (("median", "median_us"), ("p95", "p95_us"),
+                                               ("alloc", "peak_kb"))
+                        if result[key] > budget.get(key, float("inf"))]
+                failed |= bool(over)
+                status = "OK" if not over else "OVER " + "/".join(over)
+            budget = budget or {}
+            print(f"{case.name:<40} {result['median_us']:>10.1f} {budget.get('median_us', float('nan')):>10.0f} "
+                  f"{result['p95_us']:>10.1f} {budget.get('p95_us', float('nan')):>10.0f} "
+                  f"{result['peak_kb']:>8.1f} {budget.get('peak_kb', float('nan')):>9.1f}  {status}")
+
+    if args.update_budgets:
+        with open(BUDGETS_PATH, "w") as f:
+            json.dump(dict(sorted(budgets.items())), f, indent=2)
+            f.write("\n")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark for core.pool_selector against local listeners with injected delays.
+
+Each fake pool is a loopback TCP listener; its "network latency" is injected
+in front of the real connect probe. A second pass runs the stratum probe
+against core.stratum_stub pools with different time-to-first-job. Exits
+non-zero if selection picks the wrong pool or exceeds its time budget.
+
+    python benchmarks/bench_pool_selector.py [--repeat 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import config
+from core.pool_selector import PoolLatencyStore, _probe, make_stratum_probe, pick_best_pool
+from core.stratum_stub import StubStratumPool
+
+INF = float("inf")
+
+# (name, injected delays per pool in seconds (INF = never answers), deadline, budget)
+SCENARIOS = [
+    ("mixed", [0.30, 0.12, 0.05, 0.25, INF, 0.40, 0.08, 0.50, 0.20, INF], None, 0.50),
+    ("close-race", [0.10, 0.11, 0.12, 0.30, 0.35, INF, INF, 0.60, 0.70, 0.80], None, 1.00),
+    ("all-dead", [INF] * 10, 1.0, 1.25),
+]
+WARM_STORE_BUDGET_SEC = 0.005
+
+# Stub stratum pools: (job delay, reject login, silent); all connect instantly
+STRATUM_POOLS = [(0.20, False, False), (0.03, False, False), (0.0, True, False),
+                 (0.0, False, True), (0.10, False, False)]
+STRATUM_BUDGET_SEC = 0.5
+WALLET = "4" + "1" * 94
+
+
+async def _serve(_reader, writer):
+    writer.close()
+
+
+async def run_scenario(delays, deadline):
+    servers = [await asyncio.start_server(_serve, "127.0.0.1", 0) for _ in delays]
+    ports = [s.sockets[0].getsockname()[1] for s in servers]
+    injected = dict(zip(ports, delays))
+
+    async def delayed_probe(host, port, timeout):
+        delay = injected[port]
+        if delay >= timeout:
+            await asyncio.sleep(timeout)
+            return INF
+        await asyncio.sleep(delay)
+        return delay + await _probe(host, port, timeout - delay)
+
+    pools = [("127.0.0.1", p) for p in ports]
+    start = time.perf_counter()
+    host, port, latency = await pick_best_pool(pools, probe=delayed_probe, deadline=deadline)
+    elapsed = time.perf_counter() - start
+    for s in servers:
+        s.close()
+        await s.wait_closed()
+
+    finite = [d for d in delays if d != INF]
+    expected = ports[delays.index(min(finite))] if finite else None
+    sequential = sum(min(d, config.PING_TIMEOUT_SEC) for d in delays) * config.PING_ATTEMPTS
+    return elapsed, sequential, port, expected
+
+
+async def run_stratum():
+    stubs = [await StubStratumPool(job_delay=d, reject_login=r, silent=q).start()
+             for d, r, q in STRATUM_POOLS]
+    pools = [("127.0.0.1", stub.port) for stub in stubs]
+    start = time.perf_counter()
+    host, port, latency = await pick_best_pool(pools, probe=make_stratum_probe(WALLET))
+    elapsed = time.perf_counter() - start
+    for stub in stubs:
+        await stub.stop()
+    fastest = min((d, i) for i, (d, r, q) in enumerate(STRATUM_POOLS) if not r and not q)[1]
+    return elapsed, port == pools[fastest][1]
+
+
+def run_warm_store():
+    """Restart path: answer from a warmed PoolLatencyStore without probing."""
+    store = PoolLatencyStore(path=os.path.join(tempfile.mkdtemp(), "pool_latency.json"))
+    for i, (host, port) in enumerate(config.POOLS):
+        store.record(host, port, 0.05 + i * 0.01)
+    store.save()
+    start = time.perf_counter()
+    store = PoolLatencyStore(path=store.path)
+    best = store.best(config.POOLS)
+    elapsed = time.perf_counter() - start
+    return elapsed, best is not None and best[:2] == config.POOLS[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'scenario':<12} {'best ms':>9} {'worst ms':>9} {'serial ms':>10} {'budget ms':>10}  result")
+    for name, delays, deadline, budget in SCENARIOS:
+        times = []
+        ok = True
+        for _ in range(args.repeat):
+            elapsed, sequential, picked, expected = asyncio.run(run_scenario(delays, deadline))
+            times.append(elapsed)
+            if expected is not None and picked != expected:
+                ok = False
+        ok = ok and max(times) <= budget
+        failed |= not ok
+        print(f"{name:<12} {min(times)*1000:>9.1f} {max(times)*1000:>9.1f} "
+              f"{sequential*1000:>10.0f} {budget*1000:>10.0f}  {'OK' if ok else 'FAIL'}")
+
+    times, ok = [], True
+    for _ in range(args.repeat):
+        elapsed, picked_ok = asyncio.run(run_stratum())
+        times.append(elapsed)
+        ok = ok and picked_ok
+    ok = ok and max(times) <= STRATUM_BUDGET_SEC
+    failed |= not ok
+    print(f"{'stratum':<12} {min(times)*1000:>9.1f} {max(times)*1000:>9.1f} "
+          f"{'-':>10} {STRATUM_BUDGET_SEC*1000:>10.0f}  {'OK' if ok else 'FAIL'}")
+
+    times, ok = [], True
+    for _ in range(args.repeat):
+        elapsed, picked_ok = run_warm_store()
+        times.append(elapsed)
+        ok = ok and picked_ok
+    ok = ok and max(times) <= WARM_STORE_BUDGET_SEC
+    failed |= not ok
+    print(f"{'warm-store':<12} {min(times)*1000:>9.2f} {max(times)*1000:>9.2f} "
+          f"{'-':>10} {WARM_STORE_BUDGET_SEC*1000:>10.0f}  {'OK' if ok else 'FAIL'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Offline sanity checks for the MLP optimizer's candidate scoring.
+
+A feature that never varied during training (every sample at one priority,
+say) carries no information, so it must not decide the suggestion. Exits
+non-zero on any failure.
+
+    python benchmarks/check_neural.py
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.ai_neural import SimpleNeuralOptimizer, TrainingSample
+
+STATE = {'threads': 4, 'cpu_temp': 60.0, 'cpu_usage': 0.8, 'throttled': False,
+         'latency_ms': 40.0, 'battery_level': 100, 'priority': 5}
+
+
+def trained_on_one_priority(workdir: str) -> SimpleNeuralOptimizer:
+    rng = np.random.default_rng(1)
+    optimizer = SimpleNeuralOptimizer(model_path=os.path.join(workdir, "model.npz"))
+    for _ in range(300):
+        threads = int(rng.integers(1, 9))
+        optimizer.add_sample(TrainingSample(
+            current_threads=threads, cpu_temp=50.0 + 4 * threads + rng.normal(0, 1),
+            cpu_usage=threads / 8, throttled=0, latency_ms=40.0 + rng.normal(0, 3),
+            battery_level=100, hashrate=120.0 * min(threads, 6) * rng.uniform(0.95, 1.05),
+            accepts=0, rejects=0, cpu_priority=5))
+    optimizer.train()
+    return optimizer
+
+
+def main():
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        optimizer = trained_on_one_priority(workdir)
+        configs, scores = optimizer.score_candidates(STATE, 8, priorities=(3, 5))
+        by_priority = {p: scores[configs[1] == p] for p in (3, 5)}
+        ok = np.allclose(by_priority[3], by_priority[5])
+        failed |= not ok
+        print(f"{'OK' if ok else 'FAIL':<5} unseen priority scores like the trained one "
+              f"(max |diff| {np.max(np.abs(by_priority[3] - by_priority[5])):.3g})")
+
+        ok = bool(np.all(np.isfinite(scores))) and np.max(np.abs(scores)) < 1e3
+        failed |= not ok
+        print(f"{'OK' if ok else 'FAIL':<5} scores bounded (max |score| {np.max(np.abs(scores)):.3g})")
+
+        best = optimizer.suggest_configuration(STATE, 8, priorities=(3, 5))
+        ok = best['priority'] == STATE['priority']
+        failed |= not ok
+        print(f"{'OK' if ok else 'FAIL':<5} untried priority does not win: {best}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
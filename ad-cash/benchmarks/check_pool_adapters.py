@@ -0,0 +1,83 @@
+"""
+Offline check of every pool API adapter against recorded responses.
+
+Fixtures live in benchmarks/fixtures/pool_api/<adapter>.json:
+    {"responses": {url: body}, "include_payments": bool, "expected": {...}}
+URLs and bodies may contain "{wallet}". Exits non-zero on any mismatch or
+if a pool in config.POOLS has no adapter.
+
+    python benchmarks/check_pool_adapters.py
+"""
+import json
+import math
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import config
+from core.balance_tracker import BalanceTracker
+from core.pool_api import FixtureSession, adapter_for_host, adapters, missing_adapters
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pool_api")
+WALLET = "4" + "A" * 94
+
+
+def load_fixture(name: str) -> dict:
+    with open(os.path.join(FIXTURE_DIR, f"{name}.json")) as f:
+        return json.loads(f.read().replace("{wallet}", WALLET))
+
+
+def close(a, b) -> bool:
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-15)
+
+
+def check_adapter(name, adapter) -> list:
+    fixture = load_fixture(name)
+    session = FixtureSession(fixture["responses"])
+    stats = adapter.fetch(session, WALLET, include_payments=fixture["include_payments"])
+    expected = fixture["expected"]
+    errors = []
+    for key in ("balance_xmr", "paid_xmr", "hashrate"):
+        if not close(getattr(stats, key), expected[key]):
+            errors.append(f"{key}={getattr(stats, key)!r}, expected {expected[key]!r}")
+    if len(stats.payments) != expected["payments"]:
+        errors.append(f"payments={len(stats.payments)}, expected {expected['payments']}")
+    if len(session.calls) != len(adapter.urls(WALLET, fixture["include_payments"])):
+        errors.append(f"made {len(session.calls)} calls")
+    return errors
+
+
+def main():
+    failed = False
+    missing = missing_adapters()
+    if missing:
+        print(f"FAIL  no adapter for: {', '.join(missing)}")
+        failed = True
+
+    for name, adapter in sorted(adapters().items()):
+        errors = check_adapter(name, adapter)
+        failed |= bool(errors)
+        print(f"{'FAIL' if errors else 'OK':<5} {name:<12} {'; '.join(errors)}")
+
+    # End to end through BalanceTracker for every configured pool host
+    for host, port in config.POOLS:
+        adapter = adapter_for_host(host)
+        if adapter is None:
+            continue
+        fixture = load_fixture(adapter.name)
+        tracker = BalanceTracker(host, WALLET)
+        tracker.session = FixtureSession(fixture["responses"])
+        adapter._last.clear()
+        balance = tracker.fetch_pool_balance()
+        ok = close(balance, fixture["expected"]["balance_xmr"])
+        failed |= not ok
+        print(f"{'OK' if ok else 'FAIL':<5} {host}:{port} -> {adapter.name} balance={balance}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
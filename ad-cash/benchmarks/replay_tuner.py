@@ -0,0 +1,82 @@
+"""
+Score tuner strategies offline by replaying telemetry traces.
+
+Record traces on a device with TRACE_ENABLED = True in core/config.py (files
+land in TRACE_DIR), then compare strategies on a laptop:
+
+    python benchmarks/replay_tuner.py ~/.xmrminer/traces/trace-*.jsonl
+    python benchmarks/replay_tuner.py --synthetic --strategies bandit,recorded
+
+Without trace files a synthetic 6 h trace is used.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import config
+from core.ai_autotune import BanditStrategy, HeuristicStrategy, NeuralStrategy
+from core.ai_neural import SimpleNeuralOptimizer
+from core.trace import load_trace
+from core.tuner_replay import DeviceModel, RecordedStrategy, replay, synthetic_trace
+
+STRATEGIES = ("recorded", "heuristic", "neural", "bandit")
+
+
+def build_strategy(name: str, rows, model: DeviceModel, max_threads: int, workdir: str):
+    if name == "recorded":
+        return RecordedStrategy(rows)
+    if name == "heuristic":
+        return HeuristicStrategy()
+    if name == "neural":
+        # Fresh model per run so traces never leak into ~/.xmrminer
+        optimizer = SimpleNeuralOptimizer(model_path=os.path.join(workdir, f"{name}.npz"))
+        return NeuralStrategy(optimizer, learn=True, modes=model.modes or None)
+    if name == "bandit":
+        # Same priority set as the launchers; the model has no priority effect,
+        # so this prices in the cost of exploring it
+        return BanditStrategy(max_threads, modes=model.modes or ("auto",),
+                              priorities=config.TUNER_PRIORITIES)
+    raise SystemExit(f"unknown strategy: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("traces", nargs="*", help="Trace files (.jsonl)")
+    parser.add_argument("--synthetic", action="store_true", help="Also replay a synthetic trace")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    parser.add_argument("--max-threads", type=int, default=None,
+                        help="Defaults to the trace header's CPU count")
+    args = parser.parse_args()
+
+    traces = [(path,) + load_trace(path) for path in args.traces]
+    if args.synthetic or not traces:
+        traces.append(("synthetic", {"cpus": 8}, synthetic_trace()))
+
+    names = [n.strip() for n in args.strategies.split(",") if n.strip()]
+    with tempfile.TemporaryDirectory() as workdir:
+        for path, header, rows in traces:
+            if not rows:
+                print(f"{path}: empty trace")
+                continue
+            max_threads = args.max_threads or max([header.get("cpus") or 1] + [r.threads for r in rows])
+            model = DeviceModel(rows)
+            hours = (rows[-1].t - rows[0].t) / 3600
+            print(f"{path}: {len(rows)} rows, {hours:.1f} h, {max_threads} CPUs, modes {model.modes}")
+            print(f"  {'strategy':<10} {'avg H/s':>9} {'over limit':>11} {'reconfigs':>9} {'final':<28} {'wall':>7}")
+            for name in names:
+                strategy = build_strategy(name, rows, model, max_threads, workdir)
+                started = time.perf_counter()
+                result = replay(rows, strategy, max_threads, model=model)
+                wall = time.perf_counter() - started
+                final = (f"{result.final.threads}T/{result.final.randomx_mode}/p{result.final.priority}"
+                         if result.final else "-")
+                print(f"  {name:<10} {result.avg_hashrate:>9.1f} {result.violation_sec:>10.0f}s "
+                      f"{result.reconfigs:>9} {final:<28} {wall:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
-import multiprocessing
+import json
+import math
+import os
+import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Sequence
+
+from . import config
+from .cpu_topology import thread_ceiling
 
 
 @dataclass
@@ -16,13 +22,21 @@ class Telemetry:
     battery_level: Optional[int]
 
 
-def suggest_threads(telemetry: Telemetry) -> int:
+@dataclass(frozen=True)
+class TunerConfig:
+    threads: int
+    randomx_mode: str = "auto"  # XMRig --randomx-mode: auto / fast / light
+    priority: int = 5  # XMRig --cpu-priority
+
+
+def suggest_threads(telemetry: Telemetry, logical_cpus: int = None) -> int:
     """
     Simple heuristic placeholder. Replace with real model:
     - If near thermal ceiling or throttled, back off threads by 1.
-    - Else try to saturate logical CPUs.
+    - Else try to saturate logical CPUs, up to the cache-derived RandomX
+      ceiling (cpu_topology.thread_ceiling) unless `logical_cpus` is given.
     """
-    logical_cpus = multiprocessing.cpu_count()
+    logical_cpus = logical_cpus or thread_ceiling()
     target = logical_cpus
     if telemetry.cpu_temp and telemetry.cpu_temp > 82:
         target = max(1, telemetry.threads - 1)
@@ -31,3 +45,310 @@ def suggest_threads(telemetry: Telemetry) -> int:
     if telemetry.cpu_busy > 0.9:
         target = max(1, target - 1)
     return max(1, min(target, logical_cpus))
+
+
+class TunerStrategy:
+    """
+    Common interface for tuners. Launchers call observe() on every monitor
+    tick and suggest() when they are ready to apply a new configuration.
+    """
+
+    name = ""
+    # Optional filter for RandomX modes the launcher can run right now (e.g.
+    # MemoryPlanner.mode_allowed); configurations in other modes are never
+    # suggested, rather than suggested and then run in a different mode
+    mode_allowed: Optional[Callable[[str], bool]] = None
+
+    def _allowed(self, mode: str) -> bool:
+        return self.mode_allowed is None or self.mode_allowed(mode)
+
+    def observe(self, telemetry: Telemetry, current: TunerConfig, now: float = None):
+        """Feed one telemetry reading taken while `current` was running."""
+
+    def suggest(self, telemetry: Telemetry, current: TunerConfig, max_threads: int,
+                now: float = None) -> TunerConfig:
+        raise NotImplementedError
+
+    def save(self):
+        """Persist learned state (launchers call this when mining stops)."""
+
+
+class HeuristicStrategy(TunerStrategy):
+    name = "heuristic"
+
+    def suggest(self, telemetry, current, max_threads, now=None):
+        threads = suggest_threads(telemetry, max_threads)
+        return TunerConfig(threads, current.randomx_mode, current.priority)
+
+
+class NeuralStrategy(TunerStrategy):
+    """
+    SimpleNeuralOptimizer behind the strategy interface. The launchers feed
+    and train the optimizer themselves; with `learn=True` (offline replay)
+    observe() adds the samples and suggest() trains before predicting.
+
+    An MLP only learns about the thread counts it has seen run, so suggest()
+    first sweeps the thread count x mode x priority grid nearest-first, one
+    retune interval each. After that, threads and priority come from the model
+    and the RandomX mode is the one with the best measured per-thread hashrate
+    (the model has no mode input).
+    """
+
+    name = "neural"
+
+    def __init__(self, optimizer, priorities: Sequence[int] = None, learn: bool = False,
+                 modes: Sequence[str] = None, explore: bool = True):
+        self.optimizer = optimizer
+        self.priorities = priorities
+        self.learn = learn
+        self.modes = modes
+        self.explore = explore
+        self.tried = set()
+        self._mode_rates: Dict[str, List[float]] = {}  # mode -> [sum, count] of H/s per thread
+
+    def observe(self, telemetry, current, now=None):
+        if telemetry.hash_rate > 0:
+            self.tried.add(current)
+            entry = self._mode_rates.setdefault(current.randomx_mode, [0.0, 0])
+            entry[0] += telemetry.hash_rate / max(1, current.threads)
+            entry[1] += 1
+        if not self.learn:
+            return
+        from .ai_neural import TrainingSample
+        self.optimizer.add_sample(TrainingSample(
+            current_threads=current.threads,
+            cpu_temp=telemetry.cpu_temp or 50.0,
+            cpu_usage=telemetry.cpu_busy,
+            throttled=1 if telemetry.throttled else 0,
+            latency_ms=telemetry.latency_ms,
+            battery_level=telemetry.battery_level or 100,
+            hashrate=telemetry.hash_rate,
+            accepts=telemetry.accepts,
+            rejects=telemetry.rejects,
+            cpu_priority=current.priority,
+        ))
+
+    def _best_mode(self, current: TunerConfig) -> str:
+        rates = {m: s / n for m, (s, n) in self._mode_rates.items()
+                 if n and (self.modes is None or m in self.modes) and self._allowed(m)}
+        return max(rates, key=rates.get) if rates else current.randomx_mode
+
+    def suggest(self, telemetry, current, max_threads, now=None):
+        if self.explore:
+            untried = [TunerConfig(t, m, p) for t in range(1, max_threads + 1)
+                       for m in (self.modes or (current.randomx_mode,))
+                       for p in (self.priorities or (current.priority,))]
+            untried = [c for c in untried if c not in self.tried and self._allowed(c.randomx_mode)]
+            if untried:
+                # Same mode and priority first, then the nearest thread count
+                return min(untried, key=lambda c: (c.randomx_mode != current.randomx_mode,
+                                                   c.priority != current.priority,
+                                                   abs(c.threads - current.threads), -c.threads))
+        if self.learn:
+            self.optimizer.train()
+        state = {
+            'threads': current.threads,
+            'cpu_temp': telemetry.cpu_temp,
+            'cpu_usage': telemetry.cpu_busy,
+            'throttled': telemetry.throttled,
+            'latency_ms': telemetry.latency_ms,
+            'battery_level': telemetry.battery_level,
+            'priority': current.priority,
+        }
+        mode = self._best_mode(current)
+        if self.priorities is None:
+            return TunerConfig(self.optimizer.suggest_optimal_threads(state, max_threads),
+                               mode, current.priority)
+        best = self.optimizer.suggest_configuration(state, max_threads, priorities=self.priorities)
+        return TunerConfig(best['threads'], mode, best['priority'])
+
+
+class BanditStrategy(TunerStrategy):
+    """
+    UCB1 bandit over thread count x RandomX mode x priority.
+
+    Only the top `thread_span` thread counts below `max_threads` (the cache
+    ceiling) are arms. Untried arms are explored one RandomX mode at a time,
+    since each mode switch rebuilds the ~2 GB dataset; afterwards UCB1 picks
+    within the mode whose best arm leads. Arm statistics are kept in
+    `state_path` (if given) so a relaunch does not repeat the sweep.
+
+    Each configuration runs for `dwell_sec`; readings from the first
+    `warmup_sec` after a change are discarded while hashrate ramps up. The
+    reward is the mean hashrate over the rest of the dwell. A configuration
+    that reaches the thermal limit (minus a margin) or throttles is cut short,
+    scored as a violation and benched for `cooldown_sec`. While hot or on low
+    battery only configurations with fewer threads than the current one are
+    eligible.
+    """
+
+    name = "bandit"
+
+    def __init__(self, max_threads: int, modes: Sequence[str] = ("auto",),
+                 priorities: Sequence[int] = (5,), dwell_sec: float = None,
+                 warmup_sec: float = None, explore: float = 1.0,
+                 thermal_limit: float = None, battery_min: int = None,
+                 cooldown_sec: float = 1800.0, thread_span: int = None,
+                 state_path: str = None):
+        thread_span = config.TUNER_THREAD_SPAN if thread_span is None else thread_span
+        low = max(1, max_threads - thread_span + 1) if thread_span else 1
+        self.modes = tuple(modes)
+        self.arms = [TunerConfig(t, m, p) for t in range(low, max_threads + 1)
+                     for m in modes for p in priorities]
+        self.dwell_sec = config.TUNER_DWELL_SEC if dwell_sec is None else dwell_sec
+        self.warmup_sec = config.TUNER_WARMUP_SEC if warmup_sec is None else warmup_sec
+        self.explore = explore
+        self.thermal_limit = config.DEFAULT_THERMAL_C if thermal_limit is None else thermal_limit
+        self.battery_min = config.DEFAULT_BATTERY_MIN if battery_min is None else battery_min
+        self.cooldown_sec = cooldown_sec
+
+        self.pulls: Dict[TunerConfig, int] = {a: 0 for a in self.arms}
+        self.means: Dict[TunerConfig, float] = {a: 0.0 for a in self.arms}
+        self.benched_until: Dict[TunerConfig, float] = {}
+        self.violations = 0
+
+        self._arm: Optional[TunerConfig] = None
+        self._arm_started = 0.0
+        self._readings = []
+        self._violated = False
+        self.state_path = os.path.expanduser(state_path) if state_path else None
+        self._saved_at = time.monotonic()
+        self.load()
+
+    @staticmethod
+    def _arm_key(arm: TunerConfig) -> str:
+        return f"{arm.threads}/{arm.randomx_mode}/{arm.priority}"
+
+    def load(self):
+        """Restore arm statistics saved by an earlier run (unknown arms are ignored)."""
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path) as f:
+                data = json.load(f)
+            for arm in self.arms:
+                entry = data.get(self._arm_key(arm))
+                if entry:
+                    self.pulls[arm] = int(entry["pulls"])
+                    self.means[arm] = float(entry["mean"])
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            pass
+
+    def save(self):
+        if not self.state_path:
+            return
+        data = {self._arm_key(a): {"pulls": n, "mean": self.means[a]}
+                for a, n in self.pulls.items() if n}
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp = f"{self.state_path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.state_path)
+            self._saved_at = time.monotonic()
+        except OSError as e:
+            print(f"Tuner state save failed: {e}")
+
+    def _too_hot(self, telemetry: Telemetry) -> bool:
+        temp = telemetry.cpu_temp
+        return bool(telemetry.throttled) or (
+            temp is not None and temp >= self.thermal_limit - config.TUNER_THERMAL_MARGIN_C)
+
+    def _low_battery(self, telemetry: Telemetry) -> bool:
+        return telemetry.battery_level is not None and telemetry.battery_level <= self.battery_min
+
+    def observe(self, telemetry, current, now=None):
+        now = time.monotonic() if now is None else now
+        if self._arm is None or current != self._arm:
+            return
+        if self._too_hot(telemetry):
+            self._violated = True
+        if now - self._arm_started >= self.warmup_sec:
+            self._readings.append(telemetry.hash_rate)
+
+    def _close_dwell(self, now: float):
+        arm = self._arm
+        if self._violated:
+            self.violations += 1
+            self.benched_until[arm] = now + self.cooldown_sec
+        if self._readings:
+            reward = sum(self._readings) / len(self._readings)
+            self.pulls[arm] = self.pulls.get(arm, 0) + 1
+            self.means[arm] = self.means.get(arm, 0.0) + (reward - self.means.get(arm, 0.0)) / self.pulls[arm]
+        self._readings = []
+        self._violated = False
+        if time.monotonic() - self._saved_at >= config.TUNER_STATE_SAVE_SEC:
+            self.save()
+
+    def _choose(self, candidates, current: TunerConfig) -> TunerConfig:
+        untried = [a for a in candidates if self.pulls[a] == 0]
+        if untried:
+            # Finish the current mode first, then explore nearest-first so
+            # each step is a small change
+            return min(untried, key=lambda a: (a.randomx_mode != current.randomx_mode,
+                                               abs(a.threads - current.threads),
+                                               a.priority != current.priority, -a.threads))
+        # Stay within the mode whose best arm leads; UCB bonuses alone would
+        # flip modes (and rebuild the dataset) far too often
+        leader = max(candidates, key=lambda a: self.means[a])
+        candidates = [a for a in candidates if a.randomx_mode == leader.randomx_mode]
+        total = sum(self.pulls[a] for a in candidates)
+        scale = max(max(self.means[a] for a in candidates), 1e-9)
+        return max(candidates, key=lambda a: self.means[a] + self.explore * scale * math.sqrt(
+            2 * math.log(total) / self.pulls[a]))
+
+    def best(self) -> Optional[TunerConfig]:
+        tried = [a for a in self.arms if self.pulls[a]]
+        return max(tried, key=lambda a: self.means[a]) if tried else None
+
+    def suggest(self, telemetry, current, max_threads, now=None):
+        now = time.monotonic() if now is None else now
+        if self._arm is None:
+            self._arm, self._arm_started = current, now
+        dwell_done = now - self._arm_started >= self.dwell_sec
+        if not dwell_done and not self._violated and current == self._arm:
+            return self._arm
+        self._close_dwell(now)
+
+        candidates = [a for a in self.arms if a.threads <= max_threads
+                      and self.benched_until.get(a, 0.0) <= now and self._allowed(a.randomx_mode)]
+        mode = current.randomx_mode
+        if not self._allowed(mode):
+            mode = next((m for m in self.modes if self._allowed(m)), mode)
+        if self._too_hot(telemetry) or self._low_battery(telemetry):
+            # Below the explored range this just steps down one thread
+            lower = [a for a in candidates if a.threads < current.threads]
+            candidates = lower or [TunerConfig(max(1, min(max_threads, current.threads - 1)),
+                                               mode, current.priority)]
+        if not candidates:
+            candidates = [TunerConfig(max(1, max_threads), mode, current.priority)]
+        for a in candidates:
+            self.pulls.setdefault(a, 0)
+            self.means.setdefault(a, 0.0)
+
+        self._arm = self._choose(candidates, current)
+        self._arm_started = now
+        return self._arm
+
+
+def make_strategy(name: str = None, optimizer=None, max_threads: int = None,
+                  modes: Sequence[str] = None, priorities: Sequence[int] = None,
+                  mode_allowed: Callable[[str], bool] = None) -> TunerStrategy:
+    """
+    Build the strategy named by `name` (config.TUNER_STRATEGY by default),
+    exploring `modes` x `priorities` (config.TUNER_MODES / TUNER_PRIORITIES)
+    restricted to the modes `mode_allowed` accepts at suggestion time.
+    """
+    name = name or config.TUNER_STRATEGY
+    max_threads = max_threads or thread_ceiling()
+    modes = tuple(modes or config.TUNER_MODES)
+    priorities = tuple(priorities or config.TUNER_PRIORITIES)
+    if name == "bandit":
+        strategy = BanditStrategy(max_threads, modes=modes, priorities=priorities,
+                                  state_path=config.TUNER_STATE_PATH)
+    elif name == "neural" and optimizer is not None:
+        strategy = NeuralStrategy(optimizer, priorities=priorities, modes=modes)
+    else:
+        strategy = HeuristicStrategy()
+    strategy.mode_allowed = mode_allowed
+    return strategy
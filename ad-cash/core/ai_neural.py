@@ -3,14 +3,16 @@ Neural network auto-tuner for mining optimization.
 Uses lightweight MLP to predict optimal thread count based on system metrics.
 Trains continuously in background.
 """
+import atexit
 import numpy as np
-import pickle
 import os
 import threading
 import time
 from typing import List, Tuple
 from dataclasses import dataclass
 
+from . import config
+
 
 @dataclass
 class TrainingSample:
@@ -27,21 +29,238 @@ class TrainingSample:
     accepts: int
     rejects: int
 
+    # Tunables beyond thread count (XMRig --cpu-priority, affinity bitmask; 0 = OS placement)
+    cpu_priority: int = 5
+    affinity_mask: int = 0
+
+
+# Column layout of a stored sample row: model inputs first, then outputs
+SAMPLE_COLUMNS = (
+    'current_threads', 'cpu_temp', 'cpu_usage', 'throttled', 'latency_ms', 'battery_level',
+    'cpu_priority', 'affinity_cores',
+    'hashrate', 'accepts', 'rejects',
+)
+N_FEATURES = 8
+COL_HASHRATE = SAMPLE_COLUMNS.index('hashrate')
+# Bump when the saved array layout changes; mismatching files are ignored
+MODEL_SCHEMA_VERSION = 1
+
+
+def affinity_cores(mask: int) -> int:
+    """Number of CPUs in an affinity bitmask (0 = unpinned)."""
+    return bin(int(mask)).count('1')
+
+
+def _sample_features(s: TrainingSample) -> list:
+    """Model input row for a sample (same order as predict_hashrate)."""
+    return [
+        s.current_threads,
+        s.cpu_temp if s.cpu_temp else 50.0,
+        s.cpu_usage,
+        float(s.throttled),
+        s.latency_ms,
+        s.battery_level if s.battery_level else 100.0,
+        s.cpu_priority,
+        affinity_cores(s.affinity_mask),
+    ]
+
+
+def sample_to_row(s: TrainingSample) -> list:
+    return _sample_features(s) + [s.hashrate, s.accepts, s.rejects]
+
+
+class SampleRing:
+    """
+    Fixed-capacity sample store backed by one preallocated float array.
+    Appends and evictions are O(1); view() exposes the live rows without
+    copying (row order is storage order, not insertion order).
+    """
+
+    def __init__(self, capacity: int, width: int = len(SAMPLE_COLUMNS)):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, width))
+        self.start = 0  # index of the oldest row
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, row):
+        """Store a row; returns the evicted oldest row (a copy) once full."""
+        if self.count < self.capacity:
+            idx = (self.start + self.count) % self.capacity
+            self.count += 1
+            evicted = None
+        else:
+            idx = self.start
+            evicted = self.data[idx].copy()
+            self.start = (self.start + 1) % self.capacity
+        self.data[idx] = row
+        return evicted
+
+    def view(self):
+        return self.data[:self.count]
+
+    def ordered(self):
+        """Rows oldest to newest (copy)."""
+        if self.count < self.capacity:
+            return self.data[:self.count].copy()
+        return np.concatenate((self.data[self.start:], self.data[:self.start]))
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+
+class RunningNorm:
+    """
+    Per-column mean/std maintained incrementally (Welford) as rows are added
+    and evicted, so normalization never has to rescan the sample history.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._updates = 0
+        self._spread_key = None
+        self._spread_cache = None
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = np.zeros(self.size)
+        self.m2 = np.zeros(self.size)
+        self._updates += 1
+
+    def add(self, x):
+        x = np.asarray(x, dtype=float)
+        self._updates += 1
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x):
+        x = np.asarray(x, dtype=float)
+        if self.n <= 1:
+            self.reset()
+            return
+        self._updates += 1
+        old_mean = self.mean.copy()
+        self.n -= 1
+        self.mean = (old_mean * (self.n + 1) - x) / self.n
+        self.m2 = np.maximum(self.m2 - (x - old_mean) * (x - self.mean), 0.0)
+
+    def _spread(self):
+        """
+        (population std, constant-column mask); constant columns carry no
+        information. Cached until the statistics change (predict runs per tick).
+        """
+        key = (self._updates, self.n, id(self.mean), id(self.m2))
+        if self._spread_key != key:
+            std = np.sqrt(self.m2 / self.n)
+            constant = std <= 1e-6 * np.maximum(1.0, np.abs(self.mean))
+            std[constant] = np.inf  # (x - mean) / inf == 0: constant columns drop out
+            self._spread_cache, self._spread_key = (std, constant), key
+        return self._spread_cache
+
+    @property
+    def constant(self):
+        if self.n == 0:
+            return np.zeros(self.size, dtype=bool)
+        return self._spread()[1]
+
+    @property
+    def std(self):
+        """Population std (matches np.std); 1 for constant columns."""
+        if self.n == 0:
+            return np.ones(self.size)
+        std, constant = self._spread()
+        return np.where(constant, 1.0, std)
+
+    def normalize(self, X):
+        """
+        Standardize X. Constant columns map to 0, so a value never seen in
+        training (e.g. an untried priority) cannot drive an extrapolation.
+        """
+        if self.n == 0:
+            return np.asarray(X, dtype=float)
+        std, constant = self._spread()
+        Z = np.subtract(X, self.mean)
+        Z /= std
+        return Z
+
+
+@dataclass
+class TrainReport:
+    samples: int = 0
+    epochs: int = 0
+    train_loss: float = float('nan')  # MSE on normalized hashrate
+    val_loss: float = float('nan')
+    stopped_early: bool = False
+    budget_hit: bool = False
+    cpu_sec: float = 0.0
+
+
+class Adam:
+    """Adam optimizer state for a list of parameter arrays."""
+
+    def __init__(self, params, lr: float = 0.005, beta1: float = 0.9, beta2: float = 0.999,
+                 eps: float = 1e-8):
+        self.lr, self.beta1, self.beta2, self.eps = lr, beta1, beta2, eps
+        self.m = [np.zeros_like(p) for p in params]
+        self.v = [np.zeros_like(p) for p in params]
+        self.t = 0
+
+    def step(self, params, grads):
+        """Update params in place."""
+        self.t += 1
+        c1 = 1 - self.beta1 ** self.t
+        c2 = 1 - self.beta2 ** self.t
+        for p, g, m, v in zip(params, grads, self.m, self.v):
+            m *= self.beta1
+            m += (1 - self.beta1) * g
+            v *= self.beta2
+            v += (1 - self.beta2) * g * g
+            p -= self.lr * (m / c1) / (np.sqrt(v / c2) + self.eps)
+
+
+def _loss_and_grads(params, X, y):
+    """MSE loss and gradients for the 2-layer ReLU MLP (pure function)."""
+    W1, b1, W2, b2 = params
+    z1 = np.dot(X, W1) + b1
+    a1 = np.maximum(0, z1)
+    out = np.dot(a1, W2) + b2
+    m = X.shape[0]
+    dz2 = out - y
+    loss = float(np.mean(dz2 * dz2))
+    dW2 = np.dot(a1.T, dz2) / m
+    db2 = np.sum(dz2, axis=0) / m
+    dz1 = np.dot(dz2, W2.T) * (z1 > 0)
+    dW1 = np.dot(X.T, dz1) / m
+    db1 = np.sum(dz1, axis=0) / m
+    return loss, [dW1, db1, dW2, db2]
+
+
+def _mse(params, X, y) -> float:
+    W1, b1, W2, b2 = params
+    out = np.dot(np.maximum(0, np.dot(X, W1) + b1), W2) + b2
+    return float(np.mean((out - y) ** 2))
+
 
 class SimpleNeuralOptimizer:
     """
     Lightweight MLP for thread optimization.
-    Input: [threads, temp, usage, throttled, latency, battery]
+    Input: [threads, temp, usage, throttled, latency, battery, priority, affinity cores]
     Output: predicted hashrate
     """
     
-    def __init__(self, model_path: str = None):
-        self.model_path = model_path or os.path.expanduser('~/.xmrminer/ai_model.pkl')
-        self.samples: List[TrainingSample] = []
-        self.max_samples = 1000
+    def __init__(self, model_path: str = None, max_samples: int = 1000):
+        self.model_path = model_path or os.path.expanduser('~/.xmrminer/ai_model.npz')
+        self.max_samples = max_samples
+        self.samples = SampleRing(self.max_samples)
         
         # Simple weights (input_features + bias -> hidden -> output)
-        self.input_size = 6
+        self.input_size = N_FEATURES
         self.hidden_size = 12
         self.output_size = 1
         
@@ -52,8 +271,25 @@ class SimpleNeuralOptimizer:
         self.W2 = np.random.randn(self.hidden_size, self.output_size) * 0.1
         self.b2 = np.zeros(self.output_size)
         
-        self.learning_rate = 0.001
+        self.learning_rate = 0.001  # plain SGD rate used by train_step/backward
+        
+        # Training engine (see train())
+        self.adam_lr = 0.005
+        self.batch_size = 32
+        self.max_epochs = 50
+        self.val_fraction = 0.2
+        self.patience = 5  # epochs without val improvement before stopping
+        self.cpu_budget_sec = 0.25  # CPU time per training cycle
+        self.last_report = None
+        self._adam = None
+        self._rng = np.random.default_rng()
+        
         self.training_lock = threading.Lock()
+        # Normalization statistics over the current sample window
+        self.x_norm = RunningNorm(self.input_size)
+        self.y_norm = RunningNorm(1)
+        self.dirty = False  # unsaved samples or weight updates
+        self._saved_at = time.monotonic()
         self.load_model()
     
     def relu(self, x):
@@ -69,6 +305,11 @@ class SimpleNeuralOptimizer:
         self.z2 = np.dot(self.a1, self.W2) + self.b2
         return self.z2
     
+    def infer(self, X):
+        """Forward pass without touching training state (safe during training)."""
+        a1 = self.relu(np.dot(X, self.W1) + self.b1)
+        return np.dot(a1, self.W2) + self.b2
+    
     def backward(self, X, y, output):
         """Backward pass (gradient descent)."""
         m = X.shape[0]
@@ -96,29 +337,92 @@ class SimpleNeuralOptimizer:
             return
         
         with self.training_lock:
-            # Convert samples to numpy arrays
-            X = np.array([[
-                s.current_threads,
-                s.cpu_temp if s.cpu_temp else 50.0,
-                s.cpu_usage,
-                float(s.throttled),
-                s.latency_ms,
-                s.battery_level if s.battery_level else 100.0
-            ] for s in self.samples])
-            
-            # Normalize inputs
-            X = (X - X.mean(axis=0)) / (X.std(axis=0) + 1e-8)
+            rows = self.samples.view()
             
-            # Target: hashrate (normalized)
-            y = np.array([[s.hashrate] for s in self.samples])
-            y = (y - y.mean()) / (y.std() + 1e-8)
+            # Normalize inputs and target with the running statistics
+            X = self.x_norm.normalize(rows[:, :N_FEATURES])
+            y = self.y_norm.normalize(rows[:, COL_HASHRATE:COL_HASHRATE + 1])
             
             # Forward + backward pass
             output = self.forward(X)
             self.backward(X, y, output)
+            self.dirty = True
+    
+    def train(self, max_epochs: int = None, cpu_budget_sec: float = None) -> TrainReport:
+        """
+        Shuffled mini-batch Adam over the sample window with a held-out
+        validation split and early stopping. Runs on a snapshot of the data
+        and a copy of the weights, bounded by `cpu_budget_sec` of this
+        thread's CPU time; the best-validation weights are swapped in at the end.
+        """
+        max_epochs = max_epochs or self.max_epochs
+        budget = self.cpu_budget_sec if cpu_budget_sec is None else cpu_budget_sec
+        report = TrainReport(samples=len(self.samples))
+        if len(self.samples) < 10:
+            return report
+        cpu_start = time.thread_time()
+
+        with self.training_lock:
+            rows = self.samples.view()
+            X = self.x_norm.normalize(rows[:, :N_FEATURES])
+            y = self.y_norm.normalize(rows[:, COL_HASHRATE:COL_HASHRATE + 1])
+            params = [self.W1.copy(), self.b1.copy(), self.W2.copy(), self.b2.copy()]
+        if self._adam is None:
+            self._adam = Adam(params, lr=self.adam_lr)
+
+        order = self._rng.permutation(len(X))
+        n_val = int(len(X) * self.val_fraction) if len(X) >= 25 else 0
+        val_idx, train_idx = order[:n_val], order[n_val:]
+        X_val, y_val = X[val_idx], y[val_idx]
+
+        best_loss = float('inf')
+        best_params = [p.copy() for p in params]
+        stale = 0
+        for epoch in range(max_epochs):
+            self._rng.shuffle(train_idx)
+            losses = []
+            for start in range(0, len(train_idx), self.batch_size):
+                batch = train_idx[start:start + self.batch_size]
+                loss, grads = _loss_and_grads(params, X[batch], y[batch])
+                self._adam.step(params, grads)
+                losses.append(loss)
+            report.epochs = epoch + 1
+            report.train_loss = float(np.mean(losses))
+            monitor = _mse(params, X_val, y_val) if n_val else report.train_loss
+            if n_val:
+                report.val_loss = monitor
+            if monitor < best_loss - 1e-6:
+                best_loss = monitor
+                best_params = [p.copy() for p in params]
+                stale = 0
+            else:
+                stale += 1
+                if stale >= self.patience:
+                    report.stopped_early = True
+                    break
+            if time.thread_time() - cpu_start >= budget:
+                report.budget_hit = True
+                break
+
+        with self.training_lock:
+            self.W1, self.b1, self.W2, self.b2 = best_params
+            self.dirty = True
+        if n_val:
+            report.val_loss = best_loss
+        report.cpu_sec = time.thread_time() - cpu_start
+        self.last_report = report
+        return report
+    
+    def predict_batch(self, X) -> np.ndarray:
+        """Predict (normalized) hashrate for every raw feature row of X in one pass."""
+        X = np.asarray(X, dtype=float)
+        with self.training_lock:
+            X = self.x_norm.normalize(X)
+            return self.infer(X)[:, 0]
     
     def predict_hashrate(self, threads: int, temp: float, usage: float, 
-                        throttled: bool, latency: float, battery: int) -> float:
+                        throttled: bool, latency: float, battery: int,
+                        priority: int = 5, affinity_mask: int = 0) -> float:
         """Predict hashrate for given configuration."""
         X = np.array([[
             threads,
@@ -126,34 +430,94 @@ class SimpleNeuralOptimizer:
             usage,
             1.0 if throttled else 0.0,
             latency,
-            battery if battery else 100.0
+            battery if battery else 100.0,
+            priority,
+            affinity_cores(affinity_mask),
         ]])
+        return float(self.predict_batch(X)[0])
+    
+    def candidate_grid(self, current_state: dict, max_threads: int,
+                       priorities=None, affinity_masks=None):
+        """
+        Raw feature rows for every thread count x priority x affinity mask.
+        Masks pinning fewer CPUs than threads are skipped.
+        Returns (X, configs) where configs[:, i] = (threads, priority, mask).
+        """
+        priorities = np.asarray(priorities if priorities is not None
+                                else [current_state.get('priority', 5)], dtype=float)
+        masks = np.asarray(affinity_masks if affinity_masks is not None
+                           else [current_state.get('affinity_mask', 0)], dtype=np.int64)
+        cores = np.array([affinity_cores(m) for m in masks], dtype=float)
+
+        t, p, m = np.meshgrid(np.arange(1, max_threads + 1, dtype=float),
+                              priorities, np.arange(len(masks)), indexing='ij')
+        t, p, m = t.ravel(), p.ravel(), m.ravel()
+        keep = (cores[m] == 0) | (cores[m] >= t)
+        t, p, m = t[keep], p[keep], m[keep]
+
+        n = len(t)
+        temp = current_state.get('cpu_temp') or 50.0
+        battery = current_state.get('battery_level') or 100.0
+        X = np.empty((n, N_FEATURES))
+        X[:, 0] = t
+        X[:, 1] = temp
+        X[:, 2] = current_state.get('cpu_usage', 0.5)
+        X[:, 3] = 1.0 if current_state.get('throttled') else 0.0
+        X[:, 4] = current_state.get('latency_ms', 50.0)
+        X[:, 5] = battery
+        X[:, 6] = p
+        X[:, 7] = cores[m]
+        configs = np.stack((t.astype(np.int64), p.astype(np.int64), masks[m]))
+        return X, configs
+    
+    def score_candidates(self, current_state: dict, max_threads: int,
+                         priorities=None, affinity_masks=None):
+        """Score the whole candidate grid in one forward pass; returns (configs, scores)."""
+        X, configs = self.candidate_grid(current_state, max_threads, priorities, affinity_masks)
+        scores = self.predict_batch(X)
+        temp = current_state.get('cpu_temp') or 50.0
+        battery = current_state.get('battery_level')
         
-        # Normalize (use same scale as training - simplified)
-        with self.training_lock:
-            if len(self.samples) > 0:
-                train_X = np.array([[
-                    s.current_threads, s.cpu_temp or 50, s.cpu_usage,
-                    float(s.throttled), s.latency_ms, s.battery_level or 100
-                ] for s in self.samples])
-                mean = train_X.mean(axis=0)
-                std = train_X.std(axis=0) + 1e-8
-                X = (X - mean) / std
+        # Penalty for thermal issues
+        if temp > 80:
+            scores -= (temp - 80) * 0.1
         
-        return float(self.forward(X)[0, 0])
+        # Penalty for battery drain on mobile
+        if battery and battery < 30:
+            scores -= (30 - battery) * 0.05
+        return configs, scores
+    
+    def suggest_configuration(self, current_state: dict, max_threads: int,
+                              priorities=None, affinity_masks=None) -> dict:
+        """Best {'threads', 'priority', 'affinity_mask'} over the candidate grid."""
+        configs, scores = self.score_candidates(current_state, max_threads, priorities, affinity_masks)
+        # On a tie (e.g. a feature the model never saw vary) keep the current priority
+        top = np.flatnonzero(scores >= scores.max() - 1e-9)
+        same = top[configs[1, top] == current_state.get('priority', 5)]
+        best = int(same[0] if len(same) else top[0])
+        return {
+            'threads': max(1, int(configs[0, best])),
+            'priority': int(configs[1, best]),
+            'affinity_mask': int(configs[2, best]),
+        }
     
     def add_sample(self, sample: TrainingSample):
         """Add training sample."""
+        row = np.array(sample_to_row(sample), dtype=float)
         with self.training_lock:
-            self.samples.append(sample)
-            if len(self.samples) > self.max_samples:
-                self.samples.pop(0)
+            evicted = self.samples.append(row)
+            self.x_norm.add(row[:N_FEATURES])
+            self.y_norm.add(row[COL_HASHRATE:COL_HASHRATE + 1])
+            if evicted is not None:
+                self.x_norm.remove(evicted[:N_FEATURES])
+                self.y_norm.remove(evicted[COL_HASHRATE:COL_HASHRATE + 1])
+            self.dirty = True
     
     def suggest_optimal_threads(self, current_state: dict, max_threads: int) -> int:
         """
         Suggest optimal thread count by trying different values.
         """
-        temp = current_state.get('cpu_temp', 50.0)
+        temp = current_state.get('cpu_temp') or 50.0
         throttled = current_state.get('throttled', False)
         battery = current_state.get('battery_level', 100)
 
@@ -163,66 +527,81 @@ class SimpleNeuralOptimizer:
                 return max(1, max_threads - 1)
             return max_threads
         
-        best_threads = current_state.get('threads', max_threads)
-        best_score = -float('inf')
-        
-        usage = current_state.get('cpu_usage', 0.5)
-        latency = current_state.get('latency_ms', 50.0)
-        
-        # Try different thread counts
-        for t in range(1, max_threads + 1):
-            score = self.predict_hashrate(t, temp, usage, throttled, latency, battery)
-            
-            # Penalty for thermal issues
-            if temp > 80:
-                score -= (temp - 80) * 0.1
-            
-            # Penalty for battery drain on mobile
-            if battery and battery < 30:
-                score -= (30 - battery) * 0.05
-            
-            if score > best_score:
-                best_score = score
-                best_threads = t
-        
-        return max(1, best_threads)
+        return self.suggest_configuration(current_state, max_threads)['threads']
     
     def save_model(self):
-        """Persist model to disk."""
+        """
+        Persist weights, normalization stats and the sample ring as a plain
+        .npz (no pickle). Written to a temp file and renamed into place, so a
+        crash mid-write never leaves a corrupt model.
+        """
         try:
+            with self.training_lock:
+                arrays = {
+                    'schema_version': np.array(MODEL_SCHEMA_VERSION),
+                    'columns': np.array(SAMPLE_COLUMNS),
+                    'W1': self.W1, 'b1': self.b1, 'W2': self.W2, 'b2': self.b2,
+                    'x_n': np.array(self.x_norm.n), 'x_mean': self.x_norm.mean, 'x_m2': self.x_norm.m2,
+                    'y_n': np.array(self.y_norm.n), 'y_mean': self.y_norm.mean, 'y_m2': self.y_norm.m2,
+                    'sample_rows': self.samples.ordered(),
+                }
+                self.dirty = False
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            with open(self.model_path, 'wb') as f:
-                pickle.dump({
-                    'W1': self.W1,
-                    'b1': self.b1,
-                    'W2': self.W2,
-                    'b2': self.b2,
-                    'samples': self.samples[-100:]  # Keep recent samples only
-                }, f)
+            tmp = f"{self.model_path}.tmp"
+            with open(tmp, 'wb') as f:
+                np.savez(f, **arrays)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.model_path)
         except Exception as e:
+            self.dirty = True
             print(f"Model save failed: {e}")
     
+    def save_if_dirty(self, min_interval: float = 0):
+        """Save unsaved learning, at most once per `min_interval` seconds (flash wear)."""
+        if self.dirty and time.monotonic() - self._saved_at >= min_interval:
+            self._saved_at = time.monotonic()
+            self.save_model()
+    
     def load_model(self):
-        """Load model from disk."""
+        """Load model from disk (arrays only; never unpickles)."""
         try:
-            if os.path.exists(self.model_path):
-                with open(self.model_path, 'rb') as f:
-                    data = pickle.load(f)
-                    self.W1 = data['W1']
-                    self.b1 = data['b1']
-                    self.W2 = data['W2']
-                    self.b2 = data['b2']
-                    self.samples = data.get('samples', [])
+            if not os.path.exists(self.model_path):
+                return
+            with np.load(self.model_path, allow_pickle=False) as data:
+                if (int(data['schema_version']) != MODEL_SCHEMA_VERSION
+                        or tuple(data['columns']) != SAMPLE_COLUMNS
+                        or data['W1'].shape != self.W1.shape
+                        or data['W2'].shape != self.W2.shape):
+                    print("Model file has an incompatible layout; starting fresh")
+                    return
+                self.W1, self.b1 = data['W1'], data['b1']
+                self.W2, self.b2 = data['W2'], data['b2']
+                rows = data['sample_rows'][-self.samples.capacity:]
+                self.samples.clear()
+                self.samples.data[:len(rows)] = rows
+                self.samples.count = len(rows)
+                self.x_norm.n, self.x_norm.mean, self.x_norm.m2 = int(data['x_n']), data['x_mean'], data['x_m2']
+                self.y_norm.n, self.y_norm.mean, self.y_norm.m2 = int(data['y_n']), data['y_mean'], data['y_m2']
+                if self.x_norm.n != len(rows):
+                    self._rebuild_norm()
         except Exception as e:
             print(f"Model load failed: {e}")
     
-    def train_loop(self, interval: int = 60):
+    def _rebuild_norm(self):
+        """Recompute running statistics from scratch (after loading samples)."""
+        self.x_norm.reset()
+        self.y_norm.reset()
+        for row in self.samples.view():
+            self.x_norm.add(row[:N_FEATURES])
+            self.y_norm.add(row[COL_HASHRATE:COL_HASHRATE + 1])
+    
+    def train_loop(self, interval: int = 30):
         """Background training loop."""
         while True:
             time.sleep(interval)
-            self.train_step()
-            if len(self.samples) % 50 == 0:
-                self.save_model()
+            self.train()
+            self.save_if_dirty(config.MODEL_SAVE_INTERVAL_SEC)
 
 
 # Global optimizer instance
@@ -233,6 +612,8 @@ def get_optimizer() -> SimpleNeuralOptimizer:
     global _optimizer
     if _optimizer is None:
         _optimizer = SimpleNeuralOptimizer()
+        # Don't lose what was learned since the last training cycle
+        atexit.register(_optimizer.save_if_dirty)
         # Start background training
         t = threading.Thread(target=_optimizer.train_loop, daemon=True)
         t.start()
@@ -1,11 +1,34 @@
 """
-Balance tracking by parsing XMRig API output and pool data.
+Balance tracking from XMRig HTTP API telemetry (console parsing as fallback)
+and pool data.
 """
+import random
 import re
 import subprocess
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional
 
+from . import config
+from .pool_api import adapter_for_host
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session so pool API calls reuse TLS connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+    return _session
+
 
 class BalanceTracker:
     def __init__(self, pool_host: str, wallet: str):
@@ -14,9 +37,55 @@ class BalanceTracker:
         self.local_hashrate = 0.0
         self.shares_accepted = 0
         self.shares_rejected = 0
+        self.hashrate_60s = 0.0
+        self.hashrate_15m = 0.0
+        self.thread_hashrates = []
+        self.pool_latency_ms = None
+        self.api_stats = None
+
+        # Cached pool balance, refreshed by a background thread
+        self.balance = None
+        self.balance_updated = 0.0
+        self.balance_errors = 0
+        self.pool_stats = None  # PoolAccountStats from the last successful fetch
+        self.session = None  # override (e.g. offline fixture session); defaults to get_session()
+        self._refresh_stop = threading.Event()
+        self._refresh_wake = threading.Event()
+        self._refresh_thread = None
+
+    def update_from_stats(self, stats):
+        """Take exact figures from an XmrigStats snapshot (core.xmrig_api)."""
+        self.api_stats = stats
+        self.local_hashrate = stats.hashrate
+        self.hashrate_60s = stats.hashrate_60s
+        self.hashrate_15m = stats.hashrate_15m
+        self.thread_hashrates = list(stats.thread_hashrates)
+        self.shares_accepted = stats.shares_good
+        self.shares_rejected = stats.shares_rejected
+        if stats.pool_ping_ms:
+            self.pool_latency_ms = stats.pool_ping_ms
+        if stats.pool:
+            self.follow_pool(stats.pool.rpartition(':')[0] or stats.pool)
+
+    def follow_pool(self, host: str):
+        """
+        Track the balance on `host` from now on: XMRig reports the pool it is
+        actually mining on, which changes after an in-process failover.
+        """
+        if host == self.pool_host:
+            return
+        self.pool_host = host
+        self.balance = None  # the old pool's balance no longer grows
+        self.balance_updated = 0.0
+        self.balance_errors = 0
+        self.pool_stats = None
+        self._refresh_wake.set()
         
     def parse_xmrig_output(self, line: str):
-        """Parse XMRig console output for hashrate and shares."""
+        """
+        Parse XMRig console output for hashrate and shares.
+        Only used as a fallback while the HTTP API is unreachable.
+        """
         # Multiple patterns for hashrate
         # Pattern 1: "speed 10s/60s/15m 1234.5 1230.0 1225.5 H/s"
         # Pattern 2: "miner speed 10s/60s/15m 1234.5 1230.0 1225.5 H/s max 1500.0 H/s"
@@ -49,35 +118,66 @@ class BalanceTracker:
         elif 'rejected' in line_lower and 'share' in line_lower:
             self.shares_rejected += 1
     
-    def get_pool_balance(self) -> Optional[float]:
+    def fetch_pool_balance(self, host: str = None) -> Optional[float]:
         """
-        Query pool API for mined balance.
-        Different pools have different APIs - this is a generic stub.
+        Query pool API for mined balance (blocking) via the pool's adapter.
+        Also keeps pool-side hashrate/payments in `pool_stats`.
+        Returns None for pools without a supported API; raises on API errors.
         """
+        adapter = adapter_for_host(host or self.pool_host)
+        if adapter is None:
+            return None
+        stats = adapter.fetch(self.session or get_session(), self.wallet,
+                              include_payments=adapter.batches_payments)
+        if (host or self.pool_host) == self.pool_host:
+            self.pool_stats = stats
+        return stats.balance_xmr
+
+    def refresh_balance(self) -> float:
+        """Fetch once and update the cache. Returns seconds until the next fetch."""
+        host = self.pool_host
         try:
-            # Example for MoneroOcean
-            if 'moneroocean' in self.pool_host:
-                url = f"https://api.moneroocean.stream/miner/{self.wallet}/stats"
-                r = requests.get(url, timeout=10)
-                if r.status_code == 200:
-                    data = r.json()
-                    # Balance is usually in atomic units (piconero), divide by 1e12 for XMR
-                    return data.get('amtDue', 0) / 1e12
-            
-            # Example for SupportXMR
-            elif 'supportxmr' in self.pool_host:
-                url = f"https://supportxmr.com/api/miner/{self.wallet}/stats"
-                r = requests.get(url, timeout=10)
-                if r.status_code == 200:
-                    data = r.json()
-                    return data.get('amtDue', 0) / 1e12
-            
-            # Add more pool APIs as needed
-            
+            balance = self.fetch_pool_balance(host)
         except Exception as e:
-            print(f"Pool API error: {e}")
-        
-        return None
+            self.balance_errors += 1
+            delay = min(config.BALANCE_BACKOFF_MAX_SEC,
+                        config.BALANCE_TTL_SEC * 2 ** min(self.balance_errors, 10))
+            print(f"Pool API error: {e} (retry in {delay:.0f}s)")
+            return delay * random.uniform(0.8, 1.2)
+        if host != self.pool_host:
+            return 0.0  # XMRig failed over mid-fetch; fetch the new pool instead
+        self.balance_errors = 0
+        if balance is not None:
+            self.balance = balance
+            self.balance_updated = time.time()
+        return config.BALANCE_TTL_SEC
+
+    def _refresh_loop(self):
+        while not self._refresh_stop.is_set():
+            delay = self.refresh_balance()
+            # Woken early by stop() or a pool switch
+            self._refresh_wake.wait(delay)
+            self._refresh_wake.clear()
+
+    def start_balance_refresh(self):
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._refresh_stop.set()
+        self._refresh_wake.set()
+
+    def get_pool_balance(self) -> Optional[float]:
+        """
+        Last known pool balance in XMR, or None until the first successful
+        fetch. Never blocks: the first call starts the background refresher.
+        """
+        if self._refresh_thread is None:
+            self.start_balance_refresh()
+        return self.balance
     
     def get_estimated_balance(self) -> float:
         """
@@ -13,9 +13,62 @@ POOLS = [
 
 DEFAULT_THERMAL_C = 90
 DEFAULT_BATTERY_MIN = 15  # percent
-WATCHDOG_INTERVAL_SEC = 30
+SENSOR_BATTERY_TTL_SEC = 30  # PlatformMonitor re-reads the battery at most this often
+# Throttle detection (platform_sensors.ThrottleDetector)
+THROTTLE_WINDOW_SEC = 30  # sliding window for counter/frequency deltas
+THROTTLE_FREQ_RATIO = 0.7  # busy core below this fraction of its frequency cap = throttled
+THROTTLE_CAP_DROP = 0.05  # cap drop (fraction of max) within the window = throttled
+THROTTLE_BUSY_MIN = 0.8  # only cores at least this busy are judged by frequency
+# Thermal governor (core.thermal_governor): holds the CPU under DEFAULT_THERMAL_C
+GOVERNOR_MARGIN_C = 4  # aim this far below the limit
+GOVERNOR_HYSTERESIS_C = 3  # step back up only when this much further below
+GOVERNOR_HORIZON_SEC = 30  # how far ahead the temperature trend is extrapolated
+GOVERNOR_WINDOW_SEC = 60  # readings used for the trend
+GOVERNOR_HOLD_SEC = 20  # minimum time between steps (limit breaches excepted)
+GOVERNOR_TICK_SEC = 5  # android/mining_service.py sampling interval
+GOVERNOR_DUTY_PERIOD_SEC = 20  # pause/resume cycle length
+GOVERNOR_DUTY_STEP = 0.25
+GOVERNOR_MIN_DUTY = 0.25  # below this, only a limit breach pauses completely
+# big.LITTLE thread placement (core.cpu_topology.AffinityPlanner)
+AFFINITY_ENABLED = True
+AFFINITY_LITTLE_FREQ_RATIO = 0.9  # slowest cluster is "little" below this fraction of the fastest
+AFFINITY_LITTLE_MIN_RATIO = 0.35  # little core kept if its H/s >= this x big-core per-thread H/s
+AFFINITY_EVAL_SEC = 120  # measurement window per placement (after TUNER_WARMUP_SEC)
+AFFINITY_RECHECK_SEC = 3600  # dropped little cores get another trial after this
+# RandomX thread ceiling from the cache topology (core.cpu_topology.thread_ceiling)
+RANDOMX_CACHE_CEILING = True
+RANDOMX_CACHE_PER_THREAD_KB = 2048  # one RandomX scratchpad
+WATCHDOG_INTERVAL_SEC = 30  # cool-down before relaunching after a thermal stop
+WATCHDOG_HEALTHY_SEC = 300  # a run this long clears the failure streaks
+WATCHDOG_TAIL_LINES = 40  # XMRig output kept for crash classification
+WATCHDOG_METRICS_PATH = "~/.xmrminer/watchdog.json"  # restarts / downtime / last failure
 PING_TIMEOUT_SEC = 3.0
 PING_ATTEMPTS = 2
+# "tcp" times the TCP connect only; "stratum" performs a real login and
+# times connect + TLS handshake + first job (needs a wallet address).
+PROBE_MODE = "tcp"
+TLS_PORTS = (443, 10128, 10032)
+PROBE_CONCURRENCY = 8  # pools probed in parallel
+PROBE_DEADLINE_SEC = 4.0  # overall budget for pick_best_pool
+# Stop early once every other pool has been silent for margin x best latency
+PROBE_CLEAR_MARGIN = 1.5
+PROBE_CLEAR_SLACK_SEC = 0.02
+
+# Ranked failover pools handed to XMRig (it switches in-process)
+POOL_FAILOVER_MAX = 4  # pools in the list, best first
+POOL_RETRIES = 2  # XMRig "retries" before moving to the next pool
+POOL_RETRY_PAUSE_SEC = 1  # XMRig "retry-pause"
+
+# Persistent pool latency store (EWMA per endpoint)
+POOL_STORE_PATH = "~/.xmrminer/pool_latency.json"
+POOL_STORE_ALPHA = 0.3  # weight of the newest measurement
+POOL_STORE_MAX_AGE_SEC = 6 * 3600  # entries older than this get re-probed in background
+POOL_STORE_MAX_FAILURES = 3  # consecutive failures before a pool is skipped
+
+# RandomX memory planning (core.memory_planner)
+MEMORY_RESERVE_MB = 512  # kept free for the OS/apps when choosing fast mode
+MEMORY_PRESSURE_MIN_MB = 200  # mid-run: fast mode drops to light below this MemAvailable
+MEMORY_PSI_FULL_AVG10 = 10.0  # ... or when /proc/pressure/memory "full avg10" reaches this (%)
 
 # Thread limits will be determined at runtime; these are caps
 THREAD_CAP_RATIO = 1.0  # use all logical CPUs by default
@@ -28,3 +81,44 @@ XMRIG_BIN_WINDOWS = "bin/windows_x64/xmrig.exe"
 ENABLE_PRICE_LOOKUP = False
 COINGECKO_ID = "monero"
 FIAT_CODE = "usd"
+
+# XMRig local HTTP API (telemetry). Bound to loopback only.
+XMRIG_API_HOST = "127.0.0.1"
+XMRIG_API_PORT = 18088
+XMRIG_API_TOKEN = None  # optional bearer token passed as --http-access-token
+# Live reconfiguration (PUT /1/config) needs an unrestricted API; launchers
+# generate a per-session token so it is never exposed without auth.
+XMRIG_API_LIVE_CONFIG = True
+XMRIG_API_POLL_SEC = 2.0
+XMRIG_API_TIMEOUT_SEC = 2.0
+
+# Launch from a generated, watched config.json (core.xmrig_config) instead
+# of CLI flags; the file doubles as a retune path when the API is down
+XMRIG_CONFIG_FILE = True
+XMRIG_CONFIG_DIR = "~/.xmrminer/xmrig"
+
+# Pool balance refresher (background thread, shared HTTP session)
+BALANCE_TTL_SEC = 120  # re-query the pool API at most this often
+BALANCE_TIMEOUT_SEC = 10
+BALANCE_BACKOFF_MAX_SEC = 900  # cap for exponential backoff after API errors
+
+# How often launchers re-ask the optimizer for a thread count on a live miner
+RETUNE_INTERVAL_SEC = 60
+
+# Tuner strategy used by the launchers: "heuristic" (ai_autotune.suggest_threads),
+# "bandit" (explores configurations with dwell times) or "neural" (MLP after
+# one sweep of the grid). Compare them with benchmarks/replay_tuner.py first.
+TUNER_STRATEGY = "heuristic"
+TUNER_MODES = ("fast", "light")  # RandomX modes to explore (fast is dropped when RAM rules it out)
+TUNER_PRIORITIES = (3, 5)  # XMRig --cpu-priority values to explore
+TUNER_DWELL_SEC = 120  # bandit: how long each configuration is measured
+TUNER_WARMUP_SEC = 30  # bandit: readings ignored after a change (hashrate ramp-up)
+TUNER_THERMAL_MARGIN_C = 3  # bandit: treat temps this close to the limit as violations
+TUNER_THREAD_SPAN = 3  # bandit: explore only this many thread counts below the cache ceiling
+TUNER_STATE_PATH = "~/.xmrminer/tuner_bandit.json"  # bandit arm statistics across launches
+TUNER_STATE_SAVE_SEC = 600  # bandit: state is also saved when mining stops
+MODEL_SAVE_INTERVAL_SEC = 600  # neural model: periodic save; also saved when mining stops
+
+# Telemetry traces for offline tuner replay (core.tuner_replay); off by default
+TRACE_ENABLED = False
+TRACE_DIR = "~/.xmrminer/traces"
@@ -0,0 +1,304 @@
+"""
+CPU topology: big.LITTLE-aware thread placement and the cache-derived
+RandomX thread ceiling.
+
+Phones pair a few fast cores with a cluster of slow, efficient ones. Left to
+the OS, RandomX threads land on both, and the little cores often add almost
+no hashrate while heating the whole SoC. The topology is read once from
+/sys/devices/system/cpu/cpu*/{cpufreq/cpuinfo_max_freq,topology/cluster_id};
+AffinityPlanner turns it into an explicit placement (big cores first, then
+however many little cores earn their keep) and decides that number from the
+per-thread hashrates XMRig reports.
+
+Each RandomX thread works through a 2 MB scratchpad; once the threads sharing
+a cache outnumber what it can hold, extra threads mostly add cache misses
+and heat. thread_ceiling() derives that bound from
+/sys/devices/system/cpu/cpu*/cache/index*/{level,size,shared_cpu_list} and
+the tuners use it as their upper bound instead of the logical CPU count.
+"""
+import multiprocessing
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from . import config, platform_sensors
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """Parse a sysfs CPU list such as "0-3,6,8-9"."""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+@dataclass
+class CpuCore:
+    cpu: int
+    cluster: int
+    max_freq_khz: Optional[int] = None
+
+
+@dataclass
+class CpuTopology:
+    cores: List[CpuCore] = field(default_factory=list)
+    big: List[int] = field(default_factory=list)  # fastest first
+    little: List[int] = field(default_factory=list)
+
+    @property
+    def heterogeneous(self) -> bool:
+        return bool(self.big and self.little)
+
+
+def read_topology(root: str = None) -> CpuTopology:
+    """
+    Read per-core max frequency and cluster from sysfs. The slowest cluster
+    is "little" if its max frequency is below AFFINITY_LITTLE_FREQ_RATIO of the
+    fastest; mid clusters of three-tier SoCs count as big. Empty on systems
+    without sysfs.
+    """
+    base = os.path.join(root or platform_sensors.SYSFS_ROOT, 'devices/system/cpu')
+    try:
+        cpus = sorted(int(n[3:]) for n in os.listdir(base) if re.fullmatch(r'cpu\d+', n))
+    except OSError:
+        return CpuTopology()
+    cores = []
+    for cpu in cpus:
+        path = os.path.join(base, f'cpu{cpu}')
+        cluster = _read_int(os.path.join(path, 'topology/cluster_id'))
+        if cluster is None:
+            cluster = _read_int(os.path.join(path, 'topology/physical_package_id'))
+        cores.append(CpuCore(cpu, cluster if cluster is not None else 0,
+                             _read_int(os.path.join(path, 'cpufreq/cpuinfo_max_freq'))))
+
+    # A cluster's speed is its fastest core; the slowest cluster(s) are little
+    # when clearly slower than the fastest one
+    cluster_freq: Dict[int, int] = {}
+    for c in cores:
+        cluster_freq[c.cluster] = max(cluster_freq.get(c.cluster, 0), c.max_freq_khz or 0)
+    fastest, slowest = max(cluster_freq.values()), min(cluster_freq.values())
+    ordered = sorted(cores, key=lambda c: (-cluster_freq[c.cluster], -(c.max_freq_khz or 0), c.cpu))
+    if not fastest or slowest >= fastest * config.AFFINITY_LITTLE_FREQ_RATIO:
+        return CpuTopology(cores, [c.cpu for c in ordered], [])
+    big = [c.cpu for c in ordered if cluster_freq[c.cluster] > slowest]
+    little = [c.cpu for c in ordered if cluster_freq[c.cluster] == slowest]
+    return CpuTopology(cores, big, little)
+
+
+@dataclass
+class CacheDomain:
+    """CPUs sharing one last-level cache and the L2/L3 capacity they share."""
+    cpus: List[int]
+    llc_level: int
+    size_kb: int  # last-level cache plus the L2 caches beneath it
+
+    def ceiling(self, per_thread_kb: int = None) -> int:
+        per_thread_kb = per_thread_kb or config.RANDOMX_CACHE_PER_THREAD_KB
+        return max(1, min(len(self.cpus), self.size_kb // per_thread_kb))
+
+
+def _parse_size_kb(text: str) -> Optional[int]:
+    match = re.fullmatch(r'(\d+)\s*([KMG]?)', text.strip().upper())
+    if not match:
+        return None
+    return int(match.group(1)) * {'': 1 / 1024, 'K': 1, 'M': 1024, 'G': 1024 * 1024}[match.group(2)]
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def read_cache_domains(root: str = None) -> List[CacheDomain]:
+    """
+    Group CPUs by the last-level cache they share. Each domain counts its
+    LLC plus the distinct L2 caches of its CPUs: on non-inclusive designs
+    (DynamIQ, Zen, recent Intel) both hold scratchpad lines, and a slightly
+    generous budget is safer than starving the tuners. L1 and instruction
+    caches are ignored. Empty without sysfs cache information.
+    """
+    base = os.path.join(root or platform_sensors.SYSFS_ROOT, 'devices/system/cpu')
+    try:
+        cpus = sorted(int(n[3:]) for n in os.listdir(base) if re.fullmatch(r'cpu\d+', n))
+    except OSError:
+        return []
+    caches = {}  # (level, shared cpus) -> size KB
+    llc: Dict[int, tuple] = {}  # cpu -> (level, shared cpus) of its last-level cache
+    for cpu in cpus:
+        cache_dir = os.path.join(base, f'cpu{cpu}', 'cache')
+        try:
+            indexes = [n for n in os.listdir(cache_dir) if n.startswith('index')]
+        except OSError:
+            continue
+        for index in indexes:
+            path = os.path.join(cache_dir, index)
+            level = _read_int(os.path.join(path, 'level'))
+            size = _parse_size_kb(_read_text(os.path.join(path, 'size')) or '')
+            shared = _read_text(os.path.join(path, 'shared_cpu_list'))
+            if (not level or level < 2 or not size or not shared
+                    or _read_text(os.path.join(path, 'type')) == 'Instruction'):
+                continue
+            try:
+                key = (level, tuple(parse_cpu_list(shared)))
+            except ValueError:
+                continue
+            caches[key] = size
+            if cpu not in llc or level > llc[cpu][0]:
+                llc[cpu] = key
+
+    domains = []
+    for key in sorted(set(llc.values()), key=lambda k: k[1]):
+        level, shared = key
+        members = set(shared)
+        size = caches[key] + sum(kb for (lvl, cs), kb in caches.items()
+                                 if lvl < level and set(cs) <= members)
+        domains.append(CacheDomain(sorted(c for c in shared if c in llc), level, int(size)))
+    return domains
+
+
+def randomx_thread_ceiling(domains: Sequence[CacheDomain], per_thread_kb: int = None) -> Optional[int]:
+    """Sum of per-domain ceilings; None when the cache layout is unknown."""
+    if not domains:
+        return None
+    return sum(d.ceiling(per_thread_kb) for d in domains)
+
+
+_topologies: Dict[str, CpuTopology] = {}
+_ceilings: Dict[str, Optional[int]] = {}
+
+
+def cpu_topology() -> CpuTopology:
+    """Shared CpuTopology for the current SYSFS_ROOT (read once)."""
+    root = platform_sensors.SYSFS_ROOT
+    topology = _topologies.get(root)
+    if topology is None:
+        topology = _topologies[root] = read_topology(root)
+    return topology
+
+
+def thread_ceiling(logical_cpus: int = None) -> int:
+    """
+    Upper bound for the tuners: the logical CPU count, lowered to the cache
+    ceiling where sysfs reports one (read once per SYSFS_ROOT).
+    """
+    logical_cpus = logical_cpus or multiprocessing.cpu_count()
+    if not config.RANDOMX_CACHE_CEILING:
+        return logical_cpus
+    root = platform_sensors.SYSFS_ROOT
+    if root not in _ceilings:
+        _ceilings[root] = randomx_thread_ceiling(read_cache_domains(root))
+    ceiling = _ceilings[root]
+    return max(1, min(logical_cpus, ceiling)) if ceiling else logical_cpus
+
+
+def affinity_mask(cpus: Sequence[int]) -> str:
+    """Hex mask for XMRig's --cpu-affinity."""
+    mask = 0
+    for cpu in cpus:
+        mask |= 1 << cpu
+    return hex(mask)
+
+
+class AffinityPlanner:
+    """
+    Explicit thread placement for big.LITTLE CPUs.
+
+    Threads fill big cores first, then little ones, so a lower thread count
+    (tuner or thermal governor) always sheds little cores first. Every little
+    core starts out allowed; once a placement has been running for
+    TUNER_WARMUP_SEC + AFFINITY_EVAL_SEC, little cores averaging less than
+    AFFINITY_LITTLE_MIN_RATIO of the big-core per-thread hashrate are dropped.
+    They get another trial after AFFINITY_RECHECK_SEC. On symmetric CPUs the
+    planner is inert and placement is left to the OS.
+    """
+
+    def __init__(self, topology: CpuTopology = None, min_ratio: float = None,
+                 warmup_sec: float = None, eval_sec: float = None, recheck_sec: float = None):
+        self.topology = topology or cpu_topology()
+        self.min_ratio = config.AFFINITY_LITTLE_MIN_RATIO if min_ratio is None else min_ratio
+        self.warmup_sec = config.TUNER_WARMUP_SEC if warmup_sec is None else warmup_sec
+        self.eval_sec = config.AFFINITY_EVAL_SEC if eval_sec is None else eval_sec
+        self.recheck_sec = config.AFFINITY_RECHECK_SEC if recheck_sec is None else recheck_sec
+        self.active = config.AFFINITY_ENABLED and self.topology.heterogeneous
+        self.little_allowed = len(self.topology.little)
+        self.decided_at: Optional[float] = None
+        self._placement: Optional[tuple] = None
+        self._since = 0.0
+        self._sums: Dict[int, List[float]] = {}  # cpu -> [sum, count]
+
+    @property
+    def max_threads(self) -> Optional[int]:
+        """Thread ceiling of the current plan (None when inactive)."""
+        if not self.active:
+            return None
+        return len(self.topology.big) + self.little_allowed
+
+    def cpus_for(self, threads: int) -> Optional[List[int]]:
+        """One CPU per thread, big cores first; None leaves placement to XMRig."""
+        if not self.active:
+            return None
+        order = self.topology.big + self.topology.little[:self.little_allowed]
+        return order[:max(1, min(threads, len(order)))]
+
+    def observe(self, stats, now: float = None) -> bool:
+        """Feed XmrigStats; True when the number of allowed little cores changed."""
+        if not self.active or stats is None or stats.paused:
+            return False
+        now = time.monotonic() if now is None else now
+        if (self.decided_at is not None and self.little_allowed < len(self.topology.little)
+                and now - self.decided_at >= self.recheck_sec):
+            self.little_allowed = len(self.topology.little)
+            self.decided_at = now
+            return True
+
+        placement = tuple(stats.thread_affinity)
+        if placement != self._placement:
+            self._placement, self._since, self._sums = placement, now, {}
+            return False
+        if now - self._since < self.warmup_sec:
+            return False
+        for cpu, rate in zip(stats.thread_affinity, stats.thread_hashrates):
+            if cpu >= 0 and rate > 0:
+                entry = self._sums.setdefault(cpu, [0.0, 0])
+                entry[0] += rate
+                entry[1] += 1
+        if now - self._since < self.warmup_sec + self.eval_sec:
+            return False
+
+        means = {cpu: s / n for cpu, (s, n) in self._sums.items() if n}
+        big = [means[c] for c in self.topology.big if c in means]
+        little = [c for c in self.topology.little if c in means]
+        if not big or not little:
+            return False
+        floor = self.min_ratio * sum(big) / len(big)
+        # Little cores are placed in order, so keep the leading run that earns its keep
+        earning = 0
+        for cpu in little:
+            if means[cpu] < floor:
+                break
+            earning += 1
+        self._since, self._sums = now, {}
+        if earning == len(little) or earning >= self.little_allowed:
+            return False  # nothing measured to fall short, or already at/below this plan
+        self.little_allowed = earning
+        self.decided_at = now
+        return True
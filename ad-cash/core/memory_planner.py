@@ -0,0 +1,182 @@
+"""
+Memory-aware RandomX mode selection and huge-page report.
+
+Fast mode hashes from a ~2 GB dataset, light mode from the 256 MB cache at
+a fraction of the speed. Left to --randomx-mode=auto, XMRig picks fast on
+low-RAM phones and the low-memory killer restarts it. MemoryPlanner reads
+/proc/meminfo before launch, picks the mode that fits next to a reserve for
+the OS, reports how many huge pages the allocation needs against what the
+kernel has free, and during the run downgrades a fast-mode miner to light
+once memory pressure rises (low MemAvailable or PSI stalls). It never
+upgrades mid-run; the next launch re-plans.
+"""
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import psutil
+
+from . import config
+
+PROC_ROOT = '/proc'
+
+RANDOMX_DATASET_MB = 2080
+RANDOMX_CACHE_MB = 256
+RANDOMX_SCRATCHPAD_MB = 2  # per hashing thread
+
+
+@dataclass
+class MemInfo:
+    total_mb: Optional[float] = None
+    available_mb: Optional[float] = None
+    hugepages_total: int = 0
+    hugepages_free: int = 0
+    hugepage_kb: Optional[int] = None  # None = no hugetlbfs (Windows/macOS)
+
+
+@dataclass
+class MemoryPlan:
+    randomx_mode: str  # "fast" or "light"
+    needed_mb: float
+    available_mb: Optional[float]
+    huge_pages: bool  # the allocation fits in free huge pages
+    pages_needed: int = 0
+    pages_free: int = 0
+    page_kb: Optional[int] = None
+    reason: str = ""
+
+    def report(self) -> str:
+        avail = f"{self.available_mb:.0f} MB" if self.available_mb is not None else "unknown"
+        text = f"RandomX {self.randomx_mode}: needs {self.needed_mb:.0f} MB, {avail} available ({self.reason})"
+        if self.page_kb is None:
+            return text + "; huge pages: not reported by this OS"
+        if self.huge_pages:
+            return text + f"; huge pages: {self.pages_needed} needed, {self.pages_free} free"
+        return (text + f"; huge pages: {self.pages_needed} needed, only {self.pages_free} free"
+                f" (sysctl -w vm.nr_hugepages={self.pages_needed})")
+
+
+def _parse_meminfo(text: str) -> Dict[str, int]:
+    values = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(':')
+        parts = rest.split()
+        if parts:
+            try:
+                values[name.strip()] = int(parts[0])
+            except ValueError:
+                pass
+    return values
+
+
+def read_meminfo(root: str = None) -> MemInfo:
+    """MemInfo from /proc/meminfo, falling back to psutil (no huge pages)."""
+    try:
+        with open(os.path.join(root or PROC_ROOT, 'meminfo')) as f:
+            values = _parse_meminfo(f.read())
+    except OSError:
+        values = {}
+    if 'MemAvailable' in values:
+        return MemInfo(
+            total_mb=values.get('MemTotal', 0) / 1024,
+            available_mb=values['MemAvailable'] / 1024,
+            hugepages_total=values.get('HugePages_Total', 0),
+            hugepages_free=values.get('HugePages_Free', 0),
+            hugepage_kb=values.get('Hugepagesize'),
+        )
+    try:
+        vm = psutil.virtual_memory()
+        return MemInfo(total_mb=vm.total / 2 ** 20, available_mb=vm.available / 2 ** 20)
+    except Exception:
+        return MemInfo()
+
+
+def read_psi_full_avg10(root: str = None) -> Optional[float]:
+    """Share of the last 10 s all tasks stalled on memory (/proc/pressure/memory)."""
+    try:
+        with open(os.path.join(root or PROC_ROOT, 'pressure/memory')) as f:
+            for line in f:
+                if line.startswith('full'):
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition('=')
+                        if key == 'avg10':
+                            return float(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def randomx_footprint_mb(mode: str, threads: int) -> float:
+    dataset = RANDOMX_DATASET_MB if mode == "fast" else 0
+    return dataset + RANDOMX_CACHE_MB + RANDOMX_SCRATCHPAD_MB * max(1, threads)
+
+
+class MemoryPlanner:
+    """Picks the RandomX mode before launch and guards it during the run."""
+
+    def __init__(self, root: str = None, reserve_mb: float = None, pressure_min_mb: float = None,
+                 psi_full_pct: float = None):
+        self.root = root
+        self.reserve_mb = config.MEMORY_RESERVE_MB if reserve_mb is None else reserve_mb
+        self.pressure_min_mb = config.MEMORY_PRESSURE_MIN_MB if pressure_min_mb is None else pressure_min_mb
+        self.psi_full_pct = config.MEMORY_PSI_FULL_AVG10 if psi_full_pct is None else psi_full_pct
+        self.fast_allowed = True
+        self.fast_banned = False  # set after an OOM kill; survives re-planning
+        self.last_plan: Optional[MemoryPlan] = None
+
+    def plan(self, threads: int, meminfo: MemInfo = None) -> MemoryPlan:
+        info = meminfo or read_meminfo(self.root)
+        fast_mb = randomx_footprint_mb("fast", threads)
+        light_mb = randomx_footprint_mb("light", threads)
+        if self.fast_banned:
+            mode, reason = "light", "fast mode was OOM-killed"
+        elif info.available_mb is None:
+            mode, reason = "light", "memory unknown"
+        elif info.available_mb - self.reserve_mb >= fast_mb:
+            mode, reason = "fast", f"{self.reserve_mb:.0f} MB reserve kept"
+        else:
+            mode, reason = "light", f"fast needs {fast_mb:.0f} MB + {self.reserve_mb:.0f} MB reserve"
+        self.fast_allowed = mode == "fast"
+
+        needed = fast_mb if mode == "fast" else light_mb
+        plan = MemoryPlan(mode, needed, info.available_mb, huge_pages=False,
+                          page_kb=info.hugepage_kb, reason=reason)
+        if info.hugepage_kb:
+            plan.pages_needed = math.ceil(needed * 1024 / info.hugepage_kb)
+            plan.pages_free = info.hugepages_free
+            plan.huge_pages = info.hugepages_free >= plan.pages_needed
+        self.last_plan = plan
+        return plan
+
+    def clamp_mode(self, mode: str) -> str:
+        """
+        Resolve a tuner's mode: "auto" means the planned mode, and fast mode
+        never comes back once it was ruled out.
+        """
+        if mode == "auto" or (mode == "fast" and not self.fast_allowed):
+            return "fast" if self.fast_allowed else "light"
+        return mode
+
+    def mode_allowed(self, mode: str) -> bool:
+        """Tuner filter: fast mode is off the table once it was ruled out."""
+        return mode != "fast" or self.fast_allowed
+
+    def under_pressure(self) -> bool:
+        info = read_meminfo(self.root)
+        if info.available_mb is not None and info.available_mb < self.pressure_min_mb:
+            return True
+        psi = read_psi_full_avg10(self.root)
+        return psi is not None and psi >= self.psi_full_pct
+
+    def check(self, mode: str) -> bool:
+        """
+        Per-tick guard for a running miner in `mode`; True when it should be
+        downgraded to light mode now (fast mode is then ruled out for the run).
+        """
+        if mode == "light" or not self.fast_allowed:
+            return False
+        if self.under_pressure():
+            self.fast_allowed = False
+            return True
+        return False
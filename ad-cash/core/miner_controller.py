@@ -1,19 +1,22 @@
 import argparse
 import os
 import platform
+import time
 import psutil
 from typing import Optional
 
 try:
     from . import config
     from .ai_autotune import Telemetry, suggest_threads
-    from .pool_selector import pick_best_pool_sync
+    from .platform_sensors import cpu_load
+    from .pool_selector import rank_pools_sync
     from .watchdog import build_xmrig_cmd
 except ImportError:
     # Standalone execution
     import config
     from ai_autotune import Telemetry, suggest_threads
-    from pool_selector import pick_best_pool_sync
+    from platform_sensors import cpu_load
+    from pool_selector import rank_pools_sync
     from watchdog import build_xmrig_cmd
 
 
@@ -31,11 +34,12 @@ def current_temp_c() -> Optional[float]:
     return None
 
 
-def cpu_busy() -> float:
-    try:
-        return psutil.cpu_percent(interval=1) / 100.0
-    except Exception:
-        return 0.0
+def cpu_busy(sample_sec: float = 0.25) -> float:
+    # One-shot CLI: prime the delta sampler, otherwise the first reading is
+    # the average since boot
+    cpu_load()
+    time.sleep(sample_sec)
+    return cpu_load()
 
 
 def pick_binary() -> str:
@@ -45,7 +49,8 @@ def pick_binary() -> str:
 
 
 def main(demo: bool = False):
-    host, port, latency = pick_best_pool_sync()
+    pools = rank_pools_sync()
+    host, port, latency = pools[0]
     bin_path = pick_binary()
     telem = Telemetry(
         hash_rate=0.0,
@@ -65,6 +70,7 @@ def main(demo: bool = False):
         pool_host=host,
         pool_port=port,
         threads=threads,
+        failover=[p[:2] for p in pools[1:]],
     )
     if demo:
         print("Selected pool:", host, port, f"{latency*1000:.1f} ms")
@@ -4,147 +4,551 @@ Platform-specific battery and temperature sensors.
 import os
 import platform
 import psutil
-from typing import Optional
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
+from . import config
 
-def get_battery_level() -> Optional[int]:
-    """Get battery level percentage (0-100) or None if not available."""
+# Root of the sysfs tree; benchmarks point this at a fixture copy
+SYSFS_ROOT = '/sys'
+
+
+def _sysfs(path: str) -> str:
+    return os.path.join(SYSFS_ROOT, path)
+
+
+def _is_android() -> bool:
+    return platform.system() == 'Linux' and ('ANDROID_ROOT' in os.environ or 'ANDROID_DATA' in os.environ)
+
+
+def _psutil_battery() -> Optional[Tuple[int, bool]]:
+    """(percent, plugged in) from psutil, or None."""
     try:
         battery = psutil.sensors_battery()
         if battery:
-            return int(battery.percent)
+            return int(battery.percent), bool(battery.power_plugged)
     except Exception:
         pass
-    
-    # Android-specific (requires Java/JNI or adb shell)
-    if platform.system() == 'Linux' and ('ANDROID_ROOT' in os.environ or 'ANDROID_DATA' in os.environ):
-        try:
-            # Try reading from Android system files
-            with open('/sys/class/power_supply/battery/capacity', 'r') as f:
-                return int(f.read().strip())
-        except Exception:
-            pass
-    
     return None
 
 
-def is_charging() -> bool:
-    """Check if device is charging."""
+def _android_battery() -> Optional[Tuple[int, bool]]:
+    """(percent, charging) from the Android power_supply node, or None."""
+    if not _is_android():
+        return None
     try:
-        battery = psutil.sensors_battery()
-        if battery:
-            return battery.power_plugged
+        with open(_sysfs('class/power_supply/battery/capacity'), 'r') as f:
+            level = int(f.read().strip())
+    except Exception:
+        return None
+    charging = False
+    try:
+        with open(_sysfs('class/power_supply/battery/status'), 'r') as f:
+            status = f.read().strip().lower()
+            charging = status in ('charging', 'full')  # not 'discharging'
     except Exception:
         pass
-    
-    # Android-specific
-    if platform.system() == 'Linux' and ('ANDROID_ROOT' in os.environ or 'ANDROID_DATA' in os.environ):
-        try:
-            with open('/sys/class/power_supply/battery/status', 'r') as f:
-                status = f.read().strip().lower()
-                return 'charging' in status or 'full' in status
-        except Exception:
-            pass
-    
-    return False
+    return level, charging
 
 
-def get_cpu_temperature() -> Optional[float]:
-    """Get CPU temperature in Celsius or None if not available."""
+def get_battery_level() -> Optional[int]:
+    """Get battery level percentage (0-100) or None if not available."""
+    reading = _psutil_battery() or _android_battery()
+    return reading[0] if reading else None
+
+
+def is_charging() -> bool:
+    """Check if device is charging."""
+    reading = _psutil_battery() or _android_battery()
+    return reading[1] if reading else False
+
+
+def _psutil_temperature() -> Optional[float]:
     try:
         temps = psutil.sensors_temperatures()
         if not temps:
             return None
-        
+
         # Try common sensor names
         for name in ['coretemp', 'cpu_thermal', 'k10temp', 'zenpower', 'acpitz']:
             if name in temps and temps[name]:
                 return temps[name][0].current
-        
+
         # Fallback: first available sensor
         for entries in temps.values():
             if entries:
                 return entries[0].current
     except Exception:
         pass
-    
-    # Android-specific
-    if platform.system() == 'Linux':
-        try:
-            # Try common thermal zones
-            for zone in range(10):
-                path = f'/sys/class/thermal/thermal_zone{zone}/temp'
-                if os.path.exists(path):
-                    with open(path, 'r') as f:
-                        # Usually in millidegrees
-                        temp = int(f.read().strip()) / 1000.0
-                        if 20 < temp < 120:  # Sanity check
-                            return temp
-        except Exception:
-            pass
-    
     return None
 
 
-def is_throttling() -> bool:
-    """Detect if CPU is being throttled."""
+# thermal_zone `type` patterns -> (kind, cluster label); first match wins.
+# CPU zones carry a cluster label so the per-cluster maximum can be reported.
+_ZONE_RULES = [
+    (re.compile(r'^cpu-(\d+)-\d+'), 'cpu', 'cluster{0}'),  # Qualcomm cpu-<cluster>-<core>-usr
+    (re.compile(r'^cpuss-(\d+)'), 'cpu', 'cluster{0}'),  # Qualcomm CPU subsystem
+    (re.compile(r'^cpu\d*-(silver|gold|prime)'), 'cpu', '{0}'),  # cpu4-gold-usr
+    (re.compile(r'(little|mid|big)'), 'cpu', '{0}'),  # Exynos / MediaTek cpu_big, little
+    (re.compile(r'^(x86_pkg_temp|mtktscpu|cpu_thermal|cpu-thermal|soc_thermal|cpu)'), 'cpu', 'cpu'),
+    (re.compile(r'(gpu|gpuss)'), 'gpu', None),
+    (re.compile(r'(battery|bms|charger|usb)'), 'battery', None),
+    (re.compile(r'(skin|xo-therm|quiet|case|pa-therm|modem|wifi|iwlwifi|pch|int3400)'), 'board', None),
+]
+
+
+def classify_zone(zone_type: str) -> Tuple[str, Optional[str]]:
+    """(kind, cluster) for a thermal_zone `type`; kind is cpu/gpu/battery/board/other."""
+    t = zone_type.strip().lower()
+    for pattern, kind, label in _ZONE_RULES:
+        m = pattern.search(t)
+        if m:
+            return kind, label.format(*m.groups()) if label else None
+    return 'other', None
+
+
+def _parse_temp(raw: bytes) -> Optional[float]:
     try:
-        # Check CPU frequency scaling
-        freq = psutil.cpu_freq()
-        if freq:
-            # If current is significantly below max, likely throttling
-            if freq.max > 0 and freq.current < freq.max * 0.7:
-                return True
-    except Exception:
-        pass
-    
-    # Linux throttling detection
-    if platform.system() == 'Linux':
+        value = int(raw.strip())
+    except ValueError:
+        return None
+    temp = value / 1000.0 if abs(value) >= 1000 else float(value)  # millidegrees on most kernels
+    return temp if 20 < temp < 120 else None  # Sanity check
+
+
+class ThermalZones:
+    """
+    Thermal zones discovered once from sysfs and classified by their `type`.
+    CPU zone files stay open and are re-read with pread, so a reading is a
+    few syscalls with no path lookups.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or SYSFS_ROOT
+        self.zones = []  # (name, type, kind, cluster)
+        self._fds = {}  # name -> fd for zones we read
+        self.discover()
+
+    def discover(self):
+        self.close()
+        base = os.path.join(self.root, 'class/thermal')
         try:
-            # Check thermal throttle events (Intel)
-            if os.path.exists('/sys/devices/system/cpu/cpu0/thermal_throttle/core_throttle_count'):
-                with open('/sys/devices/system/cpu/cpu0/thermal_throttle/core_throttle_count', 'r') as f:
-                    count = int(f.read().strip())
-                    # If count is increasing, throttling occurred
-                    return count > 0
+            names = sorted((n for n in os.listdir(base) if n.startswith('thermal_zone')),
+                           key=lambda n: int(n[len('thermal_zone'):] or 0))
+        except (OSError, ValueError):
+            names = []
+        for name in names:
+            try:
+                with open(os.path.join(base, name, 'type'), 'r') as f:
+                    zone_type = f.read().strip()
+            except OSError:
+                continue
+            kind, cluster = classify_zone(zone_type)
+            self.zones.append((name, zone_type, kind, cluster))
+        # Keep CPU zones open; if there are none, fall back to unclassified ones
+        wanted = [z for z in self.zones if z[2] == 'cpu'] or [z for z in self.zones if z[2] == 'other']
+        for name, _, _, _ in wanted:
+            try:
+                self._fds[name] = os.open(os.path.join(base, name, 'temp'), os.O_RDONLY)
+            except OSError:
+                pass
+
+    @property
+    def has_cpu_zones(self) -> bool:
+        return any(kind == 'cpu' and name in self._fds for name, _, kind, _ in self.zones)
+
+    def _read(self, name: str) -> Optional[float]:
+        fd = self._fds.get(name)
+        if fd is None:
+            return None
+        try:
+            return _parse_temp(os.pread(fd, 16, 0))
+        except OSError:
+            # Zone went away (or is disabled); stop polling it
+            os.close(self._fds.pop(name))
+            return None
+
+    def cluster_temps(self) -> Dict[str, float]:
+        """Hottest reading per CPU cluster (or per fallback zone when no CPU zones exist)."""
+        temps: Dict[str, float] = {}
+        for name, _, kind, cluster in self.zones:
+            if name not in self._fds:
+                continue
+            temp = self._read(name)
+            if temp is None:
+                continue
+            key = cluster or name
+            if temp > temps.get(key, float('-inf')):
+                temps[key] = temp
+        return temps
+
+    def cpu_temperature(self) -> Optional[float]:
+        temps = self.cluster_temps()
+        if not temps:
+            return None
+        if self.has_cpu_zones:
+            return max(temps.values())  # the hottest cluster is the one that throttles
+        return next(iter(temps.values()))  # legacy behaviour: first sane zone
+
+    def close(self):
+        for fd in self._fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = {}
+        self.zones = []
+
+
+_thermal_zones: Dict[str, ThermalZones] = {}
+
+
+def thermal_zones() -> Optional[ThermalZones]:
+    """Shared ThermalZones for the current SYSFS_ROOT (Linux/Android only)."""
+    if platform.system() != 'Linux' or not hasattr(os, 'pread'):
+        return None
+    zones = _thermal_zones.get(SYSFS_ROOT)
+    if zones is None:
+        zones = _thermal_zones[SYSFS_ROOT] = ThermalZones(SYSFS_ROOT)
+    return zones
+
+
+def get_cpu_temperature() -> Optional[float]:
+    """
+    Get CPU temperature in Celsius or None if not available.
+    CPU thermal zones win over psutil's hwmon scan; unclassified zones are
+    the last resort.
+    """
+    zones = thermal_zones()
+    if zones is not None and zones.has_cpu_zones:
+        temp = zones.cpu_temperature()
+        if temp is not None:
+            return temp
+    temp = _psutil_temperature()
+    if temp is None and zones is not None:
+        temp = zones.cpu_temperature()
+    return temp
+
+
+@dataclass
+class ThrottleState:
+    throttled: bool = False
+    cores: List[int] = field(default_factory=list)  # CPUs with throttle evidence in the window
+    severity: float = 0.0  # mean fraction of the frequency cap lost on those cores (0..1)
+    onset: Optional[float] = None  # monotonic time the current episode started
+
+
+class _CoreFiles:
+    """Open sysfs handles for one CPU's frequency and throttle counter."""
+
+    def __init__(self, cpu: int, root: str):
+        self.cpu = cpu
+        base = os.path.join(root, f'devices/system/cpu/cpu{cpu}')
+        self.fds = {}
+        for key, rel in (('cur', 'cpufreq/scaling_cur_freq'), ('cap', 'cpufreq/scaling_max_freq'),
+                         ('max', 'cpufreq/cpuinfo_max_freq'),
+                         ('count', 'thermal_throttle/core_throttle_count')):
+            try:
+                self.fds[key] = os.open(os.path.join(base, rel), os.O_RDONLY)
+            except OSError:
+                pass
+        self.max_freq = self.read('max')
+
+    def read(self, key: str) -> Optional[int]:
+        fd = self.fds.get(key)
+        if fd is None:
+            return None
+        try:
+            return int(os.pread(fd, 32, 0).strip())
+        except (OSError, ValueError):
+            return None
+
+    def close(self):
+        for fd in self.fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fds = {}
+
+
+class ThrottleDetector:
+    """
+    Per-core throttle detection from deltas over a sliding window.
+
+    A core counts as throttled when, within THROTTLE_WINDOW_SEC:
+    - its thermal throttle counter increased (Intel), or
+    - its frequency cap (scaling_max_freq) dropped by more than
+      THROTTLE_CAP_DROP of max, or
+    - it stayed busy the whole window yet ran below THROTTLE_FREQ_RATIO of
+      its cap (an idle core clocking down is the governor, not throttling).
+    A cap that just stays low (power-saver profile, no_turbo, vendor limits)
+    is the baseline, not throttling.
+    Cores are discovered once and their files re-read with pread. Without
+    per-core sysfs (Windows/macOS) the aggregate psutil frequency is used the
+    same way, as core -1.
+    """
+
+    def __init__(self, root: str = None, window_sec: float = None):
+        self.window_sec = config.THROTTLE_WINDOW_SEC if window_sec is None else window_sec
+        self.root = root or SYSFS_ROOT
+        self.cores: List[_CoreFiles] = []
+        if platform.system() == 'Linux' and hasattr(os, 'pread'):
+            base = os.path.join(self.root, 'devices/system/cpu')
+            try:
+                cpus = sorted(int(n[3:]) for n in os.listdir(base) if re.fullmatch(r'cpu\d+', n))
+            except OSError:
+                cpus = []
+            self.cores = [c for c in (_CoreFiles(cpu, root or SYSFS_ROOT) for cpu in cpus) if c.fds]
+        self._online_fd = None
+        if self.cores:
+            try:
+                self._online_fd = os.open(os.path.join(base, 'online'), os.O_RDONLY)
+            except OSError:
+                pass
+        self._history: Dict[int, deque] = {}  # cpu -> deque[(t, freq ratio, cap ratio, count, busy)]
+        self._last_times = None
+        self._onset: Optional[float] = None
+        self.state = ThrottleState()
+
+    def _online_cpus(self, count: int) -> List[int]:
+        """
+        CPU ids of psutil's per-CPU list: it only covers online CPUs, so with
+        some cores offline its positions are not CPU numbers.
+        """
+        if self._online_fd is not None:
+            try:
+                cpus = []
+                for part in os.pread(self._online_fd, 256, 0).decode().strip().split(','):
+                    lo, _, hi = part.partition('-')
+                    cpus.extend(range(int(lo), int(hi or lo) + 1))
+                if len(cpus) == count:
+                    return cpus
+            except (OSError, ValueError):
+                pass
+        return list(range(count))
+
+    def _busy(self) -> Dict[int, float]:
+        """Busy fraction per CPU id since the previous sample."""
+        try:
+            times = psutil.cpu_times(percpu=True)
         except Exception:
-            pass
-    
-    return False
+            return {}
+        totals = [(sum(t) - getattr(t, 'guest', 0.0) - getattr(t, 'guest_nice', 0.0),
+                   t.idle + getattr(t, 'iowait', 0.0)) for t in times]
+        last, self._last_times = self._last_times, totals
+        cpus = self._online_cpus(len(totals))
+        if last is None or len(last) != len(totals):
+            return dict.fromkeys(cpus, 0.0)
+        busy = {}
+        for cpu, (total, idle), (total0, idle0) in zip(cpus, totals, last):
+            d_total = total - total0
+            busy[cpu] = 1.0 - (idle - idle0) / d_total if d_total > 0 else 0.0
+        return busy
 
+    def _readings(self):
+        """Yield (cpu, freq ratio, cap ratio, throttle count) for every core."""
+        if self.cores:
+            for core in self.cores:
+                max_freq = core.max_freq
+                cur, cap = core.read('cur'), core.read('cap')
+                ratio = cur / max_freq if (cur and max_freq) else None
+                cap_ratio = cap / max_freq if (cap and max_freq) else None
+                yield core.cpu, ratio, cap_ratio, core.read('count')
+            return
+        try:
+            freq = psutil.cpu_freq()
+        except Exception:
+            freq = None
+        if freq and freq.max > 0:
+            yield -1, freq.current / freq.max, None, None
 
-def should_reduce_load(thermal_limit: float = 90.0, battery_min: int = 15) -> bool:
+    def sample(self, now: float = None) -> ThrottleState:
+        now = time.monotonic() if now is None else now
+        busy = self._busy()
+        overall = sum(busy.values()) / len(busy) if busy else 0.0
+        throttled, losses = [], []
+        for cpu, ratio, cap_ratio, count in self._readings():
+            core_busy = busy.get(cpu, overall)
+            history = self._history.setdefault(cpu, deque())
+            history.append((now, ratio, cap_ratio, count, core_busy))
+            while history and now - history[0][0] > self.window_sec:
+                history.popleft()
+
+            counted = count is not None and history[0][3] is not None and count > history[0][3]
+            peak_cap = max((c for _, _, c, _, _ in history if c is not None), default=None)
+            capped = cap_ratio is not None and cap_ratio < peak_cap - config.THROTTLE_CAP_DROP
+            slow = (len(history) >= 2 and all(
+                r is not None and r < config.THROTTLE_FREQ_RATIO * min(1.0, c or 1.0)
+                and b >= config.THROTTLE_BUSY_MIN
+                for _, r, c, _, b in history))
+            if counted or capped or slow:
+                throttled.append(cpu)
+                # Loss relative to the window's highest cap, so a static cap costs nothing
+                ceiling = min(1.0, peak_cap or 1.0)
+                loss = 1.0 - min(x / ceiling for x in (ratio, cap_ratio, ceiling) if x is not None)
+                losses.append(max(0.0, loss))
+
+        if throttled and self._onset is None:
+            self._onset = now
+        elif not throttled:
+            self._onset = None
+        self.state = ThrottleState(
+            throttled=bool(throttled),
+            cores=throttled,
+            severity=sum(losses) / len(losses) if losses else 0.0,
+            onset=self._onset,
+        )
+        return self.state
+
+    def close(self):
+        for core in self.cores:
+            core.close()
+        self.cores = []
+        if self._online_fd is not None:
+            os.close(self._online_fd)
+            self._online_fd = None
+
+
+_throttle_detectors: Dict[str, ThrottleDetector] = {}
+
+
+def is_throttling() -> bool:
     """
-    Determine if mining should be reduced/paused.
-    Returns True if thermal or battery limits are exceeded.
+    Detect if CPU is being throttled right now (new throttle events or a
+    frequency cap since the previous calls; see ThrottleDetector).
     """
-    temp = get_cpu_temperature()
+    detector = _throttle_detectors.get(SYSFS_ROOT)
+    if detector is None:
+        detector = _throttle_detectors[SYSFS_ROOT] = ThrottleDetector(SYSFS_ROOT)
+    return detector.sample().throttled
+
+
+def limits_exceeded(temp: Optional[float], battery: Optional[int], charging: bool,
+                    thermal_limit: float = 90.0, battery_min: int = 15) -> bool:
+    """True if the given readings are past the thermal or battery limits."""
     if temp and temp >= thermal_limit:
         return True
-    
-    battery = get_battery_level()
-    if battery is not None and battery <= battery_min and not is_charging():
+    if battery is not None and battery <= battery_min and not charging:
         return True
-    
     # Removed throttling check - too sensitive
-    
     return False
 
 
+def should_reduce_load(thermal_limit: float = 90.0, battery_min: int = 15) -> bool:
+    """
+    Determine if mining should be reduced/paused.
+    Returns True if thermal or battery limits are exceeded.
+    """
+    return limits_exceeded(get_cpu_temperature(), get_battery_level(), is_charging(),
+                           thermal_limit, battery_min)
+
+
+class CpuLoadSampler:
+    """
+    Busy fraction of all CPUs since the previous sample, from cumulative
+    CPU times (one /proc/stat read). Never sleeps; the first sample reports
+    the average since boot.
+    """
+
+    def __init__(self):
+        self._last: Optional[Tuple[float, float]] = None  # (busy, total) seconds
+        self.value = 0.0
+
+    def sample(self) -> float:
+        try:
+            times = psutil.cpu_times()
+        except Exception:
+            return self.value
+        # guest time is already counted in user/nice on Linux
+        total = sum(times) - getattr(times, 'guest', 0.0) - getattr(times, 'guest_nice', 0.0)
+        busy = total - times.idle - getattr(times, 'iowait', 0.0)
+        last, self._last = self._last, (busy, total)
+        if last is None:
+            d_busy, d_total = busy, total
+        else:
+            d_busy, d_total = busy - last[0], total - last[1]
+        if d_total > 0:
+            self.value = min(1.0, max(0.0, d_busy / d_total))
+        return self.value
+
+
+_cpu_load = CpuLoadSampler()
+
+
+def cpu_load() -> float:
+    """Non-blocking busy fraction since the previous cpu_load() call."""
+    return _cpu_load.sample()
+
+
 class PlatformMonitor:
     """Continuous monitoring of platform sensors."""
-    
+
     def __init__(self, thermal_limit: float = 90.0, battery_min: int = 15):
         self.thermal_limit = thermal_limit
         self.battery_min = battery_min
-    
+        self.cpu = CpuLoadSampler()
+        self.throttle = ThrottleDetector()
+        # Sources psutil cannot provide here are skipped after the first miss
+        self._psutil_temps = True
+        self._psutil_battery = True
+        self._battery: Optional[Tuple[int, bool]] = None
+        self._battery_at = float('-inf')
+
+    def close(self):
+        """Release the throttle detector's sysfs handles."""
+        self.throttle.close()
+
+    def _read_temperature(self) -> Tuple[Optional[float], Dict[str, float]]:
+        """(CPU temperature, hottest reading per cluster)."""
+        zones = thermal_zones()
+        clusters = zones.cluster_temps() if zones is not None else {}
+        if clusters and zones.has_cpu_zones:
+            return max(clusters.values()), clusters
+        if self._psutil_temps:
+            temp = _psutil_temperature()
+            if temp is not None:
+                return temp, clusters
+            self._psutil_temps = False
+        return (next(iter(clusters.values())) if clusters else None), clusters
+
+    def _read_battery(self, now: float) -> Optional[Tuple[int, bool]]:
+        # Battery level moves slowly; re-read at most every SENSOR_BATTERY_TTL_SEC
+        if now - self._battery_at < config.SENSOR_BATTERY_TTL_SEC:
+            return self._battery
+        reading = None
+        if self._psutil_battery:
+            reading = _psutil_battery()
+            if reading is None:
+                self._psutil_battery = False
+        self._battery = reading or _android_battery()
+        self._battery_at = now
+        return self._battery
+
     def get_state(self) -> dict:
-        """Get current platform state."""
+        """
+        One consistent snapshot of the platform. Every sensor is read at
+        most once and nothing blocks, so this is cheap enough to call on
+        every monitor tick.
+        """
+        now = time.monotonic()
+        temp, clusters = self._read_temperature()
+        battery = self._read_battery(now)
+        level, charging = battery if battery else (None, False)
+        throttle = self.throttle.sample(now)
         return {
-            'cpu_temp': get_cpu_temperature(),
-            'battery_level': get_battery_level(),
-            'is_charging': is_charging(),
-            'is_throttling': is_throttling(),
-            'should_reduce': should_reduce_load(self.thermal_limit, self.battery_min),
-            'cpu_usage': psutil.cpu_percent(interval=0.5) / 100.0,
+            'cpu_temp': temp,
+            'cluster_temps': clusters,
+            'battery_level': level,
+            'is_charging': charging,
+            'is_throttling': throttle.throttled,
+            'throttled_cores': throttle.cores,
+            'throttle_severity': throttle.severity,
+            'throttle_onset': throttle.onset,
+            'should_reduce': limits_exceeded(temp, level, charging, self.thermal_limit, self.battery_min),
+            'cpu_usage': self.cpu.sample(),
+            'timestamp': now,
         }
@@ -0,0 +1,257 @@
+"""
+Pool API adapters for balance, pool-side hashrate and payments.
+
+Each adapter declares the pool hosts it serves, its endpoint, the unit its
+amounts are reported in and a minimum interval between calls. Adapters are
+looked up by pool host via adapter_for_host(); every pool in config.POOLS
+has one (see missing_adapters()).
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from . import config
+
+PICONERO = 1e12  # atomic units per XMR
+XMR = 1.0
+
+
+@dataclass
+class Payment:
+    timestamp: int
+    amount_xmr: float
+    tx_hash: str = ""
+
+
+@dataclass
+class PoolAccountStats:
+    pool: str
+    balance_xmr: Optional[float] = None  # confirmed, awaiting payout
+    paid_xmr: Optional[float] = None
+    hashrate: Optional[float] = None  # H/s as seen by the pool
+    payments: List[Payment] = field(default_factory=list)
+    fetched_at: float = 0.0
+
+
+class PoolApiAdapter:
+    """Base adapter: subclasses provide urls() and parse()."""
+
+    name = ""
+    hosts: tuple = ()
+    base_url = ""
+    unit = PICONERO  # divisor turning reported amounts into XMR
+    min_interval_sec = 60.0  # pool rate limit; calls inside it reuse the last result
+    batches_payments = False  # True if stats and payments come from one call
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last: Dict[tuple, PoolAccountStats] = {}
+
+    def urls(self, wallet: str, include_payments: bool) -> List[str]:
+        raise NotImplementedError
+
+    def parse(self, responses: Dict[str, object], wallet: str) -> PoolAccountStats:
+        raise NotImplementedError
+
+    def amount(self, value) -> Optional[float]:
+        return None if value is None else float(value) / self.unit
+
+    def fetch(self, session, wallet: str, include_payments: bool = False,
+              timeout: float = None) -> PoolAccountStats:
+        """
+        Fetch and parse all endpoints for `wallet`. Raises on HTTP/JSON
+        errors. Calls within min_interval_sec return the previous result.
+        """
+        key = (wallet, include_payments)
+        with self._lock:
+            last = self._last.get(key)
+            if last and time.time() - last.fetched_at < self.min_interval_sec:
+                return last
+        timeout = timeout or config.BALANCE_TIMEOUT_SEC
+        responses = {}
+        for url in self.urls(wallet, include_payments):
+            r = session.get(url, timeout=timeout)
+            r.raise_for_status()
+            responses[url] = r.json()
+        stats = self.parse(responses, wallet)
+        stats.fetched_at = time.time()
+        with self._lock:
+            self._last[key] = stats
+        return stats
+
+
+class NodejsPoolAdapter(PoolApiAdapter):
+    """nodejs-pool frontends (MoneroOcean, SupportXMR, xmrpool.net, C3Pool)."""
+
+    def __init__(self, name: str, hosts: tuple, base_url: str, min_interval_sec: float = 60.0):
+        super().__init__()
+        self.name = name
+        self.hosts = hosts
+        self.base_url = base_url
+        self.min_interval_sec = min_interval_sec
+
+    def urls(self, wallet, include_payments):
+        urls = [f"{self.base_url}/miner/{wallet}/stats"]
+        if include_payments:
+            urls.append(f"{self.base_url}/miner/{wallet}/payments")
+        return urls
+
+    def parse(self, responses, wallet):
+        stats = responses[f"{self.base_url}/miner/{wallet}/stats"]
+        payments = responses.get(f"{self.base_url}/miner/{wallet}/payments") or []
+        return PoolAccountStats(
+            pool=self.name,
+            balance_xmr=self.amount(stats.get('amtDue', 0)),
+            paid_xmr=self.amount(stats.get('amtPaid', 0)),
+            hashrate=float(stats.get('hash') or 0.0),
+            payments=[Payment(int(p.get('ts') or p.get('pt') or 0), self.amount(p.get('amount', 0)),
+                              p.get('txnHash', "")) for p in payments],
+        )
+
+
+class NanopoolAdapter(PoolApiAdapter):
+    name = "nanopool"
+    hosts = ("nanopool.org",)
+    base_url = "https://api.nanopool.org/v1/xmr"
+    unit = XMR  # Nanopool reports XMR as decimals
+    min_interval_sec = 60.0  # documented limit: 30 requests/minute
+
+    def urls(self, wallet, include_payments):
+        urls = [f"{self.base_url}/user/{wallet}"]
+        if include_payments:
+            urls.append(f"{self.base_url}/payments/{wallet}")
+        return urls
+
+    def parse(self, responses, wallet):
+        user = responses[f"{self.base_url}/user/{wallet}"]
+        if not user.get('status'):
+            raise ValueError(f"nanopool: {user.get('error', 'unknown error')}")
+        data = user.get('data') or {}
+        payments = (responses.get(f"{self.base_url}/payments/{wallet}") or {}).get('data') or []
+        return PoolAccountStats(
+            pool=self.name,
+            balance_xmr=self.amount(data.get('balance', 0)),
+            hashrate=float(data.get('hashrate') or 0.0),
+            payments=[Payment(int(p.get('date', 0)), self.amount(p.get('amount', 0)), p.get('txHash', ""))
+                      for p in payments],
+        )
+
+
+class TwoMinersAdapter(PoolApiAdapter):
+    name = "2miners"
+    hosts = ("2miners.com",)
+    base_url = "https://xmr.2miners.com/api"
+    min_interval_sec = 60.0
+    batches_payments = True  # account endpoint already embeds payments
+
+    def urls(self, wallet, include_payments):
+        return [f"{self.base_url}/accounts/{wallet}"]
+
+    def parse(self, responses, wallet):
+        account = responses[f"{self.base_url}/accounts/{wallet}"]
+        stats = account.get('stats') or {}
+        return PoolAccountStats(
+            pool=self.name,
+            balance_xmr=self.amount(stats.get('balance', 0)),
+            paid_xmr=self.amount(stats.get('paid', 0)),
+            hashrate=float(account.get('currentHashrate') or 0.0),
+            payments=[Payment(int(p.get('timestamp', 0)), self.amount(p.get('amount', 0)), p.get('tx', ""))
+                      for p in account.get('payments') or []],
+        )
+
+
+class HashVaultAdapter(PoolApiAdapter):
+    name = "hashvault"
+    hosts = ("hashvault.pro",)
+    base_url = "https://api.hashvault.pro/v3/monero"
+    min_interval_sec = 60.0
+
+    def urls(self, wallet, include_payments):
+        urls = [f"{self.base_url}/wallet/{wallet}/stats"]
+        if include_payments:
+            urls.append(f"{self.base_url}/wallet/{wallet}/payments")
+        return urls
+
+    def parse(self, responses, wallet):
+        stats = responses[f"{self.base_url}/wallet/{wallet}/stats"]
+        revenue = stats.get('revenue') or {}
+        collective = stats.get('collective') or {}
+        payments = responses.get(f"{self.base_url}/wallet/{wallet}/payments") or []
+        return PoolAccountStats(
+            pool=self.name,
+            balance_xmr=self.amount(revenue.get('confirmedBalance', 0)),
+            paid_xmr=self.amount(revenue.get('totalPaid', 0)),
+            hashrate=float(collective.get('hashRate') or 0.0),
+            payments=[Payment(int(p.get('timestamp', 0)), self.amount(p.get('amount', 0)), p.get('hash', ""))
+                      for p in payments],
+        )
+
+
+class FixtureResponse:
+    def __init__(self, status_code: int, body):
+        self.status_code = status_code
+        self._body = body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self._body
+
+
+class FixtureSession:
+    """
+    Offline stand-in for requests.Session replaying recorded responses.
+    `responses` maps URL -> JSON body (or {"status": code, "body": ...}).
+    """
+
+    def __init__(self, responses: Dict[str, object]):
+        self.responses = responses
+        self.calls: List[str] = []
+
+    def get(self, url: str, timeout: float = None) -> FixtureResponse:
+        self.calls.append(url)
+        if url not in self.responses:
+            return FixtureResponse(404, {"error": "not recorded"})
+        body = self.responses[url]
+        if isinstance(body, dict) and set(body) == {"status", "body"}:
+            return FixtureResponse(body["status"], body["body"])
+        return FixtureResponse(200, body)
+
+
+_REGISTRY: Dict[str, PoolApiAdapter] = {}
+
+
+def register_adapter(adapter: PoolApiAdapter) -> PoolApiAdapter:
+    _REGISTRY[adapter.name] = adapter
+    return adapter
+
+
+def adapters() -> Dict[str, PoolApiAdapter]:
+    return dict(_REGISTRY)
+
+
+def adapter_for_host(host: str) -> Optional[PoolApiAdapter]:
+    # Longest host match wins, so "gulf.moneroocean.stream" beats a generic suffix
+    best, best_len = None, -1
+    for adapter in _REGISTRY.values():
+        for h in adapter.hosts:
+            if (host == h or host.endswith("." + h)) and len(h) > best_len:
+                best, best_len = adapter, len(h)
+    return best
+
+
+def missing_adapters(pools=None) -> List[str]:
+    """Pool hosts from config.POOLS with no registered adapter."""
+    return [host for host, _ in (pools or config.POOLS) if adapter_for_host(host) is None]
+
+
+register_adapter(NodejsPoolAdapter("moneroocean", ("moneroocean.stream",), "https://api.moneroocean.stream"))
+register_adapter(NodejsPoolAdapter("supportxmr", ("supportxmr.com",), "https://supportxmr.com/api"))
+register_adapter(NodejsPoolAdapter("xmrpool.net", ("xmrpool.net",), "https://api.xmrpool.net"))
+register_adapter(NodejsPoolAdapter("c3pool", ("c3pool.com",), "https://api.c3pool.com"))
+register_adapter(NanopoolAdapter())
+register_adapter(TwoMinersAdapter())
+register_adapter(HashVaultAdapter())
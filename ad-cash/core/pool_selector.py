@@ -1,9 +1,20 @@
 import asyncio
+import json
+import os
 import random
-from typing import List, Tuple
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
 from . import config
 
+Pool = Tuple[str, int]
+ProbeFn = Callable[[str, int, float], Awaitable[float]]
+
+_TICK_SEC = 0.01  # how often the selector re-checks for a clear winner
+
 
 async def _probe(host: str, port: int, timeout: float) -> float:
     start = asyncio.get_event_loop().time()
@@ -19,17 +30,199 @@ async def _probe(host: str, port: int, timeout: float) -> float:
         return float("inf")
 
 
-async def pick_best_pool(pools: List[Tuple[str, int]] = None) -> Tuple[str, int, float]:
-    """Return (host, port, latency_seconds)."""
-    pools = pools or config.POOLS
-    measurements = []
-    for host, port in pools:
-        best = float("inf")
-        for _ in range(config.PING_ATTEMPTS):
-            lat = await _probe(host, port, config.PING_TIMEOUT_SEC)
-            best = min(best, lat)
-        measurements.append((host, port, best))
-    measurements = [m for m in measurements if m[2] != float("inf")]
+@dataclass
+class StratumProbeResult:
+    connect_sec: float = float("inf")
+    tls_sec: float = 0.0  # 0 for plain-TCP ports
+    job_sec: float = float("inf")  # login sent -> first job received
+    accepted: bool = False
+    error: Optional[str] = None
+
+    @property
+    def time_to_work(self) -> float:
+        """Connect + TLS + login round trip: what a fresh XMRig connection pays."""
+        if not self.accepted:
+            return float("inf")
+        return self.connect_sec + self.tls_sec + self.job_sec
+
+
+def _tls_context() -> ssl.SSLContext:
+    # Match XMRig: encrypt, but don't require a CA-valid certificate
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+async def stratum_probe(host: str, port: int, timeout: float, wallet: str,
+                        tls: Optional[bool] = None) -> StratumProbeResult:
+    """Time a real stratum login on (host, port) up to the first job."""
+    result = StratumProbeResult()
+    tls = port in config.TLS_PORTS if tls is None else tls
+    loop = asyncio.get_event_loop()
+    writer = None
+    try:
+        start = loop.time()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+        result.connect_sec = loop.time() - start
+        if tls:
+            start = loop.time()
+            await asyncio.wait_for(
+                writer.start_tls(_tls_context(), server_hostname=host), timeout=timeout)
+            result.tls_sec = loop.time() - start
+
+        login = {
+            "id": 1,
+            "jsonrpc": "2.0",
+            "method": "login",
+            "params": {"login": wallet, "pass": "x", "agent": "xmr-miner-probe/1.0", "algo": ["rx/0"]},
+        }
+        start = loop.time()
+        writer.write(json.dumps(login).encode("utf-8") + b"\n")
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+        reply = json.loads(line) if line else {}
+        if reply.get("error"):
+            error = reply["error"]
+            result.error = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+        elif (reply.get("result") or {}).get("job"):
+            result.job_sec = loop.time() - start
+            result.accepted = True
+        else:
+            result.error = "no job in login reply"
+    except asyncio.TimeoutError:
+        result.error = "timeout"
+    except (OSError, ValueError, ssl.SSLError) as e:
+        result.error = str(e) or type(e).__name__
+    finally:
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+    return result
+
+
+def make_stratum_probe(wallet: str, details: Dict[Tuple[str, int], StratumProbeResult] = None) -> ProbeFn:
+    """
+    Adapt stratum_probe to the ProbeFn interface: the latency it reports is
+    time-to-work. Per-attempt breakdowns are kept in `details` if given.
+    """
+    async def probe(host: str, port: int, timeout: float) -> float:
+        result = await stratum_probe(host, port, timeout, wallet)
+        if details is not None:
+            prev = details.get((host, port))
+            if prev is None or result.time_to_work < prev.time_to_work:
+                details[(host, port)] = result
+        return result.time_to_work
+    probe.kind = "stratum"
+    return probe
+
+
+def probe_kind(probe: Optional[ProbeFn]) -> str:
+    """Store key suffix for `probe`: latencies from different probes never mix."""
+    return getattr(probe, "kind", "tcp")
+
+
+class _ProbeState:
+    """Shared progress of all in-flight probes, read by the selector loop."""
+
+    def __init__(self):
+        self.best: Dict[Pool, float] = {}
+        self.attempt_started: Dict[Pool, float] = {}
+        self.finished: set = set()
+
+
+async def _probe_pool(pool: Pool, probe: ProbeFn, sem: asyncio.Semaphore,
+                      state: _ProbeState, attempts: int, timeout: float):
+    loop = asyncio.get_event_loop()
+    host, port = pool
+    async with sem:
+        state.best[pool] = float("inf")
+        for _ in range(attempts):
+            state.attempt_started[pool] = loop.time()
+            lat = await probe(host, port, timeout)
+            state.best[pool] = min(state.best[pool], lat)
+    state.finished.add(pool)
+
+
+def _clear_winner(pools: List[Pool], state: _ProbeState, now: float) -> Optional[Pool]:
+    """
+    A pool is clearly best once every other unfinished pool has started and
+    can no longer come within PROBE_CLEAR_MARGIN of it.
+    """
+    answered = [(lat, p) for p, lat in state.best.items() if lat != float("inf")]
+    if not answered:
+        return None
+    lat, winner = min(answered)
+    bound = max(lat * config.PROBE_CLEAR_MARGIN, lat + config.PROBE_CLEAR_SLACK_SEC)
+    for pool in pools:
+        if pool == winner or pool in state.finished:
+            continue
+        if pool not in state.attempt_started:
+            return None  # still queued behind the concurrency limit
+        if state.best[pool] < bound or now - state.attempt_started[pool] < bound:
+            return None
+    return winner
+
+
+async def probe_pools(pools: List[Pool], probe: ProbeFn = None,
+                      deadline: float = None, early_exit: bool = True) -> Dict[Pool, float]:
+    """
+    Probe pools concurrently (at most PROBE_CONCURRENCY at once) within
+    `deadline` seconds (PROBE_DEADLINE_SEC by default), stopping as soon as
+    one pool is clearly best unless `early_exit` is False.
+    Returns best latency per pool that answered or definitively failed (inf);
+    pools cut short by an early winner or the deadline are left out.
+    """
+    probe = probe or _probe
+    deadline = config.PROBE_DEADLINE_SEC if deadline is None else deadline
+    loop = asyncio.get_event_loop()
+    end = loop.time() + deadline
+
+    state = _ProbeState()
+    sem = asyncio.Semaphore(config.PROBE_CONCURRENCY)
+    tasks = [
+        asyncio.ensure_future(_probe_pool(
+            pool, probe, sem, state, config.PING_ATTEMPTS, config.PING_TIMEOUT_SEC))
+        for pool in pools
+    ]
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = end - loop.time()
+            if remaining <= 0 or (early_exit and _clear_winner(pools, state, loop.time())):
+                break
+            _, pending = await asyncio.wait(
+                pending, timeout=min(remaining, _TICK_SEC),
+                return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    return {pool: lat for pool, lat in state.best.items()
+            if lat != float("inf") or pool in state.finished}
+
+
+async def pick_best_pool(pools: List[Tuple[str, int]] = None, probe: ProbeFn = None,
+                         deadline: float = None, store: "PoolLatencyStore" = None,
+                         early_exit: bool = True) -> Tuple[str, int, float]:
+    """
+    Return (host, port, latency_seconds) from a fresh concurrent probe.
+    Results are folded into `store` (under the probe's kind) when one is given.
+    """
+    pools = list(pools or config.POOLS)
+    results = await probe_pools(pools, probe, deadline, early_exit)
+    if store is not None:
+        for (host, port), lat in results.items():
+            store.record(host, port, lat, kind=probe_kind(probe))
+        store.save()
+
+    measurements = [(host, port, lat) for (host, port), lat in results.items()
+                    if lat != float("inf")]
     if not measurements:
         # fallback: random choice
         host, port = random.choice(pools)
@@ -38,7 +231,182 @@ async def pick_best_pool(pools: List[Tuple[str, int]] = None) -> Tuple[str, int,
     return measurements[0]
 
 
-def pick_best_pool_sync(pools: List[Tuple[str, int]] = None) -> Tuple[str, int, float]:
+class PoolLatencyStore:
+    """
+    On-disk EWMA latency and consecutive-failure counts per endpoint and
+    probe kind, so restarts can pick a pool without probing. TCP-connect and
+    stratum time-to-job latencies are kept apart ("tcp" entries keep the
+    plain "host:port" key).
+
+    File layout: {"host:port[#kind]": {"ewma": sec, "failures": n, "samples": n, "updated": ts}}
+    """
+
+    def __init__(self, path: str = None, alpha: float = None):
+        self.path = os.path.expanduser(path or config.POOL_STORE_PATH)
+        self.alpha = config.POOL_STORE_ALPHA if alpha is None else alpha
+        self.entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.load()
+
+    @staticmethod
+    def _key(host: str, port: int, kind: str = "tcp") -> str:
+        return f"{host}:{port}" if kind == "tcp" else f"{host}:{port}#{kind}"
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.entries = data
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write atomically so a crash never leaves a truncated file."""
+        with self._lock:
+            data = json.dumps(self.entries)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w') as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Pool latency store save failed: {e}")
+
+    def record(self, host: str, port: int, latency: float, now: float = None, kind: str = "tcp"):
+        now = time.time() if now is None else now
+        key = self._key(host, port, kind)
+        with self._lock:
+            entry = self.entries.setdefault(
+                key, {"ewma": None, "failures": 0, "samples": 0, "updated": 0.0})
+            if latency == float("inf"):
+                entry["failures"] += 1
+            else:
+                prev = entry["ewma"]
+                entry["ewma"] = latency if prev is None else (
+                    self.alpha * latency + (1 - self.alpha) * prev)
+                entry["failures"] = 0
+                entry["samples"] += 1
+            entry["updated"] = now
+
+    def mark_failed(self, host: str, port: int, kind: str = "tcp"):
+        """
+        Count a failure seen outside a probe (e.g. XMRig losing the pool) and
+        expire the entry, so it is ranked behind fresh pools and re-probed.
+        """
+        with self._lock:
+            entry = self.entries.setdefault(
+                self._key(host, port, kind), {"ewma": None, "failures": 0, "samples": 0, "updated": 0.0})
+            entry["failures"] += 1
+            entry["updated"] = 0.0
+
+    def is_fresh(self, host: str, port: int, now: float = None, kind: str = "tcp") -> bool:
+        now = time.time() if now is None else now
+        entry = self.entries.get(self._key(host, port, kind))
+        return bool(entry) and now - entry["updated"] < config.POOL_STORE_MAX_AGE_SEC
+
+    def best(self, pools: List[Pool], now: float = None,
+             kind: str = "tcp") -> Optional[Tuple[str, int, float]]:
+        """Lowest-EWMA fresh, healthy pool, or None if the store can't answer."""
+        now = time.time() if now is None else now
+        candidates = []
+        with self._lock:
+            for host, port in pools:
+                entry = self.entries.get(self._key(host, port, kind))
+                if (not entry or entry["ewma"] is None
+                        or entry["failures"] >= config.POOL_STORE_MAX_FAILURES
+                        or now - entry["updated"] >= config.POOL_STORE_MAX_AGE_SEC):
+                    continue
+                candidates.append((host, port, entry["ewma"]))
+        if not candidates:
+            return None
+        return min(candidates, key=lambda x: x[2])
+
+    def ranked(self, pools: List[Pool], now: float = None,
+               kind: str = "tcp") -> List[Tuple[str, int, float]]:
+        """
+        Every pool, best first: fresh healthy entries by EWMA, then stale
+        ones by EWMA, then never-measured ones, then repeatedly failing ones
+        (latency inf when unknown). Nothing is dropped; a failover list
+        should still reach a pool that merely looked bad last time.
+        """
+        now = time.time() if now is None else now
+        rows = []
+        with self._lock:
+            for order, (host, port) in enumerate(pools):
+                entry = self.entries.get(self._key(host, port, kind))
+                if not entry or entry["ewma"] is None:
+                    tier, lat = 2, float("inf")
+                elif entry["failures"] >= config.POOL_STORE_MAX_FAILURES:
+                    tier, lat = 3, entry["ewma"]
+                elif now - entry["updated"] >= config.POOL_STORE_MAX_AGE_SEC:
+                    tier, lat = 1, entry["ewma"]
+                else:
+                    tier, lat = 0, entry["ewma"]
+                rows.append((tier, lat, order, host, port))
+        rows.sort()
+        return [(host, port, lat) for _, lat, _, host, port in rows]
+
+    def stale(self, pools: List[Pool], now: float = None, kind: str = "tcp") -> List[Pool]:
+        return [p for p in pools if not self.is_fresh(p[0], p[1], now, kind)]
+
+    def refresh_async(self, pools: List[Pool], probe: ProbeFn = None) -> Optional[threading.Thread]:
+        """Re-probe `pools` on a daemon thread; at most one refresh runs at a time."""
+        with self._lock:
+            if self._refreshing or not pools:
+                return None
+            self._refreshing = True
+
+        def run():
+            try:
+                # No early exit: the point is to refresh every stale entry
+                asyncio.run(pick_best_pool(pools, probe=probe, store=self, early_exit=False))
+            except Exception as e:
+                print(f"Pool latency refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        return t
+
+
+_store = None
+
+
+def get_latency_store() -> PoolLatencyStore:
+    global _store
+    if _store is None:
+        _store = PoolLatencyStore()
+    return _store
+
+
+def _configured_probe(wallet: str = None) -> Optional[ProbeFn]:
+    """The probe PROBE_MODE asks for (None = TCP connect)."""
+    return make_stratum_probe(wallet) if config.PROBE_MODE == "stratum" and wallet else None
+
+
+def pick_best_pool_sync(pools: List[Tuple[str, int]] = None, use_store: bool = True,
+                        wallet: str = None) -> Tuple[str, int, float]:
+    """
+    Blocking pool selection. With `use_store`, answers instantly from fresh
+    PoolLatencyStore data and re-probes stale endpoints in the background;
+    only a cold or fully stale store costs a blocking probe.
+    With PROBE_MODE == "stratum" and a `wallet`, pools are ranked by
+    time-to-first-job instead of TCP connect time.
+    """
+    pools = list(pools or config.POOLS)
+    probe = _configured_probe(wallet)
+    kind = probe_kind(probe)
+    store = get_latency_store() if use_store else None
+    if store is not None:
+        cached = store.best(pools, kind=kind)
+        if cached is not None:
+            store.refresh_async(store.stale(pools, kind=kind), probe=probe)
+            return cached
+
     try:
         loop = asyncio.get_event_loop()
         if loop.is_running():
@@ -49,5 +417,30 @@ def pick_best_pool_sync(pools: List[Tuple[str, int]] = None) -> Tuple[str, int,
         # No event loop in current thread, create one
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(pick_best_pool(pools))
+
+    return loop.run_until_complete(pick_best_pool(pools, probe=probe, store=store))
+
+
+def rank_pools_sync(pools: List[Tuple[str, int]] = None, wallet: str = None,
+                    limit: int = None) -> List[Tuple[str, int, float]]:
+    """
+    Latency-ranked pool list for XMRig's in-process failover: the
+    pick_best_pool_sync winner first, then the rest of the store's ranking,
+    at most `limit` entries (POOL_FAILOVER_MAX by default).
+    """
+    pools = list(pools or config.POOLS)
+    limit = config.POOL_FAILOVER_MAX if limit is None else limit
+    best = pick_best_pool_sync(pools, wallet=wallet)
+    kind = probe_kind(_configured_probe(wallet))
+    rest = [r for r in get_latency_store().ranked(pools, kind=kind) if (r[0], r[1]) != (best[0], best[1])]
+    return [best] + rest[:max(0, limit - 1)]
+
+
+def report_pool_failure(host: str, port: int, wallet: str = None):
+    """
+    Record that XMRig lost (host, port) so the next rank_pools_sync() does
+    not answer with it from a still-fresh store entry.
+    """
+    store = get_latency_store()
+    store.mark_failed(host, port, kind=probe_kind(_configured_probe(wallet)))
+    store.save()
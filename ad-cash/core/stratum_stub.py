@@ -0,0 +1,84 @@
+"""
+Local stub stratum pool for deterministic probe tests.
+Answers a `login` with a job after a configurable delay, or rejects it.
+
+    python -m core.stratum_stub --port 3333 --job-delay 0.05
+"""
+import argparse
+import asyncio
+import json
+from typing import Optional
+
+
+class StubStratumPool:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, job_delay: float = 0.0,
+                 reject_login: bool = False, silent: bool = False):
+        self.host = host
+        self.requested_port = port
+        self.job_delay = job_delay
+        self.reject_login = reject_login
+        self.silent = silent  # accept TCP but never answer (hung pool)
+        self.logins = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                if request.get("method") != "login":
+                    continue
+                self.logins += 1
+                if self.silent:
+                    continue
+                await asyncio.sleep(self.job_delay)
+                if self.reject_login:
+                    reply = {"id": request.get("id"), "jsonrpc": "2.0",
+                             "error": {"code": -1, "message": "Invalid payment address provided"}}
+                else:
+                    reply = {"id": request.get("id"), "jsonrpc": "2.0", "error": None, "result": {
+                        "id": "stub-session",
+                        "job": {"blob": "00" * 76, "job_id": "1", "target": "b88d0600",
+                                "algo": "rx/0", "height": 3000000, "seed_hash": "00" * 32},
+                        "status": "OK",
+                    }}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            # Cancellation happens when the owning event loop shuts down
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> "StubStratumPool":
+        self._server = await asyncio.start_server(self._handle, self.host, self.requested_port)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=3333)
+    parser.add_argument("--job-delay", type=float, default=0.0)
+    parser.add_argument("--reject", action="store_true")
+    args = parser.parse_args()
+
+    async def serve():
+        pool = await StubStratumPool(port=args.port, job_delay=args.job_delay,
+                                     reject_login=args.reject).start()
+        print(f"Stub stratum pool on 127.0.0.1:{pool.port}")
+        await pool._server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,194 @@
+"""
+Graduated thermal governor.
+
+Instead of killing XMRig when the CPU gets hot (losing the RandomX dataset
+and all hashing until a restart), the governor predicts the temperature a
+little ahead from its recent trend and steps the thread cap, then the duty
+cycle, down or up one notch at a time to hold just under the thermal limit.
+Thread changes go through the live /1/config API and duty cycling through
+pause/resume, so the miner never restarts.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from . import config
+
+
+@dataclass
+class GovernorDecision:
+    max_threads: int  # cap for the tuner's thread count
+    duty: float  # fraction of each duty period spent hashing (0 = paused)
+    predicted_temp: Optional[float] = None
+    reason: str = ""
+
+
+def battery_low(state: dict, battery_min: int = None) -> bool:
+    """True if a PlatformMonitor state is on battery at or below the minimum."""
+    battery_min = config.DEFAULT_BATTERY_MIN if battery_min is None else battery_min
+    level = state.get('battery_level')
+    return level is not None and level <= battery_min and not state.get('is_charging')
+
+
+class ThermalGovernor:
+    """
+    Holds the CPU under `limit` by adjusting a thread cap and a duty cycle.
+
+    Each update() fits a line through the last `window_sec` of readings and
+    extrapolates `horizon_sec` ahead. If the prediction crosses limit - margin
+    it steps down (threads first, then duty); once the prediction is at least
+    `hysteresis` below that it steps back up (duty first, then threads).
+    Steps are at least `hold_sec` apart so each one can take effect, except
+    when the limit itself is reached.
+    """
+
+    def __init__(self, max_threads: int, limit: float = None, margin: float = None,
+                 hysteresis: float = None, horizon_sec: float = None, window_sec: float = None,
+                 hold_sec: float = None):
+        self.max_threads = max(1, max_threads)
+        self.limit = config.DEFAULT_THERMAL_C if limit is None else limit
+        self.margin = config.GOVERNOR_MARGIN_C if margin is None else margin
+        self.hysteresis = config.GOVERNOR_HYSTERESIS_C if hysteresis is None else hysteresis
+        self.horizon_sec = config.GOVERNOR_HORIZON_SEC if horizon_sec is None else horizon_sec
+        self.window_sec = config.GOVERNOR_WINDOW_SEC if window_sec is None else window_sec
+        self.hold_sec = config.GOVERNOR_HOLD_SEC if hold_sec is None else hold_sec
+        self.cap = self.max_threads
+        self.duty = 1.0
+        self.battery_paused = False
+        self._temps = deque()  # (t, temp)
+        self._changed_at = float('-inf')
+        self.decision = GovernorDecision(self.cap, self.duty)
+
+    def trend(self) -> float:
+        """Least-squares slope of recent temperatures in degrees C per second."""
+        if len(self._temps) < 3 or self._temps[-1][0] - self._temps[0][0] < 5.0:
+            return 0.0
+        n = len(self._temps)
+        mean_t = sum(t for t, _ in self._temps) / n
+        mean_y = sum(y for _, y in self._temps) / n
+        var = sum((t - mean_t) ** 2 for t, _ in self._temps)
+        if var == 0:
+            return 0.0
+        return sum((t - mean_t) * (y - mean_y) for t, y in self._temps) / var
+
+    def _step_down(self, threads: int, hard: bool):
+        running = min(self.cap, max(1, threads))
+        if running > 1:
+            self.cap = running - 1
+        elif self.duty > config.GOVERNOR_MIN_DUTY:
+            self.duty = max(config.GOVERNOR_MIN_DUTY, self.duty - config.GOVERNOR_DUTY_STEP)
+        elif hard:
+            self.duty = 0.0  # one thread at minimum duty and still at the limit
+
+    def _step_up(self):
+        if self.duty < 1.0:
+            self.duty = min(1.0, max(config.GOVERNOR_MIN_DUTY, self.duty + config.GOVERNOR_DUTY_STEP))
+        elif self.cap < self.max_threads:
+            self.cap += 1
+
+    def update(self, temp: Optional[float], threads: int, now: float = None,
+               battery_low: bool = False) -> GovernorDecision:
+        """Feed one reading taken while `threads` were hashing; returns the new cap/duty."""
+        now = time.monotonic() if now is None else now
+        if battery_low:
+            self.battery_paused = True
+            self.decision = GovernorDecision(self.cap, 0.0, None, "battery")
+            return self.decision
+        self.battery_paused = False
+        if temp is None:
+            self.decision = GovernorDecision(self.cap, self.duty, None, "no sensor")
+            return self.decision
+
+        self._temps.append((now, temp))
+        while self._temps and now - self._temps[0][0] > self.window_sec:
+            self._temps.popleft()
+        slope = self.trend()
+        predicted = temp + slope * self.horizon_sec
+        setpoint = self.limit - self.margin
+        held = now - self._changed_at < self.hold_sec
+        before = (self.cap, self.duty)
+
+        reason = "steady"
+        if temp >= self.limit:
+            self._step_down(threads, hard=True)
+            reason = "over limit"
+        elif predicted >= setpoint and not held:
+            self._step_down(threads, hard=False)
+            reason = "rising" if slope > 0 else "near limit"
+        elif predicted < setpoint - self.hysteresis and slope <= 0.01 and not held:
+            self._step_up()
+            reason = "headroom"
+        if (self.cap, self.duty) != before:
+            self._changed_at = now
+        self.decision = GovernorDecision(self.cap, self.duty, predicted, reason)
+        return self.decision
+
+
+class DutyCycler:
+    """
+    Background thread that realizes a duty cycle by pausing and resuming the
+    miner through its HTTP API (RandomX dataset and connection are kept).
+    """
+
+    def __init__(self, client, period_sec: float = None):
+        self.client = client
+        self.period_sec = config.GOVERNOR_DUTY_PERIOD_SEC if period_sec is None else period_sec
+        self.duty = 1.0
+        self.paused = False
+        self.errors = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_duty(self, duty: float):
+        duty = min(1.0, max(0.0, duty))
+        if duty != self.duty:
+            self.duty = duty
+            self._wake.set()
+            if self._thread is None and duty < 1.0:
+                self.start()
+
+    def _set_paused(self, paused: bool):
+        if paused == self.paused:
+            return
+        try:
+            self.client.pause() if paused else self.client.resume()
+            self.paused = paused
+        except Exception:
+            self.errors += 1
+
+    def _sleep(self, seconds: float) -> bool:
+        """Wait up to `seconds`; True if woken early by a duty change or stop."""
+        woke = self._wake.wait(seconds)
+        self._wake.clear()
+        return woke
+
+    def _run(self):
+        while not self._stop.is_set():
+            duty = self.duty
+            if duty >= 1.0 or duty <= 0.0:
+                self._set_paused(duty <= 0.0)
+                self._sleep(self.period_sec)
+                continue
+            self._set_paused(False)
+            if self._sleep(duty * self.period_sec):
+                continue
+            self._set_paused(True)
+            self._sleep((1.0 - duty) * self.period_sec)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._set_paused(False)  # never leave a running miner paused
@@ -0,0 +1,146 @@
+"""
+Compact telemetry traces for offline tuner evaluation.
+
+A trace is a JSON-lines file: a header line ({"v", "start", "cpus", ...})
+followed by one short-keyed row per monitor tick with sensors, the running
+configuration, hashrate and share counters. core.tuner_replay replays them.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from . import config
+
+TRACE_VERSION = 1
+
+
+@dataclass
+class TraceRow:
+    t: float  # seconds since trace start
+    threads: int
+    randomx_mode: str
+    priority: int
+    cpu_temp: Optional[float]
+    cpu_busy: float
+    throttled: bool
+    battery_level: Optional[int]
+    latency_ms: float
+    hashrate: float
+    accepts: int
+    rejects: int
+
+
+# TraceRow field -> on-disk key
+_KEYS = (
+    ('t', 't'), ('threads', 'n'), ('randomx_mode', 'm'), ('priority', 'p'),
+    ('cpu_temp', 'c'), ('cpu_busy', 'u'), ('throttled', 'x'), ('battery_level', 'b'),
+    ('latency_ms', 'l'), ('hashrate', 'h'), ('accepts', 'a'), ('rejects', 'r'),
+)
+
+
+def _round(value, digits: int):
+    return None if value is None else round(float(value), digits)
+
+
+def row_to_dict(row: TraceRow) -> dict:
+    d = {
+        't': round(row.t, 2), 'n': row.threads, 'm': row.randomx_mode, 'p': row.priority,
+        'c': _round(row.cpu_temp, 1), 'u': round(row.cpu_busy, 3), 'x': int(bool(row.throttled)),
+        'b': row.battery_level, 'l': round(row.latency_ms, 1), 'h': round(row.hashrate, 2),
+        'a': row.accepts, 'r': row.rejects,
+    }
+    return {k: v for k, v in d.items() if v is not None}
+
+
+def row_from_dict(d: dict) -> TraceRow:
+    values = {field: d.get(key) for field, key in _KEYS}
+    values['randomx_mode'] = values['randomx_mode'] or "auto"
+    values['priority'] = 5 if values['priority'] is None else values['priority']
+    values['throttled'] = bool(values['throttled'])
+    for field in ('cpu_busy', 'latency_ms', 'hashrate'):
+        values[field] = float(values[field] or 0.0)
+    for field in ('accepts', 'rejects'):
+        values[field] = int(values[field] or 0)
+    return TraceRow(**values)
+
+
+class TraceRecorder:
+    """
+    Appends rows to a trace file. Writes are buffered and flushed every
+    `flush_every` rows (and on close) so recording costs no I/O per tick.
+    """
+
+    def __init__(self, path: str, flush_every: int = 30, **header):
+        self.path = os.path.expanduser(path)
+        self.flush_every = flush_every
+        self.start = time.time()
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        header = dict(v=TRACE_VERSION, start=round(self.start, 3), cpus=os.cpu_count() or 1, **header)
+        with open(self.path, 'w') as f:
+            f.write(json.dumps(header, separators=(',', ':')) + "\n")
+
+    def record(self, telemetry, tuner_config, now: float = None):
+        """Add one tick from an ai_autotune.Telemetry and the TunerConfig it ran under."""
+        now = time.time() if now is None else now
+        row = TraceRow(
+            t=now - self.start,
+            threads=tuner_config.threads,
+            randomx_mode=tuner_config.randomx_mode,
+            priority=tuner_config.priority,
+            cpu_temp=telemetry.cpu_temp,
+            cpu_busy=telemetry.cpu_busy,
+            throttled=telemetry.throttled,
+            battery_level=telemetry.battery_level,
+            latency_ms=telemetry.latency_ms,
+            hashrate=telemetry.hash_rate,
+            accepts=telemetry.accepts,
+            rejects=telemetry.rejects,
+        )
+        line = json.dumps(row_to_dict(row), separators=(',', ':'))
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_every:
+                self._flush_unlocked()
+
+    def _flush_unlocked(self):
+        if not self._buffer:
+            return
+        with open(self.path, 'a') as f:
+            f.write("\n".join(self._buffer) + "\n")
+        self._buffer = []
+
+    def close(self):
+        with self._lock:
+            self._flush_unlocked()
+
+
+def new_recorder(**header) -> Optional[TraceRecorder]:
+    """Recorder writing to config.TRACE_DIR, or None when tracing is disabled."""
+    if not config.TRACE_ENABLED:
+        return None
+    name = time.strftime("trace-%Y%m%d-%H%M%S.jsonl")
+    return TraceRecorder(os.path.join(os.path.expanduser(config.TRACE_DIR), name), **header)
+
+
+def load_trace(path: str) -> Tuple[dict, List[TraceRow]]:
+    """Read a trace file; returns (header, rows). Truncated last lines are skipped."""
+    header, rows = {}, []
+    with open(os.path.expanduser(path)) as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                d = json.loads(line)
+            except ValueError:
+                continue
+            if i == 0 and 'v' in d:
+                header = d
+            else:
+                rows.append(row_from_dict(d))
+    return header, rows
@@ -0,0 +1,250 @@
+"""
+Offline replay of telemetry traces through tuner strategies.
+
+DeviceModel learns from a trace how hashrate and temperature respond to the
+configuration (steady-state hashrate per thread count and RandomX mode, a
+linear temperature-per-thread fit). replay() then drives a strategy through
+the trace's timeline: the recorded ambient conditions (battery, latency,
+background load, temperature drift) are kept, while hashrate and temperature
+are re-simulated for whatever the strategy chose, with first-order thermal
+lag, throttling above the limit and a restart penalty on every change.
+Strategies are scored by average hashrate and time spent over the limit.
+"""
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import config
+from .ai_autotune import Telemetry, TunerConfig, TunerStrategy
+from .trace import TraceRow
+
+DEFAULT_TEMP_PER_THREAD_C = 4.0  # used when a trace only ever ran one thread count
+THERMAL_TAU_SEC = 45.0  # time constant of the first-order temperature response
+THROTTLE_FACTOR = 0.6  # hashrate kept while over the thermal limit
+RESTART_SEC = 3.0  # hashing lost when XMRig restarts its workers
+MODE_SWITCH_SEC = 20.0  # extra loss when the RandomX dataset/cache is rebuilt
+EXTRAPOLATE_GAIN = 0.5  # marginal gain of threads beyond the largest recorded count
+
+
+@dataclass
+class ReplayResult:
+    strategy: str
+    avg_hashrate: float
+    violation_sec: float
+    violations: int  # ticks at or over the thermal limit
+    reconfigs: int
+    duration_sec: float
+    final: Optional[TunerConfig] = None
+    configs: Dict[TunerConfig, float] = field(default_factory=dict)  # seconds per config
+
+
+class DeviceModel:
+    """Response of one device to thread count / RandomX mode, fitted from a trace."""
+
+    def __init__(self, rows: Sequence[TraceRow], warmup_sec: float = None):
+        warmup_sec = config.TUNER_WARMUP_SEC if warmup_sec is None else warmup_sec
+        steady = []
+        changed_at, last = None, None
+        for row in rows:
+            key = (row.threads, row.randomx_mode)
+            if key != last:
+                changed_at, last = row.t, key
+            elif row.t - changed_at >= warmup_sec and not row.throttled:
+                steady.append(row)
+        if not steady:
+            steady = [r for r in rows if not r.throttled] or list(rows)
+
+        by_config: Dict[Tuple[int, str], List[float]] = {}
+        for row in steady:
+            by_config.setdefault((row.threads, row.randomx_mode), []).append(row.hashrate)
+        self.hashrate: Dict[Tuple[int, str], float] = {
+            k: sum(v) / len(v) for k, v in by_config.items()}
+        self.modes = sorted({mode for _, mode in self.hashrate})
+
+        # Mode factors relative to the most common mode, on shared thread counts
+        base = max(self.modes, key=lambda m: sum(len(v) for (t, mm), v in by_config.items() if mm == m))
+        self.base_mode = base
+        self.mode_factor = {base: 1.0}
+        for mode in self.modes:
+            shared = [t for t, m in self.hashrate if m == mode and (t, base) in self.hashrate]
+            if mode != base and shared:
+                self.mode_factor[mode] = (sum(self.hashrate[(t, mode)] for t in shared)
+                                          / max(1e-9, sum(self.hashrate[(t, base)] for t in shared)))
+
+        temps = [(r.threads, r.cpu_temp) for r in steady if r.cpu_temp is not None]
+        self.temp_base, self.temp_per_thread = _fit_line(temps)
+
+    def curve(self, mode: str) -> List[Tuple[int, float]]:
+        points = sorted((t, h) for (t, m), h in self.hashrate.items() if m == mode)
+        if points:
+            return points
+        factor = self.mode_factor.get(mode, 1.0)
+        return sorted((t, h * factor) for (t, m), h in self.hashrate.items() if m == self.base_mode)
+
+    def steady_hashrate(self, threads: int, mode: str) -> float:
+        points = [(0, 0.0)] + self.curve(mode)
+        for (t0, h0), (t1, h1) in zip(points, points[1:]):
+            if t0 <= threads <= t1:
+                return h0 + (h1 - h0) * (threads - t0) / max(1, t1 - t0)
+        t_max, h_max = points[-1]
+        per_thread = h_max / max(1, t_max)
+        return h_max + EXTRAPOLATE_GAIN * per_thread * (threads - t_max)
+
+    def steady_temp(self, threads: int) -> Optional[float]:
+        if self.temp_base is None:
+            return None
+        return self.temp_base + self.temp_per_thread * threads
+
+
+def _fit_line(points: List[Tuple[int, float]]) -> Tuple[Optional[float], float]:
+    if not points:
+        return None, DEFAULT_TEMP_PER_THREAD_C
+    n = len(points)
+    mean_x = sum(p[0] for p in points) / n
+    mean_y = sum(p[1] for p in points) / n
+    var_x = sum((p[0] - mean_x) ** 2 for p in points)
+    if var_x == 0:
+        return mean_y - DEFAULT_TEMP_PER_THREAD_C * mean_x, DEFAULT_TEMP_PER_THREAD_C
+    slope = sum((p[0] - mean_x) * (p[1] - mean_y) for p in points) / var_x
+    return mean_y - slope * mean_x, slope
+
+
+class RecordedStrategy(TunerStrategy):
+    """Baseline that re-applies whatever configuration the trace recorded."""
+
+    name = "recorded"
+
+    def __init__(self, rows: Sequence[TraceRow]):
+        self.rows = rows
+        self.index = 0
+
+    def suggest(self, telemetry, current, max_threads, now=None):
+        while self.index + 1 < len(self.rows) and self.rows[self.index + 1].t <= now:
+            self.index += 1
+        row = self.rows[self.index]
+        return TunerConfig(row.threads, row.randomx_mode, row.priority)
+
+
+def replay(rows: Sequence[TraceRow], strategy: TunerStrategy, max_threads: int,
+           model: DeviceModel = None, retune_interval: float = None,
+           thermal_limit: float = None) -> ReplayResult:
+    """Drive `strategy` through the trace timeline and score the simulated run."""
+    retune_interval = config.RETUNE_INTERVAL_SEC if retune_interval is None else retune_interval
+    thermal_limit = config.DEFAULT_THERMAL_C if thermal_limit is None else thermal_limit
+    model = model or DeviceModel(rows)
+    result = ReplayResult(strategy=strategy.name, avg_hashrate=0.0, violation_sec=0.0,
+                          violations=0, reconfigs=0, duration_sec=0.0)
+    if not rows:
+        return result
+
+    first = rows[0]
+    current = TunerConfig(min(first.threads, max_threads), first.randomx_mode, first.priority)
+    temp = first.cpu_temp
+    load_factor = 1.0
+    lost_sec = 0.0  # restart penalty still to be paid
+    hashes = 0.0
+    last_retune = first.t
+    prev_t = first.t
+
+    for row in rows:
+        dt = max(0.0, row.t - prev_t)
+        prev_t = row.t
+
+        # Ambient drift: how far the recorded temperature sits from the model
+        expected = model.steady_temp(row.threads)
+        drift = (row.cpu_temp - expected) if (row.cpu_temp is not None and expected is not None) else 0.0
+        target = model.steady_temp(current.threads)
+        if target is not None:
+            target += drift
+            temp = target if temp is None else temp + (target - temp) * (1 - math.exp(-dt / THERMAL_TAU_SEC))
+
+        # Background load: recorded hashrate relative to the model, on clean ticks
+        recorded_model = model.steady_hashrate(row.threads, row.randomx_mode)
+        if not row.throttled and recorded_model > 0 and row.hashrate > 0:
+            load_factor = min(1.5, row.hashrate / recorded_model)
+
+        hot = temp is not None and temp >= thermal_limit
+        hashrate = model.steady_hashrate(current.threads, current.randomx_mode) * load_factor
+        if hot:
+            hashrate *= THROTTLE_FACTOR
+            result.violations += 1
+            result.violation_sec += dt
+        paid = min(lost_sec, dt)
+        lost_sec -= paid
+        hashes += hashrate * (dt - paid)
+        result.configs[current] = result.configs.get(current, 0.0) + dt
+
+        telemetry = Telemetry(
+            hash_rate=hashrate if paid < dt else 0.0,
+            threads=current.threads,
+            cpu_temp=temp,
+            rejects=row.rejects,
+            accepts=row.accepts,
+            latency_ms=row.latency_ms,
+            throttled=hot,
+            cpu_busy=row.cpu_busy,
+            battery_level=row.battery_level,
+        )
+        strategy.observe(telemetry, current, now=row.t)
+
+        if row.t - last_retune >= retune_interval:
+            last_retune = row.t
+            suggested = strategy.suggest(telemetry, current, max_threads, now=row.t)
+            suggested = TunerConfig(max(1, min(suggested.threads, max_threads)),
+                                    suggested.randomx_mode, suggested.priority)
+            if suggested != current:
+                lost_sec += RESTART_SEC
+                if suggested.randomx_mode != current.randomx_mode:
+                    lost_sec += MODE_SWITCH_SEC
+                current = suggested
+                result.reconfigs += 1
+
+    result.duration_sec = rows[-1].t - first.t
+    result.avg_hashrate = hashes / result.duration_sec if result.duration_sec > 0 else 0.0
+    result.final = current
+    return result
+
+
+def synthetic_trace(duration_sec: float = 6 * 3600, tick_sec: float = 5.0, cpus: int = 8,
+                    per_thread: float = 120.0, knee: int = 6, ambient_c: float = 45.0,
+                    temp_per_thread: float = 6.0, seed: int = 1) -> List[TraceRow]:
+    """
+    Ground-truth device for demos and benchmarks when no recorded trace is at
+    hand: hashrate saturates past `knee` threads (shared cache), temperature
+    rises with threads and a slow ambient swing, and the recorded run walks
+    through thread counts and both RandomX modes.
+    """
+    rng = random.Random(seed)
+    rows = []
+    temp = ambient_c
+    accepts = rejects = 0
+    schedule = [(t, m) for m in ("fast", "light") for t in range(1, cpus + 1)]
+    segment = duration_sec / len(schedule)
+    t = 0.0
+    while t < duration_sec:
+        threads, mode = schedule[min(len(schedule) - 1, int(t // segment))]
+        effective = min(threads, knee) + 0.2 * max(0, threads - knee)
+        rate = per_thread * effective * (1.0 if mode == "fast" else 0.45)
+        ambient = ambient_c + 4.0 * math.sin(2 * math.pi * t / (3 * 3600))
+        target = ambient + temp_per_thread * threads
+        temp += (target - temp) * (1 - math.exp(-tick_sec / THERMAL_TAU_SEC))
+        throttled = temp >= config.DEFAULT_THERMAL_C
+        if throttled:
+            rate *= THROTTLE_FACTOR
+        if rng.random() < rate * tick_sec / 2e5:
+            if rng.random() < 0.02:
+                rejects += 1
+            else:
+                accepts += 1
+        rows.append(TraceRow(
+            t=t, threads=threads, randomx_mode=mode, priority=5,
+            cpu_temp=round(temp + rng.gauss(0, 0.5), 1),
+            cpu_busy=min(1.0, threads / cpus + rng.uniform(0, 0.05)),
+            throttled=throttled, battery_level=None,
+            latency_ms=40.0 + rng.uniform(-5, 5),
+            hashrate=max(0.0, rate * rng.uniform(0.95, 1.05)),
+            accepts=accepts, rejects=rejects,
+        ))
+        t += tick_sec
+    return rows
@@ -1,12 +1,68 @@
+import json
+import os
+import re
+import signal
 import subprocess
+import threading
 import time
-from typing import Optional
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from . import config
-from .pool_selector import pick_best_pool_sync
+from .cpu_topology import AffinityPlanner, affinity_mask, thread_ceiling
+from .memory_planner import MemoryPlanner
+from .platform_sensors import PlatformMonitor
+from .pool_selector import rank_pools_sync, report_pool_failure
+from .thermal_governor import DutyCycler, ThermalGovernor, battery_low
+from .xmrig_api import XmrigApiClient, new_access_token
+from .xmrig_config import PoolEndpoint, XmrigProfile, retune_config, write_config
 
 
-def build_xmrig_cmd(binary_path: str, wallet: str, pool_host: str, pool_port: int, threads: int) -> list:
+def _pool_order(pool_host: str, pool_port: int,
+                failover: Sequence[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """Primary pool first, then the failover pools in order, without duplicates."""
+    order = [(pool_host, pool_port)]
+    for pool in failover:
+        if tuple(pool[:2]) not in order:
+            order.append(tuple(pool[:2]))
+    return order
+
+
+def build_xmrig_profile(wallet: str, pool_host: str, pool_port: int, threads: int,
+                        http_api: bool = True, api_token: Optional[str] = None,
+                        affinity: Optional[Sequence[int]] = None, randomx_mode: str = "auto",
+                        failover: Sequence[Tuple[str, int]] = ()) -> XmrigProfile:
+    token = api_token or config.XMRIG_API_TOKEN
+    return XmrigProfile(
+        wallet=wallet,
+        pools=[PoolEndpoint(host, port) for host, port in _pool_order(pool_host, pool_port, failover)],
+        threads=threads,
+        affinity=list(affinity) if affinity else None,
+        randomx_mode=randomx_mode,
+        http_enabled=http_api,
+        http_token=token,
+        # Writable API (live reconfiguration) only ever behind a token
+        http_restricted=not (token and config.XMRIG_API_LIVE_CONFIG),
+    )
+
+
+def build_xmrig_cmd(binary_path: str, wallet: str, pool_host: str, pool_port: int, threads: int,
+                    http_api: bool = True, api_token: Optional[str] = None,
+                    affinity: Optional[Sequence[int]] = None, config_path: Optional[str] = None,
+                    randomx_mode: str = "auto", failover: Sequence[Tuple[str, int]] = ()) -> list:
+    """
+    XMRig argv. With XMRIG_CONFIG_FILE the settings go into a generated,
+    watched config.json (see core.xmrig_config) and the argv only points at
+    it; otherwise everything is passed as CLI flags. `failover` pools
+    (pool_selector.rank_pools_sync order) follow the primary, so XMRig
+    switches pools in-process instead of exiting.
+    """
+    if config.XMRIG_CONFIG_FILE:
+        profile = build_xmrig_profile(wallet, pool_host, pool_port, threads, http_api, api_token,
+                                      affinity, randomx_mode, failover)
+        return [binary_path, f"--config={write_config(profile, config_path)}"]
+
     cmd = [
         binary_path,
         "-o",
@@ -19,32 +75,289 @@ def build_xmrig_cmd(binary_path: str, wallet: str, pool_host: str, pool_port: in
         "-t",
         str(threads),
         "--cpu-priority=5",  # Maximum CPU priority
-        "--randomx-mode=auto",  # Auto-detect best RandomX mode
+        f"--randomx-mode={randomx_mode}",  # fast/light from core.memory_planner
         "--randomx-no-rdmsr",  # Skip MSR checks (since they fail anyway)
         "--cpu-max-threads-hint=100",  # Use all available threads
         "--donate-level=0",  # Remove developer donation to keep 100% hashing time
     ]
     
+    # Explicit placement (cpu_topology.AffinityPlanner); otherwise the OS decides
+    if affinity:
+        cmd.append(f"--cpu-affinity={affinity_mask(affinity)}")
+    
     # Only use TLS for specific ports that support it
-    if pool_port in [443, 10128, 10032]:
+    if pool_port in config.TLS_PORTS:
         cmd.append("--tls")
     
+    # Failover pools: pool options apply to the most recent -o
+    for host, port in _pool_order(pool_host, pool_port, failover)[1:]:
+        cmd += ["-o", f"{host}:{port}", "-u", wallet, "-p", "x", "-k"]
+        if port in config.TLS_PORTS:
+            cmd.append("--tls")
+    cmd += [f"--retries={config.POOL_RETRIES}", f"--retry-pause={config.POOL_RETRY_PAUSE_SEC}"]
+
+    # Local HTTP API for telemetry (see core.xmrig_api)
+    if http_api:
+        cmd += [
+            f"--http-host={config.XMRIG_API_HOST}",
+            f"--http-port={config.XMRIG_API_PORT}",
+        ]
+        token = api_token or config.XMRIG_API_TOKEN
+        if token:
+            cmd.append(f"--http-access-token={token}")
+            # Writable API (live reconfiguration) only ever behind a token
+            if config.XMRIG_API_LIVE_CONFIG:
+                cmd.append("--http-no-restricted")
+    
     return cmd
 
 
-def run_supervised(binary_path: str, wallet: str, threads: Optional[int] = None):
-    host, port, latency = pick_best_pool_sync()
+def _govern(proc: subprocess.Popen, client: XmrigApiClient, threads: int,
+            planner: Optional[AffinityPlanner] = None, memory: Optional[MemoryPlanner] = None,
+            mode: str = "auto") -> Optional[str]:
+    """
+    Hold the running miner under the thermal and memory limits until it
+    exits; returns "thermal" if it had to stop the miner itself.
+    """
+    stopped = None
+    monitor = PlatformMonitor()
+    governor = ThermalGovernor(threads)
+    cycler = DutyCycler(client)
+    try:
+        while proc.poll() is None:
+            state = monitor.get_state()
+            decision = governor.update(state['cpu_temp'], threads, battery_low=battery_low(state))
+            cycler.set_duty(decision.duty)
+            replan = False
+            if planner and planner.active:
+                try:
+                    replan = planner.observe(client.stats())
+                except Exception:
+                    pass
+            target = decision.max_threads
+            if planner and planner.active:
+                target = min(target, planner.max_threads)
+            if target != threads or replan:
+                try:
+                    client.reconfigure(threads=target,
+                                       affinity=planner.cpus_for(target) if planner else None)
+                    threads = target
+                except Exception:
+                    if retune_config(threads=target, affinity=planner.cpus_for(target) if planner else None):
+                        threads = target
+                    elif decision.reason == "over limit":
+                        # No live API: restart cooler rather than cook the device
+                        proc.terminate()
+                        stopped = "thermal"
+                        break
+            if memory and memory.check(mode):
+                # Drop the 2 GB dataset before the low-memory killer does
+                try:
+                    client.reconfigure(randomx_mode="light")
+                    mode = "light"
+                except Exception:
+                    if retune_config(randomx_mode="light"):
+                        mode = "light"
+            try:
+                proc.wait(timeout=config.GOVERNOR_TICK_SEC)
+            except subprocess.TimeoutExpired:
+                pass
+    finally:
+        cycler.stop()
+        client.close()
+        monitor.close()
+    proc.wait()
+    return stopped
+
+
+# Exit statuses that identify the failure on their own. POSIX signals show up
+# as negative return codes; Windows reports NTSTATUS values.
+_SIGNAL_CLASSES = {
+    -signal.SIGILL: "illegal_instruction",
+}
+# SIGKILL comes from the OOM / low-memory killer but also from kill -9 and
+# task killers; it only counts as "oom" with evidence (see classify_exit)
+_SIGKILL = -getattr(signal, 'SIGKILL', 9)
+_OOM_OUTPUT = re.compile(r"out of memory|bad_alloc|cannot allocate memory", re.I)
+_NTSTATUS_CLASSES = {
+    0xC000001D: "illegal_instruction",  # STATUS_ILLEGAL_INSTRUCTION
+    0xC0000017: "oom",  # STATUS_NO_MEMORY
+    0xC0000135: "bad_binary",  # STATUS_DLL_NOT_FOUND
+    0xC000007B: "bad_binary",  # STATUS_INVALID_IMAGE_FORMAT
+}
+# XMRig output patterns, checked against the tail in this order
+_OUTPUT_CLASSES = (
+    ("bad_binary", re.compile(r"binary not included|exec format error", re.I)),
+    ("illegal_instruction", re.compile(r"illegal instruction", re.I)),
+    ("oom", _OOM_OUTPUT),
+    ("config", re.compile(r"unknown option|unsupported option|no valid configuration|"
+                          r"parse error|invalid (?:address|wallet)", re.I)),
+    ("network", re.compile(r"connect error|dns error|read error|connection refused|timed out|"
+                           r"no active pools|network is unreachable|tls error", re.I)),
+)
+
+
+@dataclass(frozen=True)
+class RestartPolicy:
+    base_sec: float  # delay after the first failure, doubled per repeat
+    max_sec: float
+    give_up_after: Optional[int]  # consecutive failures; None = never give up
+
+
+RESTART_POLICIES: Dict[str, RestartPolicy] = {
+    "bad_binary": RestartPolicy(0, 0, 1),  # missing / not executable / wrong arch
+    "illegal_instruction": RestartPolicy(5, 5, 2),  # binary built for another CPU
+    "config": RestartPolicy(30, 300, 3),
+    "oom": RestartPolicy(15, 600, 6),  # relaunched in light mode
+    "network": RestartPolicy(5, 300, None),
+    "thermal": RestartPolicy(config.WATCHDOG_INTERVAL_SEC, config.WATCHDOG_INTERVAL_SEC, None),
+    "killed": RestartPolicy(5, 300, None),  # SIGKILL without signs of memory pressure
+    "exited": RestartPolicy(5, 60, None),  # clean exit we did not ask for
+    "crash": RestartPolicy(5, 600, 10),
+}
+
+
+def classify_exit(returncode: Optional[int], tail: Sequence[str] = (),
+                  launch_error: Optional[BaseException] = None,
+                  memory_pressure: bool = False) -> str:
+    """
+    Failure class of one XMRig run (keys of RESTART_POLICIES). A SIGKILL is
+    "oom" only if `memory_pressure` was seen or the output reports it, and
+    "killed" otherwise, so a manual kill never bans fast mode.
+    """
+    if launch_error is not None:
+        return "bad_binary" if isinstance(launch_error, OSError) else "crash"
+    if returncode == _SIGKILL:
+        return "oom" if memory_pressure or _OOM_OUTPUT.search("\n".join(tail)) else "killed"
+    if returncode is not None:
+        if returncode in _SIGNAL_CLASSES:
+            return _SIGNAL_CLASSES[returncode]
+        if returncode & 0xFFFFFFFF in _NTSTATUS_CLASSES:
+            return _NTSTATUS_CLASSES[returncode & 0xFFFFFFFF]
+    text = "\n".join(tail)
+    for name, pattern in _OUTPUT_CLASSES:
+        if pattern.search(text):
+            return name
+    return "exited" if returncode == 0 else "crash"
+
+
+def backoff_sec(policy: RestartPolicy, failures: int) -> float:
+    return min(policy.max_sec, policy.base_sec * 2 ** max(0, failures - 1))
+
+
+@dataclass
+class WatchdogMetrics:
+    launches: int = 0
+    restarts: int = 0
+    uptime_sec: float = 0.0  # total time XMRig was running
+    downtime_sec: float = 0.0  # exit to next launch, backoff included
+    last_exit_code: Optional[int] = None
+    last_failure: Optional[str] = None
+    failures: Dict[str, int] = field(default_factory=dict)  # total per class
+    gave_up: Optional[str] = None
+    tail: List[str] = field(default_factory=list)  # output before the last failure
+
+    def save(self, path: str = None):
+        """Atomic JSON snapshot for the UI / other processes."""
+        path = os.path.expanduser(path or config.WATCHDOG_METRICS_PATH)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(asdict(self), f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Watchdog metrics save failed: {e}")
+
+
+def _pump_output(proc: subprocess.Popen, tail: deque):
+    """Echo XMRig output and keep the last lines for classification."""
+    for line in proc.stdout:
+        line = line.rstrip()
+        print(line)
+        tail.append(line)
+
+
+def run_supervised(binary_path: str, wallet: str, threads: Optional[int] = None,
+                   metrics: Optional[WatchdogMetrics] = None) -> WatchdogMetrics:
+    """
+    Keep XMRig running. Each exit is classified (classify_exit) and
+    restarted per RESTART_POLICIES with exponential backoff; a run longer
+    than WATCHDOG_HEALTHY_SEC clears the failure streaks. Returns the
+    metrics once a class exceeds its give-up threshold.
+    """
+    metrics = metrics or WatchdogMetrics()
+    ranked = rank_pools_sync(wallet=wallet)
+    host, port, latency = ranked[0]
     t = threads
     if t is None:
-        t = max(1, int(config.THREAD_CAP_RATIO * subprocess.os.cpu_count()))
-    cmd = build_xmrig_cmd(binary_path, wallet, host, port, t)
+        t = max(1, int(config.THREAD_CAP_RATIO * thread_ceiling()))
+    planner = AffinityPlanner()
+    if planner.active:
+        t = min(t, planner.max_threads)
+    memory = MemoryPlanner()
+    api_token = new_access_token()
+    streaks: Dict[str, int] = {}
+    down_since = None
     while True:
+        plan = memory.plan(t)
+        print(plan.report())
+        cmd = build_xmrig_cmd(binary_path, wallet, host, port, t, api_token=api_token,
+                              affinity=planner.cpus_for(t), randomx_mode=plan.randomx_mode,
+                              failover=[r[:2] for r in ranked[1:]])
+        tail = deque(maxlen=config.WATCHDOG_TAIL_LINES)
+        returncode, launch_error, stopped = None, None, None
+        started = time.monotonic()
         try:
-            proc = subprocess.Popen(cmd)
-            proc.wait()
-        except Exception:
-            pass
-        time.sleep(config.WATCHDOG_INTERVAL_SEC)
-        # Recompute best pool in case topology changed
-        host, port, latency = pick_best_pool_sync()
-        cmd = build_xmrig_cmd(binary_path, wallet, host, port, t)
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    universal_newlines=True, errors='replace', bufsize=1)
+        except Exception as e:
+            launch_error = e
+        else:
+            metrics.launches += 1
+            if down_since is not None:
+                metrics.restarts += 1
+                metrics.downtime_sec += started - down_since
+            pump = threading.Thread(target=_pump_output, args=(proc, tail), daemon=True)
+            pump.start()
+            try:
+                stopped = _govern(proc, XmrigApiClient(token=api_token), t, planner, memory,
+                                  plan.randomx_mode)
+            except Exception as e:
+                print(f"Watchdog monitor error: {e}")
+                proc.wait()
+            pump.join(timeout=2)
+            returncode = proc.returncode
+        ended = time.monotonic()
+        down_since = ended
+        metrics.uptime_sec += ended - started if launch_error is None else 0.0
+        if launch_error is None and ended - started >= config.WATCHDOG_HEALTHY_SEC:
+            streaks.clear()
+
+        # Pressure now (PSI / MemAvailable) or a mid-run downgrade off fast mode
+        pressured = launch_error is None and (
+            memory.under_pressure() or (plan.randomx_mode == "fast" and not memory.fast_allowed))
+        failure = stopped or classify_exit(returncode, tail, launch_error, pressured)
+        streaks[failure] = streaks.get(failure, 0) + 1
+        metrics.last_exit_code = returncode
+        metrics.last_failure = failure
+        metrics.failures[failure] = metrics.failures.get(failure, 0) + 1
+        metrics.tail = list(tail)[-10:] or ([str(launch_error)] if launch_error else [])
+        policy = RESTART_POLICIES[failure]
+        print(f"XMRig stopped: {failure} (exit {returncode}, {streaks[failure]} in a row)")
+        if policy.give_up_after is not None and streaks[failure] >= policy.give_up_after:
+            metrics.gave_up = failure
+            metrics.save()
+            print(f"Watchdog giving up after {streaks[failure]} x {failure}")
+            return metrics
+        if failure == "oom":
+            memory.fast_banned = True
+        elif failure == "network":
+            # The store may still rate the dead primary best; push it back
+            report_pool_failure(host, port, wallet)
+        metrics.save()
+        time.sleep(backoff_sec(policy, streaks[failure]))
+        # XMRig already failed over in-process; only refresh the ranking
+        # for the next launch (answered from the latency store when fresh)
+        ranked = rank_pools_sync(wallet=wallet)
+        host, port, latency = ranked[0]
@@ -0,0 +1,268 @@
+"""
+Telemetry client for the XMRig local HTTP API.
+Polls /2/summary and /2/backends over a single keep-alive connection
+instead of scraping console output.
+"""
+import http.client
+import json
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from . import config
+
+
+@dataclass
+class XmrigStats:
+    hashrate_10s: float = 0.0
+    hashrate_60s: float = 0.0
+    hashrate_15m: float = 0.0
+    hashrate_highest: float = 0.0
+    thread_hashrates: List[float] = field(default_factory=list)  # 10s average per thread
+    thread_affinity: List[int] = field(default_factory=list)  # CPU per thread (-1 = unpinned)
+    shares_good: int = 0
+    shares_total: int = 0
+    pool: str = ""
+    pool_ping_ms: float = 0.0
+    uptime_sec: int = 0
+    paused: bool = False
+    timestamp: float = 0.0
+
+    @property
+    def shares_rejected(self) -> int:
+        return max(0, self.shares_total - self.shares_good)
+
+    @property
+    def hashrate(self) -> float:
+        """Best available short-window hashrate (10s, falling back to 60s/15m)."""
+        return self.hashrate_10s or self.hashrate_60s or self.hashrate_15m
+
+
+def new_access_token() -> str:
+    """Per-session token for --http-access-token."""
+    return secrets.token_hex(16)
+
+
+def apply_cpu_settings(cfg: dict, threads: Optional[int] = None, priority: Optional[int] = None,
+                       affinity: Optional[Sequence[int]] = None,
+                       randomx_mode: Optional[str] = None) -> dict:
+    """
+    Rewrite the "cpu" (and "randomx" mode) sections of an XMRig config in place.
+    `affinity` lists one CPU index per thread (-1 = let the OS place it) and
+    overrides `threads`; the RandomX profile and any "*" wildcard are both set
+    so the new thread list wins whichever one XMRig resolves.
+    """
+    cpu = cfg.setdefault('cpu', {})
+    if affinity is not None:
+        thread_list = [int(a) for a in affinity]
+    elif threads is not None:
+        thread_list = [-1] * max(1, int(threads))
+    else:
+        thread_list = None
+    if thread_list is not None:
+        cpu['rx'] = thread_list
+        if '*' in cpu:
+            cpu['*'] = thread_list
+        cpu['max-threads-hint'] = 100
+    if priority is not None:
+        cpu['priority'] = int(priority)
+    if randomx_mode is not None:
+        cfg.setdefault('randomx', {})['mode'] = randomx_mode
+    return cfg
+
+
+def _rate(values, index: int) -> float:
+    """XMRig reports [10s, 60s, 15m]; entries are null until the window fills."""
+    try:
+        value = values[index]
+    except (IndexError, TypeError):
+        return 0.0
+    return float(value) if value is not None else 0.0
+
+
+def parse_stats(summary: dict, backends: Optional[list] = None) -> XmrigStats:
+    """Build XmrigStats from decoded /2/summary and /2/backends payloads."""
+    hashrate = summary.get('hashrate') or {}
+    total = hashrate.get('total') or []
+    results = summary.get('results') or {}
+    connection = summary.get('connection') or {}
+
+    threads, affinity = [], []
+    for backend in backends or []:
+        if backend.get('type') != 'cpu' or not backend.get('enabled', True):
+            continue
+        for thread in backend.get('threads') or []:
+            threads.append(_rate(thread.get('hashrate'), 0))
+            cpu = thread.get('affinity')
+            affinity.append(int(cpu) if cpu is not None else -1)
+
+    return XmrigStats(
+        hashrate_10s=_rate(total, 0),
+        hashrate_60s=_rate(total, 1),
+        hashrate_15m=_rate(total, 2),
+        hashrate_highest=float(hashrate.get('highest') or 0.0),
+        thread_hashrates=threads,
+        thread_affinity=affinity,
+        shares_good=int(results.get('shares_good') or 0),
+        shares_total=int(results.get('shares_total') or 0),
+        pool=connection.get('pool') or "",
+        pool_ping_ms=float(connection.get('ping') or 0.0),
+        uptime_sec=int(summary.get('uptime') or 0),
+        paused=bool(summary.get('paused', False)),
+        timestamp=time.time(),
+    )
+
+
+class XmrigApiClient:
+    """Minimal JSON client reusing one HTTP/1.1 connection to the miner."""
+
+    def __init__(self, host: str = None, port: int = None, token: str = None,
+                 timeout: float = None):
+        self.host = host or config.XMRIG_API_HOST
+        self.port = port or config.XMRIG_API_PORT
+        self.token = token if token is not None else config.XMRIG_API_TOKEN
+        self.timeout = timeout or config.XMRIG_API_TIMEOUT_SEC
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+
+    def _headers(self) -> dict:
+        headers = {'Accept': 'application/json', 'Connection': 'keep-alive'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        return headers
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None):
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = self._headers()
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+        with self._lock:
+            # One retry: XMRig may have closed an idle keep-alive socket.
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    self._conn.request(method, path, body=payload, headers=headers)
+                    response = self._conn.getresponse()
+                    data = response.read()
+                    if response.status >= 400:
+                        raise http.client.HTTPException(f"{method} {path}: HTTP {response.status}")
+                    return json.loads(data) if data else None
+                except (http.client.HTTPException, OSError, ValueError):
+                    self.close_unlocked()
+                    if attempt:
+                        raise
+
+    def get(self, path: str):
+        return self._request('GET', path)
+
+    def put(self, path: str, body: dict):
+        return self._request('PUT', path, body)
+
+    def get_config(self) -> dict:
+        return self.get('/1/config')
+
+    def put_config(self, cfg: dict):
+        return self.put('/1/config', cfg)
+
+    def reconfigure(self, threads: Optional[int] = None, priority: Optional[int] = None,
+                    affinity: Optional[Sequence[int]] = None,
+                    randomx_mode: Optional[str] = None) -> dict:
+        """
+        Apply thread count / priority / affinity / RandomX mode to the running miner.
+        XMRig restarts its CPU workers but keeps the RandomX dataset, so this
+        costs a few seconds of hashing instead of a full relaunch (a mode
+        change rebuilds the dataset or cache once).
+        Requires a token and --http-no-restricted (see build_xmrig_cmd).
+        """
+        cfg = apply_cpu_settings(self.get_config(), threads, priority, affinity, randomx_mode)
+        self.put_config(cfg)
+        return cfg
+
+    def rpc(self, method: str, params: Optional[dict] = None):
+        """JSON-RPC call on /json_rpc (pause, resume, ...); needs the same access as /1/config."""
+        body = {'jsonrpc': '2.0', 'id': 1, 'method': method}
+        if params is not None:
+            body['params'] = params
+        return self._request('POST', '/json_rpc', body)
+
+    def pause(self):
+        """Stop hashing without dropping the RandomX dataset or the pool connection."""
+        return self.rpc('pause')
+
+    def resume(self):
+        return self.rpc('resume')
+
+    def summary(self) -> dict:
+        return self.get('/2/summary')
+
+    def backends(self) -> list:
+        return self.get('/2/backends')
+
+    def stats(self) -> XmrigStats:
+        return parse_stats(self.summary(), self.backends())
+
+    def close_unlocked(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def close(self):
+        with self._lock:
+            self.close_unlocked()
+
+
+class TelemetryPoller:
+    """
+    Background thread keeping the latest XmrigStats.
+    Readers call latest() which never blocks on the network.
+    """
+
+    def __init__(self, client: XmrigApiClient = None, interval: float = None):
+        self.client = client or XmrigApiClient()
+        self.interval = interval or config.XMRIG_API_POLL_SEC
+        self._latest: Optional[XmrigStats] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.errors = 0
+
+    def poll_once(self) -> Optional[XmrigStats]:
+        try:
+            stats = self.client.stats()
+        except Exception:
+            self.errors += 1
+            return None
+        self._latest = stats
+        return stats
+
+    def latest(self, max_age: float = None) -> Optional[XmrigStats]:
+        """Last stats snapshot, or None if never polled or older than max_age."""
+        stats = self._latest
+        if stats is None:
+            return None
+        if max_age is not None and time.time() - stats.timestamp > max_age:
+            return None
+        return stats
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.client.timeout + 1)
+        self.client.close()
@@ -0,0 +1,225 @@
+"""
+Local stand-in for the XMRig HTTP API.
+Serves canned /2/summary and /2/backends payloads, plus a writable
+/1/config that resizes the fake thread list and pause/resume on /json_rpc,
+so the telemetry client, live reconfiguration and duty cycling can be
+exercised offline:
+
+    python -m core.xmrig_api_stub --port 18088 --threads 4 --hashrate 250
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+def make_summary(hashrates: List[float], shares_good: int = 0, shares_total: int = 0,
+                 pool: str = "pool.supportxmr.com:3333", ping: int = 40) -> dict:
+    total = round(sum(hashrates), 2)
+    return {
+        "id": "stub",
+        "worker_id": "stub",
+        "uptime": 60,
+        "restricted": True,
+        "paused": False,
+        "algo": "rx/0",
+        "version": "6.24.0",
+        "kind": "miner",
+        "results": {
+            "diff_current": 10000,
+            "shares_good": shares_good,
+            "shares_total": shares_total,
+            "avg_time_ms": 30000,
+            "hashes_total": int(total * 60),
+            "error_log": [],
+        },
+        "connection": {
+            "pool": pool,
+            "uptime": 60,
+            "ping": ping,
+            "failures": 0,
+            "tls": None,
+            "accepted": shares_good,
+            "rejected": shares_total - shares_good,
+        },
+        "hashrate": {"total": [total, total, None], "highest": total},
+    }
+
+
+def make_backends(hashrates: List[float], affinity: Optional[List[int]] = None) -> list:
+    affinity = affinity if affinity is not None else list(range(len(hashrates)))
+    return [{
+        "type": "cpu",
+        "enabled": True,
+        "algo": "rx/0",
+        "profile": "rx",
+        "hashrate": [round(sum(hashrates), 2), None, None],
+        "threads": [
+            {"intensity": 1, "affinity": cpu, "av": 1, "hashrate": [h, h, None]}
+            for cpu, h in zip(affinity, hashrates)
+        ],
+    }]
+
+
+def make_config(threads: int) -> dict:
+    return {
+        "api": {"id": None, "worker-id": None},
+        "http": {"enabled": True, "host": "127.0.0.1", "port": 0, "restricted": True},
+        "cpu": {
+            "enabled": True,
+            "huge-pages": True,
+            "priority": None,
+            "max-threads-hint": 100,
+            "rx": [-1] * threads,
+        },
+        "donate-level": 0,
+    }
+
+
+class StubXmrigApi:
+    """Threaded HTTP/1.1 server; mutate `summary`/`backends` between polls."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, token: Optional[str] = None,
+                 hashrates: Optional[List[float]] = None):
+        hashrates = hashrates if hashrates is not None else [100.0, 100.0]
+        self.summary = make_summary(hashrates)
+        self.backends = make_backends(hashrates)
+        self.config = make_config(len(hashrates))
+        self.token = token
+        self.config_updates = 0
+        self.paused = False
+        self.connections = 0
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def set_hashrates(self, hashrates: List[float], shares_good: int = 0, shares_total: int = 0,
+                      affinity: Optional[List[int]] = None):
+        self.summary = make_summary(hashrates, shares_good, shares_total)
+        self.backends = make_backends(hashrates, affinity)
+
+    def apply_config(self, cfg: dict):
+        """Mimic XMRig restarting CPU workers with the new thread list."""
+        self.config = cfg
+        self.config_updates += 1
+        rx = (cfg.get("cpu") or {}).get("rx")
+        if isinstance(rx, list) and rx:
+            threads = self.backends[0]["threads"]
+            per_thread = threads[0]["hashrate"][0] if threads else 100.0
+            self.set_hashrates([per_thread] * len(rx), affinity=[int(cpu) for cpu in rx])
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload=None):
+                body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self) -> bool:
+                if not stub.token:
+                    return True
+                return self.headers.get("Authorization") == f"Bearer {stub.token}"
+
+            def do_GET(self):
+                stub.requests += 1
+                if not self._authorized():
+                    return self._send(401, {"error": "unauthorized"})
+                if self.path == "/2/summary":
+                    return self._send(200, stub.summary)
+                if self.path == "/2/backends":
+                    return self._send(200, stub.backends)
+                if self.path == "/1/config":
+                    if not stub.token:
+                        return self._send(403, {"error": "restricted"})
+                    return self._send(200, stub.config)
+                self._send(404, {"error": "not found"})
+
+            def do_PUT(self):
+                stub.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if not self._authorized():
+                    return self._send(401, {"error": "unauthorized"})
+                if self.path != "/1/config":
+                    return self._send(404, {"error": "not found"})
+                if not stub.token:
+                    return self._send(403, {"error": "restricted"})
+                try:
+                    stub.apply_config(json.loads(body))
+                except ValueError:
+                    return self._send(400, {"error": "bad json"})
+                self._send(204)
+
+            def do_POST(self):
+                stub.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if not self._authorized():
+                    return self._send(401, {"error": "unauthorized"})
+                if self.path != "/json_rpc":
+                    return self._send(404, {"error": "not found"})
+                if not stub.token:
+                    return self._send(403, {"error": "restricted"})
+                try:
+                    request = json.loads(body)
+                except ValueError:
+                    return self._send(400, {"error": "bad json"})
+                method = request.get("method")
+                if method in ("pause", "resume"):
+                    stub.paused = method == "pause"
+                    stub.summary["paused"] = stub.paused
+                    return self._send(200, {"id": request.get("id"), "jsonrpc": "2.0", "result": {"status": "OK"}})
+                self._send(200, {"id": request.get("id"), "jsonrpc": "2.0",
+                                 "error": {"code": -32601, "message": "Method not found"}})
+
+        return Handler
+
+    def start(self) -> "StubXmrigApi":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18088)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--hashrate", type=float, default=250.0, help="Per-thread H/s")
+    parser.add_argument("--token", default=None, help="Enable writable /1/config behind this token")
+    args = parser.parse_args()
+    stub = StubXmrigApi(port=args.port, token=args.token, hashrates=[args.hashrate] * args.threads)
+    print(f"Stub XMRig API on 127.0.0.1:{stub.port}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,229 @@
+"""
+Generated XMRig config.json profiles.
+
+XmrigProfile is the typed description of one miner launch (ranked failover
+pools, threads and affinity, RandomX init/mode, huge pages, yield, API
+access, ...); render_config() turns it into a complete XMRig config.json
+with "watch" enabled, so the file can be retuned in place and XMRig reloads
+it without a restart. Profiles are saved per device next to the rendered config, which
+makes them easy to diff between runs.
+"""
+import json
+import os
+import platform
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import config
+from .xmrig_api import apply_cpu_settings
+
+
+@dataclass
+class PoolEndpoint:
+    host: str
+    port: int
+    tls: Optional[bool] = None  # None = TLS only on config.TLS_PORTS
+
+    @property
+    def use_tls(self) -> bool:
+        return self.port in config.TLS_PORTS if self.tls is None else self.tls
+
+
+@dataclass
+class XmrigProfile:
+    wallet: str
+    pools: List[PoolEndpoint]
+    threads: Optional[int] = None  # None = let XMRig size the thread list
+    affinity: Optional[List[int]] = None  # one CPU per thread, overrides threads
+    priority: int = 5
+    randomx_mode: str = "auto"  # auto / fast / light
+    init_threads: int = -1  # dataset init threads (-1 = all cores)
+    huge_pages: bool = True
+    huge_pages_jit: bool = False
+    one_gb_pages: bool = False
+    yield_cpu: bool = True  # "yield": let the OS run other work between hashes
+    rdmsr: bool = False  # MSR tweaks need root and fail on phones anyway
+    wrmsr: bool = False
+    donate_level: int = 0
+    http_enabled: bool = True
+    http_host: str = field(default_factory=lambda: config.XMRIG_API_HOST)
+    http_port: int = field(default_factory=lambda: config.XMRIG_API_PORT)
+    http_token: Optional[str] = None
+    http_restricted: bool = True
+    watch: bool = True
+    retries: int = field(default_factory=lambda: config.POOL_RETRIES)  # per pool before failover
+    retry_pause: int = field(default_factory=lambda: config.POOL_RETRY_PAUSE_SEC)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "XmrigProfile":
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in data.items() if k in known}
+        values['pools'] = [PoolEndpoint(**p) for p in values.get('pools') or []]
+        return cls(**values)
+
+
+def render_config(profile: XmrigProfile) -> dict:
+    """Complete XMRig config.json for `profile`."""
+    cfg = {
+        "api": {"id": None, "worker-id": None},
+        "http": {
+            "enabled": profile.http_enabled,
+            "host": profile.http_host,
+            "port": profile.http_port,
+            "access-token": profile.http_token,
+            "restricted": profile.http_restricted,
+        },
+        "autosave": False,  # XMRig must never rewrite the generated file
+        "background": False,
+        "colors": True,
+        "title": True,
+        "randomx": {
+            "init": profile.init_threads,
+            "init-avx2": -1,
+            "mode": profile.randomx_mode,
+            "1gb-pages": profile.one_gb_pages,
+            "rdmsr": profile.rdmsr,
+            "wrmsr": profile.wrmsr,
+            "cache_qos": False,
+            "numa": True,
+            "scratchpad_prefetch_mode": 1,
+        },
+        "cpu": {
+            "enabled": True,
+            "huge-pages": profile.huge_pages,
+            "huge-pages-jit": profile.huge_pages_jit,
+            "hw-aes": None,
+            "priority": profile.priority,
+            "memory-pool": False,
+            "yield": profile.yield_cpu,
+            "max-threads-hint": 100,
+            "asm": True,
+        },
+        "opencl": {"enabled": False},
+        "cuda": {"enabled": False},
+        "donate-level": profile.donate_level,
+        "donate-over-proxy": profile.donate_level,
+        "log-file": None,
+        "pools": [
+            {
+                "algo": None,
+                "coin": "monero",
+                "url": f"{pool.host}:{pool.port}",
+                "user": profile.wallet,
+                "pass": "x",
+                "rig-id": None,
+                "nicehash": False,
+                "keepalive": True,
+                "enabled": True,
+                "tls": pool.use_tls,
+                "daemon": False,
+            }
+            for pool in profile.pools
+        ],
+        "print-time": 60,
+        "health-print-time": 60,
+        "dmi": True,
+        "retries": profile.retries,
+        "retry-pause": profile.retry_pause,
+        "syslog": False,
+        "user-agent": None,
+        "verbose": 0,
+        "watch": profile.watch,
+        "pause-on-battery": False,
+        "pause-on-active": False,
+    }
+    if profile.affinity is not None or profile.threads is not None:
+        apply_cpu_settings(cfg, threads=profile.threads, affinity=profile.affinity)
+    return cfg
+
+
+def device_id() -> str:
+    """Stable per-device name for cached profiles and configs."""
+    return f"{platform.system()}-{platform.machine()}-{os.cpu_count() or 1}".lower()
+
+
+def config_dir() -> str:
+    return os.path.expanduser(config.XMRIG_CONFIG_DIR)
+
+
+def default_config_path() -> str:
+    return os.path.join(config_dir(), f"config-{device_id()}.json")
+
+
+def _write_json(path: str, data: dict) -> bool:
+    """Atomic write; False (and no write) when the content is unchanged."""
+    text = json.dumps(data, indent=2) + "\n"
+    try:
+        with open(path) as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    # Owner-only: the rendered config carries the session API token
+    with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
+
+def write_config(profile: XmrigProfile, path: str = None) -> str:
+    """
+    Render `profile` to `path` (per-device default) and save the profile
+    beside it. Unchanged content is not rewritten, so XMRig's file watch
+    only reloads on a real change.
+    """
+    path = path or default_config_path()
+    _write_json(path, render_config(profile))
+    save_profile(profile, path)
+    return path
+
+
+def profile_path(config_path: str) -> str:
+    root, _ = os.path.splitext(config_path)
+    return f"{root}.profile.json"
+
+
+def save_profile(profile: XmrigProfile, config_path: str = None):
+    # The session API token is never cached
+    _write_json(profile_path(config_path or default_config_path()),
+                dict(profile.to_dict(), http_token=None))
+
+
+def load_profile(config_path: str = None) -> Optional[XmrigProfile]:
+    try:
+        with open(profile_path(config_path or default_config_path())) as f:
+            return XmrigProfile.from_dict(json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def diff_profiles(old: XmrigProfile, new: XmrigProfile) -> Dict[str, Tuple[object, object]]:
+    """Fields that differ, as {name: (old, new)}."""
+    a, b = old.to_dict(), new.to_dict()
+    return {k: (a[k], b[k]) for k in a if a[k] != b[k]}
+
+
+def retune_config(path: str = None, threads: Optional[int] = None, priority: Optional[int] = None,
+                  affinity: Optional[Sequence[int]] = None,
+                  randomx_mode: Optional[str] = None) -> bool:
+    """
+    Retune a running miner through its watched config file (the fallback
+    when the HTTP API is unavailable). False when the miner was not launched
+    from a generated config or the file cannot be rewritten.
+    """
+    if not config.XMRIG_CONFIG_FILE:
+        return False
+    path = path or default_config_path()
+    try:
+        with open(path) as f:
+            cfg = json.load(f)
+        apply_cpu_settings(cfg, threads, priority, affinity, randomx_mode)
+        _write_json(path, cfg)
+    except (OSError, ValueError):
+        return False
+    return True
@@ -5,16 +5,24 @@ from tkinter import messagebox, scrolledtext
 import os
 import platform
 import time
+from dataclasses import replace
 
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from core import config
-from core.pool_selector import pick_best_pool_sync
+from core.pool_selector import rank_pools_sync
 from core.watchdog import build_xmrig_cmd
+from core.xmrig_config import retune_config
 from core.ai_neural import get_optimizer, TrainingSample
+from core.ai_autotune import Telemetry, TunerConfig, make_strategy
+from core.trace import new_recorder
+from core.cpu_topology import thread_ceiling
+from core.memory_planner import MemoryPlanner
+from core.thermal_governor import DutyCycler, ThermalGovernor, battery_low
 from core.platform_sensors import PlatformMonitor
 from core.balance_tracker import BalanceTracker
+from core.xmrig_api import TelemetryPoller, XmrigApiClient, new_access_token
 from core.wallet_storage import wallet_exists, load_wallet, save_wallet
 from core.wallet_gen import generate_wallet
 import psutil
@@ -24,6 +32,8 @@ miner_thread = None
 monitor_thread = None
 stop_event = threading.Event()
 balance_tracker = None
+telemetry = None
+duty_cycler = None
 platform_monitor = PlatformMonitor()
 ai_optimizer = get_optimizer()
 log_widget = None
@@ -39,28 +49,39 @@ def log_message(message: str):
         log_widget.config(state='disabled')
 
 
+def set_status(status_label: tk.Label, text: str):
+    """Update the status label from any thread (Tk widgets belong to the UI thread)."""
+    status_label.after(0, lambda: status_label.config(text=text))
+
+
 def start_miner(wallet: str, balance_label: tk.Label, status_label: tk.Label):
-    global miner_proc, balance_tracker
+    global miner_proc, balance_tracker, telemetry, duty_cycler
     try:
         log_message("=== Starting miner ===")
         log_message("Selecting best pool...")
         
-        host, port, latency = pick_best_pool_sync()
+        # Latency-ranked pools: best first, the rest as XMRig failover
+        pools = rank_pools_sync(wallet=wallet)
+        host, port, latency = pools[0]
         log_message(f"Selected pool: {host}:{port} (latency: {latency*1000:.0f}ms)")
+        log_message("Failover: " + (", ".join(f"{h}:{p}" for h, p, _ in pools[1:]) or "none"))
         
         log_message("Collecting platform state...")
         state = platform_monitor.get_state()
         log_message(f"State: temp={state['cpu_temp']}, usage={state['cpu_usage']:.2f}, throttling={state['is_throttling']}")
         
+        # Cache-derived RandomX ceiling bounds every tuner
+        max_threads = thread_ceiling(os.cpu_count() or 1)
+        
         # AI suggests optimal threads
         threads = ai_optimizer.suggest_optimal_threads({
-            'threads': os.cpu_count() or 1,
+            'threads': max_threads,
             'cpu_temp': state['cpu_temp'],
             'cpu_usage': state['cpu_usage'],
             'throttled': state['is_throttling'],
             'latency_ms': latency * 1000.0,
             'battery_level': state['battery_level'],
-        }, os.cpu_count() or 1)
+        }, max_threads)
         
         log_message(f"Using {threads} threads")
         
@@ -77,10 +98,17 @@ def start_miner(wallet: str, balance_label: tk.Label, status_label: tk.Label):
         
         if not os.path.exists(bin_path):
             log_message(f"ERROR: XMRig binary not found at {bin_path}")
-            status_label.config(text="Error: XMRig binary not found")
+            set_status(status_label, "Error: XMRig binary not found")
             return
         
-        cmd = build_xmrig_cmd(bin_path, wallet, host, port, threads)
+        api_token = new_access_token()
+        # Fast vs light RandomX from free RAM, plus the huge-page report
+        memory = MemoryPlanner()
+        plan = memory.plan(threads)
+        log_message(plan.report())
+        cmd = build_xmrig_cmd(bin_path, wallet, host, port, threads, api_token=api_token,
+                              randomx_mode=plan.randomx_mode,
+                              failover=[p[:2] for p in pools[1:]])
         log_message(f"Command: {' '.join(cmd)}")
         
         miner_proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
@@ -88,15 +116,26 @@ def start_miner(wallet: str, balance_label: tk.Label, status_label: tk.Label):
         log_message(f"Process started with PID: {miner_proc.pid}")
         
         balance_tracker = BalanceTracker(host, wallet)
-        status_label.config(text=f"Mining: {threads} threads @ {host}:{port}")
+        balance_tracker.start_balance_refresh()
+        telemetry = TelemetryPoller(XmrigApiClient(token=api_token))
+        telemetry.start()
+        duty_cycler = DutyCycler(telemetry.client)
+        set_status(status_label, f"Mining: {threads} threads @ {host}:{port}")
     except Exception as e:
         log_message(f"ERROR during start: {e}")
-        status_label.config(text=f"Error: {e}")
+        set_status(status_label, f"Error: {e}")
         return
     
     # Monitor loop
     def monitor():
+        nonlocal threads
         update_counter = 0
+        last_retune = time.time()
+        tuner = make_strategy(optimizer=ai_optimizer, max_threads=max_threads,
+                              mode_allowed=memory.mode_allowed)
+        tuner_config = TunerConfig(threads, plan.randomx_mode)
+        governor = ThermalGovernor(max_threads)
+        trace = new_recorder(pool=f"{host}:{port}")
         log_message("Monitor thread started")
         while not stop_event.is_set() and miner_proc and miner_proc.poll() is None:
             try:
@@ -106,7 +145,13 @@ def start_miner(wallet: str, balance_label: tk.Label, status_label: tk.Label):
                     if line_stripped:  # Only log non-empty lines
                         print(line_stripped)  # Debug: print XMRig output
                         log_message(line_stripped)  # Show in GUI
-                        balance_tracker.parse_xmrig_output(line)
+                
+                # Exact figures from the HTTP API; console parsing is the fallback
+                stats = telemetry.latest(max_age=config.XMRIG_API_POLL_SEC * 3)
+                if stats:
+                    balance_tracker.update_from_stats(stats)
+                elif line:
+                    balance_tracker.parse_xmrig_output(line)
                 
                 # Update display every 2 iterations
                 update_counter += 1
@@ -127,22 +172,79 @@ def start_miner(wallet: str, balance_label: tk.Label, status_label: tk.Label):
                         cpu_temp=state['cpu_temp'] or 50.0,
                         cpu_usage=state['cpu_usage'],
                         throttled=1 if state['is_throttling'] else 0,
-                        latency_ms=latency * 1000.0,
+                        latency_ms=balance_tracker.pool_latency_ms or latency * 1000.0,
                         battery_level=state['battery_level'] or 100,
                         hashrate=hashrate,
                         accepts=balance_tracker.shares_accepted,
                         rejects=balance_tracker.shares_rejected,
+                        cpu_priority=tuner_config.priority,
                     )
                     ai_optimizer.add_sample(sample)
+                    reading = Telemetry(
+                        hash_rate=hashrate,
+                        threads=threads,
+                        cpu_temp=state['cpu_temp'],
+                        rejects=sample.rejects,
+                        accepts=sample.accepts,
+                        latency_ms=sample.latency_ms,
+                        throttled=state['is_throttling'],
+                        cpu_busy=state['cpu_usage'],
+                        battery_level=state['battery_level'],
+                    )
+                    tuner.observe(reading, tuner_config)
+                    if trace:
+                        trace.record(reading, tuner_config)
                     
-                    # Auto-adjust if overheating
-                    if state['should_reduce']:
-                        status_label.config(text="⚠️ Thermal/Battery limit - reducing load")
-                        stop_miner()
-                        time.sleep(30)
-                        if not stop_event.is_set():
-                            start_miner(wallet, balance_label, status_label)
-                        break
+                    # Thermal/battery governor: step threads or duty cycle
+                    # instead of stop/sleep/restart (keeps the RandomX dataset)
+                    decision = governor.update(state['cpu_temp'], threads, battery_low=battery_low(state))
+                    if decision.duty != duty_cycler.duty:
+                        log_message(f"Governor: duty {duty_cycler.duty:.0%} -> {decision.duty:.0%} ({decision.reason})")
+                    duty_cycler.set_duty(decision.duty)
+                    
+                    # Retune the live miner within the governor's cap
+                    target = tuner_config
+                    if time.time() - last_retune >= config.RETUNE_INTERVAL_SEC:
+                        last_retune = time.time()
+                        target = tuner.suggest(reading, tuner_config, decision.max_threads)
+                    if target.threads > decision.max_threads:
+                        target = replace(target, threads=decision.max_threads)
+                    # Memory pressure rules fast mode out for the rest of the run
+                    if memory.check(tuner_config.randomx_mode):
+                        log_message("Memory pressure: switching RandomX to light mode")
+                    target = replace(target, randomx_mode=memory.clamp_mode(target.randomx_mode))
+                    if target != tuner_config:
+                        try:
+                            telemetry.client.reconfigure(
+                                threads=target.threads, priority=target.priority,
+                                randomx_mode=target.randomx_mode)
+                            log_message(f"Tuner ({tuner.name}): {tuner_config} -> {target} (live, {decision.reason})")
+                            tuner_config = target
+                            threads = target.threads
+                        except Exception as e:
+                            log_message(f"Live reconfigure failed: {e}")
+                            # Watched config file: XMRig reloads it in place
+                            if retune_config(threads=target.threads, priority=target.priority,
+                                             randomx_mode=target.randomx_mode):
+                                log_message(f"Tuner ({tuner.name}): {tuner_config} -> {target} (config file)")
+                                tuner_config = target
+                                threads = target.threads
+                            elif decision.reason == "over limit":
+                                # No live API: fall back to a cool-down restart
+                                set_status(status_label, "⚠️ Thermal limit - restarting miner")
+                                _teardown_miner()
+                                # Restart unless the user stopped (or restarted) mining meanwhile
+                                if not stop_event.wait(30) and miner_proc is None:
+                                    start_miner(wallet, balance_label, status_label)
+                                break
+                    
+                    if decision.duty <= 0:
+                        set_status(status_label, "⚠️ Paused: battery" if governor.battery_paused
+                                   else "⚠️ Paused: thermal")
+                    elif decision.duty < 1:
+                        set_status(status_label, f"Mining: {threads} threads @ {host}:{port} ({decision.duty:.0%} duty)")
+                    else:
+                        set_status(status_label, f"Mining: {threads} threads @ {host}:{port}")
                 
                 time.sleep(1)
             except Exception as e:
@@ -150,6 +252,10 @@ def start_miner(wallet: str, balance_label: tk.Label, status_label: tk.Label):
                 print(f"Monitor error: {e}")
                 break
         
+        tuner.save()
+        ai_optimizer.save_if_dirty()
+        if trace:
+            trace.close()
         log_message("Monitor thread ended")
         if miner_proc:
             exit_code = miner_proc.poll()
@@ -162,8 +268,21 @@ def start_miner(wallet: str, balance_label: tk.Label, status_label: tk.Label):
 
 
 def stop_miner():
-    global miner_proc
     stop_event.set()
+    _teardown_miner()
+
+
+def _teardown_miner():
+    """Stop XMRig and its helpers without touching the user's stop flag."""
+    global miner_proc, telemetry, duty_cycler
+    if duty_cycler:
+        duty_cycler.stop()
+        duty_cycler = None
+    if telemetry:
+        telemetry.stop()
+        telemetry = None
+    if balance_tracker:
+        balance_tracker.stop()
     if miner_proc and miner_proc.poll() is None:
         log_message("Stopping miner...")
         miner_proc.terminate()